@@ -1,175 +1,374 @@
-from flask import Flask, request, render_template_string, redirect, url_for, session, jsonify, send_file
-import requests
+from flask import Flask, Response, request, redirect, url_for, session, jsonify, g, stream_with_context
 import os
-import psycopg2
-import psycopg2.extras
-import hashlib
-from datetime import datetime
+import math
+import time
+import click
+from datetime import datetime, timezone
 import json
-import sqlite3
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
-import uuid
+
+from captcha import CaptchaVerifier, LocalReplayCache, RedisReplayCache, SITEVERIFY_URL
+from cleanup import CleanupWorker
+from db import ConnectionPool, SQLiteWriter
+from downloads import DocumentSender
+from export import FORMATS, export_chunks
+from member_import import FORMATS as IMPORT_FORMATS, import_members, read_records
+from health import HealthChecker, database_check, directory_check, pool_check, schema_check
+from metrics import MetricsRegistry
+import migrations
+from passwords import PasswordHasher, HasherBusy
+from rendering import PageCache, TemplateRegistry, conditional_response
+from ratelimit import TokenBucketLimiter, RedisRateLimiter
+from repository import EXPORT_COLUMNS, Repository
+from sessions import DatabaseSessionStore, MemorySessionStore, ServerSideSessionInterface
+from storage import LocalStorage, S3Storage
+from templates import TEMPLATES
+from uploads import StreamingRequest
 
 app = Flask(__name__)
+# Uploads are streamed to disk while the request body is parsed
+app.request_class = StreamingRequest
 app.secret_key = os.getenv("SECRET_KEY", "fallback-secret-key-change-in-production")
 FRIENDLY_CAPTCHA_SECRET = os.getenv("FRIENDLY_CAPTCHA_SECRET")
+FRIENDLY_CAPTCHA_SITEKEY = os.getenv("FRIENDLY_CAPTCHA_SITEKEY")
+FRIENDLY_CAPTCHA_SITEVERIFY_URL = os.getenv("FRIENDLY_CAPTCHA_SITEVERIFY_URL", SITEVERIFY_URL)
+CAPTCHA_CONNECT_TIMEOUT = float(os.getenv("CAPTCHA_CONNECT_TIMEOUT", 2))
+CAPTCHA_READ_TIMEOUT = float(os.getenv("CAPTCHA_READ_TIMEOUT", 5))
+CAPTCHA_FAILURE_POLICY = os.getenv("CAPTCHA_FAILURE_POLICY", "open")  # "open" or "closed" when the API is unreachable
+CAPTCHA_REPLAY_TTL = float(os.getenv("CAPTCHA_REPLAY_TTL", 3600))  # seconds a used solution stays blocked
+CAPTCHA_REPLAY_MAX_ENTRIES = int(os.getenv("CAPTCHA_REPLAY_MAX_ENTRIES", 10000))
+CAPTCHA_REPLAY_REDIS_URL = os.getenv("CAPTCHA_REPLAY_REDIS_URL")  # share the replay cache between workers
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# File upload configuration
+# Database connection pool configuration
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))  # seconds to wait for a free connection
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", 300))  # seconds before idle connections are closed
+
+# SQLite (no DATABASE_URL): connection tuning and the single-writer thread
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", 5))  # seconds to wait for a lock before failing
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "normal")  # "full" syncs every commit
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", 64))  # page cache per connection
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", 256))  # memory-mapped I/O, 0 disables it
+SQLITE_WRITER = os.getenv("SQLITE_WRITER", "1") == "1"  # route request writes through one writer thread
+SQLITE_WRITER_MAX_BATCH = int(os.getenv("SQLITE_WRITER_MAX_BATCH", 64))  # queued writes committed together
+
+# Dashboard pagination
+DASHBOARD_PAGE_SIZE = int(os.getenv("DASHBOARD_PAGE_SIZE", 24))
+DASHBOARD_MAX_PAGE_SIZE = int(os.getenv("DASHBOARD_MAX_PAGE_SIZE", 200))
+
+# Login throttling: attempts allowed per window (seconds), per client IP and per username
+LOGIN_LIMIT_IP_ATTEMPTS = int(os.getenv("LOGIN_LIMIT_IP_ATTEMPTS", 30))
+LOGIN_LIMIT_IP_WINDOW = float(os.getenv("LOGIN_LIMIT_IP_WINDOW", 60))
+LOGIN_LIMIT_USER_ATTEMPTS = int(os.getenv("LOGIN_LIMIT_USER_ATTEMPTS", 10))
+LOGIN_LIMIT_USER_WINDOW = float(os.getenv("LOGIN_LIMIT_USER_WINDOW", 300))
+LOGIN_LIMIT_REDIS_URL = os.getenv("LOGIN_LIMIT_REDIS_URL")  # share limiter state between workers
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", 0))  # proxies setting X-Forwarded-For (Render: 1)
+
+# Sessions: "cookie" (Flask's signed cookie), "database" (shared by all workers) or
+# "memory" (single-process deployments only; a restart logs everyone out)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "cookie")
+SESSION_TTL = float(os.getenv("SESSION_TTL", 12 * 3600))  # seconds without a write before a session expires
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", 10000))  # memory backend only
+
+# Password hashing (scrypt parameters, see `flask calibrate-password-hash`)
+PASSWORD_SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", 2 ** 14))
+PASSWORD_SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", 8))
+PASSWORD_SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", 1))
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", 600000))  # fallback without scrypt
+PASSWORD_HASH_TARGET_MS = os.getenv("PASSWORD_HASH_TARGET_MS")  # calibrate the cost on startup instead
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+
+# File upload configuration; uploads are staged in UPLOAD_FOLDER and stored in the storage backend
 UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")  # "local" (UPLOAD_FOLDER) or "s3"
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_PREFIX = os.getenv("S3_PREFIX", "consent/")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # MinIO or another S3-compatible store
+S3_REGION = os.getenv("S3_REGION")
 ALLOWED_EXTENSIONS = {'pdf'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB max file size
+# "direct", "x-sendfile"/"x-accel" to let the front proxy send the bytes, or "presigned" (S3)
+CONSENT_DOWNLOAD_MODE = os.getenv("CONSENT_DOWNLOAD_MODE", "direct")
+CONSENT_DOWNLOAD_ACCEL_PREFIX = os.getenv("CONSENT_DOWNLOAD_ACCEL_PREFIX", "/protected-uploads/")  # nginx internal location
+CONSENT_DOWNLOAD_URL_EXPIRES = int(os.getenv("CONSENT_DOWNLOAD_URL_EXPIRES", 300))  # presigned URL lifetime
+
+# Background deletion of stored documents (queue table storage_cleanup)
+CLEANUP_WORKER = os.getenv("CLEANUP_WORKER", "1") == "1"  # 0: run `flask cleanup-storage` from cron instead
+CLEANUP_INTERVAL = float(os.getenv("CLEANUP_INTERVAL", 5))
+CLEANUP_BATCH_SIZE = int(os.getenv("CLEANUP_BATCH_SIZE", 50))
+CLEANUP_MAX_ATTEMPTS = int(os.getenv("CLEANUP_MAX_ATTEMPTS", 8))
+CLEANUP_SWEEP_INTERVAL = float(os.getenv("CLEANUP_SWEEP_INTERVAL", 3600))  # orphan sweep
+CLEANUP_GRACE = float(os.getenv("CLEANUP_GRACE", 3600))  # minimum age of orphans and staging files
+MEMBERSHIP_DRAFT_TTL = float(os.getenv("MEMBERSHIP_DRAFT_TTL", 30 * 86400))  # unfinished wizards are kept this long
+
+# Prometheus-style metrics on /metrics; set METRICS_TOKEN to require "Authorization: Bearer <token>"
+# there and for the statistics on /health
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Readiness probe (/health/ready); results are cached so frequent probes stay cheap
+HEALTH_CACHE_TTL = float(os.getenv("HEALTH_CACHE_TTL", 5))
+HEALTH_DB_TIMEOUT = float(os.getenv("HEALTH_DB_TIMEOUT", 1))  # seconds to wait for a pooled connection
+HEALTH_MIN_FREE_MB = float(os.getenv("HEALTH_MIN_FREE_MB", 100))  # free space required in UPLOAD_FOLDER
+HEALTH_POOL_SATURATION = float(os.getenv("HEALTH_POOL_SATURATION", 0.9))  # share of DB_POOL_MAX_SIZE in use
+
+# Schema migrations; set DB_AUTO_MIGRATE=0 when `flask migrate` runs as a separate deploy step
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "1") == "1"
 
 # Create upload directory if it doesn't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+if TRUSTED_PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT)
+
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+StreamingRequest.allowed_extensions = ALLOWED_EXTENSIONS
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+if STORAGE_BACKEND == 's3':
+    document_storage = S3Storage(S3_BUCKET, prefix=S3_PREFIX, endpoint_url=S3_ENDPOINT_URL, region=S3_REGION)
+else:
+    document_storage = LocalStorage(UPLOAD_FOLDER)
+document_sender = DocumentSender(document_storage, mode=CONSENT_DOWNLOAD_MODE,
+                                 accel_prefix=CONSENT_DOWNLOAD_ACCEL_PREFIX,
+                                 url_expires=CONSENT_DOWNLOAD_URL_EXPIRES)
+
+# All page templates are compiled once here instead of on every request
+template_registry = TemplateRegistry(app, TEMPLATES)
+
+# Rendered anonymous pages; the deploy id (Render sets RENDER_GIT_COMMIT) invalidates them. Without
+# one the templates' digest stands in, so all workers of a deploy agree on the ETags.
+DEPLOY_VERSION = os.getenv("DEPLOY_VERSION") or os.getenv("RENDER_GIT_COMMIT") or template_registry.version
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", 64))
+DEPLOYED_AT = datetime.now(timezone.utc).replace(microsecond=0)
+page_cache = PageCache(DEPLOY_VERSION, DEPLOYED_AT, max_entries=PAGE_CACHE_MAX_ENTRIES)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Database connection for PostgreSQL (Render Standard)
+captcha_verifier = CaptchaVerifier(FRIENDLY_CAPTCHA_SECRET, sitekey=FRIENDLY_CAPTCHA_SITEKEY,
+                                   url=FRIENDLY_CAPTCHA_SITEVERIFY_URL,
+                                   connect_timeout=CAPTCHA_CONNECT_TIMEOUT,
+                                   read_timeout=CAPTCHA_READ_TIMEOUT,
+                                   failure_policy=CAPTCHA_FAILURE_POLICY)
+
+if CAPTCHA_REPLAY_REDIS_URL:
+    captcha_replay_cache = RedisReplayCache(CAPTCHA_REPLAY_REDIS_URL, ttl=CAPTCHA_REPLAY_TTL)
+else:
+    captcha_replay_cache = LocalReplayCache(max_entries=CAPTCHA_REPLAY_MAX_ENTRIES, ttl=CAPTCHA_REPLAY_TTL)
+
+if LOGIN_LIMIT_REDIS_URL:
+    ip_limiter = RedisRateLimiter(LOGIN_LIMIT_REDIS_URL, LOGIN_LIMIT_IP_ATTEMPTS,
+                                  LOGIN_LIMIT_IP_WINDOW, prefix='login:ip:')
+    user_limiter = RedisRateLimiter(LOGIN_LIMIT_REDIS_URL, LOGIN_LIMIT_USER_ATTEMPTS,
+                                    LOGIN_LIMIT_USER_WINDOW, prefix='login:user:')
+else:
+    ip_limiter = TokenBucketLimiter(LOGIN_LIMIT_IP_ATTEMPTS, LOGIN_LIMIT_IP_WINDOW)
+    user_limiter = TokenBucketLimiter(LOGIN_LIMIT_USER_ATTEMPTS, LOGIN_LIMIT_USER_WINDOW)
+
+password_hasher = PasswordHasher(
+    scrypt_params={'n': PASSWORD_SCRYPT_N, 'r': PASSWORD_SCRYPT_R, 'p': PASSWORD_SCRYPT_P},
+    pbkdf2_iterations=PASSWORD_PBKDF2_ITERATIONS,
+    workers=PASSWORD_HASH_WORKERS, max_pending=PASSWORD_HASH_MAX_PENDING)
+if PASSWORD_HASH_TARGET_MS:
+    password_hasher.calibrate(float(PASSWORD_HASH_TARGET_MS))
+
+# Database access: PostgreSQL on Render, SQLite for local development
+repository = Repository(DATABASE_URL, sqlite_busy_timeout=SQLITE_BUSY_TIMEOUT,
+                        sqlite_pragmas={'synchronous': SQLITE_SYNCHRONOUS, 'cache_size': -SQLITE_CACHE_MB * 1024,
+                                        'mmap_size': SQLITE_MMAP_MB * 1024 * 1024})
+
+db_pool = ConnectionPool(repository.connect, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                         timeout=DB_POOL_TIMEOUT, max_idle=DB_POOL_MAX_IDLE, ping=repository.ping)
+
+# SQLite allows one writer at a time; request threads hand their writes to this
+# thread instead of waiting on each other for the lock. The thread starts with
+# the first write, so preforking servers (gunicorn --preload) get one per worker.
+sqlite_writer = None
+if repository.dialect == 'sqlite' and SQLITE_WRITER:
+    sqlite_writer = SQLiteWriter(repository.connect, max_batch=SQLITE_WRITER_MAX_BATCH)
+
+cleanup_worker = CleanupWorker(db_pool, repository, document_storage, staging_dir=UPLOAD_FOLDER,
+                               interval=CLEANUP_INTERVAL, batch_size=CLEANUP_BATCH_SIZE,
+                               max_attempts=CLEANUP_MAX_ATTEMPTS, sweep_interval=CLEANUP_SWEEP_INTERVAL,
+                               grace=CLEANUP_GRACE, draft_ttl=MEMBERSHIP_DRAFT_TTL,
+                               run_write=sqlite_writer and sqlite_writer.run)
+
+# Started by the first request rather than at import, so CLI commands and
+# benchmarks that import the app don't poll the database in the background
+@app.before_request
+def start_cleanup_worker():
+    if CLEANUP_WORKER and not cleanup_worker.running:
+        cleanup_worker.start()
+
+# Request, captcha and upload metrics; pool, query and cache statistics are read at scrape time
+metrics = MetricsRegistry(prefix='membership_')
+request_duration = metrics.histogram('http_request_duration_seconds', 'Time spent handling a request, by route.',
+                                     ('method', 'route'))
+requests_total = metrics.counter('http_requests_total', 'Requests handled, by route and status.',
+                                 ('method', 'route', 'status'))
+captcha_duration = metrics.histogram('captcha_verify_duration_seconds', 'Round trip to the siteverify API.')
+upload_bytes = metrics.counter('upload_bytes_total', 'Bytes of consent documents received, by outcome.',
+                               ('outcome',))
+
+@metrics.register_collector
+def _collect_database():
+    queries = repository.query_stats()
+    yield ('db_queries_total', 'counter', 'Queries run, by statement name.',
+           [('', {'query': name}, entry['count']) for name, entry in sorted(queries.items())])
+    yield ('db_query_duration_seconds_total', 'counter', 'Time spent in queries, by statement name.',
+           [('', {'query': name}, entry['total']) for name, entry in sorted(queries.items())])
+    pool = db_pool.stats()
+    yield ('db_pool_connections', 'gauge', 'Pooled database connections by state.',
+           [('', {'state': state}, pool[state]) for state in ('in_use', 'idle', 'waiting')])
+    yield ('db_pool_timeouts_total', 'counter', 'Checkouts that gave up waiting for a connection.',
+           [('', {}, pool['timeouts'])])
+    if sqlite_writer is not None:
+        writer = sqlite_writer.stats()
+        yield ('sqlite_writer_queued', 'gauge', 'Writes waiting for the SQLite writer thread.',
+               [('', {}, writer['queued'])])
+        yield ('sqlite_writer_jobs_total', 'counter', 'Writes run by the SQLite writer thread.',
+               [('', {}, writer['jobs'])])
+        yield ('sqlite_writer_commits_total', 'counter', 'Transactions committed by the SQLite writer thread.',
+               [('', {}, writer['commits'])])
+
+@metrics.register_collector
+def _collect_captcha():
+    outcomes = captcha_verifier.stats()
+    yield ('captcha_verifications_total', 'counter', 'Siteverify results; unavailable follows CAPTCHA_FAILURE_POLICY.',
+           [('', {'outcome': outcome}, outcomes[outcome]) for outcome in ('accepted', 'rejected', 'unavailable')])
+    replay = captcha_replay_cache.stats()
+    yield ('captcha_replays_total', 'counter', 'Captcha solutions rejected as already used.',
+           [('', {}, replay['hits'])])
+
+@metrics.register_collector
+def _collect_caches():
+    stats = page_cache.stats()
+    yield ('page_cache_requests_total', 'counter', 'Cached page lookups, by result.',
+           [('', {'result': result}, stats.get(result)) for result in ('hits', 'misses')])
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # The URL rule keeps the label set small (no member ids or steps)
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_duration.observe(time.perf_counter() - started, request.method, route)
+        requests_total.inc(request.method, route, str(response.status_code))
+    return response
+
+@app.teardown_request
+def record_failed_request(exc):
+    # Flask's 500 page for an unhandled exception still goes through after_request,
+    # which pops the timer. Only requests that skipped it are counted here: the
+    # exception propagated (debug or PROPAGATE_EXCEPTIONS) or an after_request hook failed
+    started = g.pop('request_started', None)
+    if started is not None and exc is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_duration.observe(time.perf_counter() - started, request.method, route)
+        requests_total.inc(request.method, route, '500')
+
+health_checker = HealthChecker(ttl=HEALTH_CACHE_TTL)
+health_checker.register('db_pool', pool_check(db_pool, max_saturation=HEALTH_POOL_SATURATION))
+health_checker.register('database', database_check(db_pool, repository.ping, timeout=HEALTH_DB_TIMEOUT))
+health_checker.register('schema', schema_check(db_pool, lambda conn: migrations.pending(repository, conn),
+                                                timeout=HEALTH_DB_TIMEOUT))
+health_checker.register('upload_dir', directory_check(UPLOAD_FOLDER, min_free_bytes=int(HEALTH_MIN_FREE_MB * 1024 * 1024)))
+
+# One pooled connection per app context, returned to the pool on teardown
 def get_db_connection():
-    if DATABASE_URL:
-        # Render PostgreSQL
-        conn = psycopg2.connect(DATABASE_URL)
-        return conn
-    else:
-        # Local SQLite for Development
-        import sqlite3
-        conn = sqlite3.connect('members.db')
-        conn.row_factory = sqlite3.Row
-        return conn
+    if 'db_conn' not in g:
+        g.db_conn = db_pool.getconn()
+    return g.db_conn
+
+@app.teardown_appcontext
+def release_db_connection(exc):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        db_pool.putconn(conn)
+
+def run_write(fn):
+    """Run ``fn(conn)`` as one committed write transaction and return its result.
+
+    On SQLite it runs on the writer thread, otherwise on the request's
+    connection. ``fn`` must not commit or roll back itself.
+    """
+    if sqlite_writer is not None:
+        return sqlite_writer.run(fn)
+    conn = get_db_connection()
+    try:
+        result = fn(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return result
+
+# Only a random session id goes into the cookie; the wizard state stays on the server
+if SESSION_BACKEND == 'database':
+    app.session_interface = ServerSideSessionInterface(DatabaseSessionStore(repository, get_db_connection,
+                                                                            run_write=run_write),
+                                                       ttl=SESSION_TTL)
+elif SESSION_BACKEND == 'memory':
+    app.session_interface = ServerSideSessionInterface(MemorySessionStore(max_entries=SESSION_MAX_ENTRIES),
+                                                       ttl=SESSION_TTL)
 
 # Database initialization
+def ensure_admin_user(conn):
+    # Hashing is deliberately slow, skip it when the user exists
+    if repository.user_credentials(conn, 'admin') is None:
+        repository.create_user(conn, 'admin', password_hasher.hash("admin123"))
+        conn.commit()
+
 def init_db():
     conn = get_db_connection()
-    cur = conn.cursor()
-    
-    if DATABASE_URL:
-        # PostgreSQL Tables
-        cur.execute('''CREATE TABLE IF NOT EXISTS users (
-                        id SERIAL PRIMARY KEY,
-                        username VARCHAR(255) UNIQUE NOT NULL,
-                        password_hash VARCHAR(255) NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )''')
-        
-        cur.execute('''CREATE TABLE IF NOT EXISTS members (
-                        id SERIAL PRIMARY KEY,
-                        user_id INTEGER NOT NULL,
-                        membership_type VARCHAR(100) NOT NULL,
-                        country VARCHAR(100),
-                        company_name VARCHAR(255) NOT NULL,
-                        company_street VARCHAR(255),
-                        company_postal_code VARCHAR(50),
-                        company_city VARCHAR(100),
-                        company_country VARCHAR(100),
-                        company_phone VARCHAR(50),
-                        company_website VARCHAR(255),
-                        contact_salutation VARCHAR(10),
-                        business_activity VARCHAR(100),
-                        sub_activity VARCHAR(100),
-                        has_online_store BOOLEAN DEFAULT FALSE,
-                        online_store_products VARCHAR(50),
-                        first_name VARCHAR(100),
-                        last_name VARCHAR(100),
-                        email VARCHAR(255),
-                        phone VARCHAR(50),
-                        status VARCHAR(20) DEFAULT 'pending',
-                        join_date DATE DEFAULT CURRENT_DATE,
-                        data_processing_consent BOOLEAN DEFAULT FALSE,
-                        marketing_consent BOOLEAN DEFAULT FALSE,
-                        terms_consent BOOLEAN DEFAULT TRUE,
-                        consent_document_filename VARCHAR(255),
-                        consent_document_original_name VARCHAR(255),
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (user_id) REFERENCES users (id)
-                    )''')
-        
-        # Test user for PostgreSQL
-        password_hash = hashlib.sha256("admin123".encode()).hexdigest()
-        cur.execute('''INSERT INTO users (username, password_hash) VALUES (%s, %s) 
-                      ON CONFLICT (username) DO NOTHING''', ('admin', password_hash))
+    if DB_AUTO_MIGRATE:
+        migrations.migrate(repository, conn)
     else:
-        # SQLite Tables (for local development)
-        cur.execute('''CREATE TABLE IF NOT EXISTS users (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        username TEXT UNIQUE NOT NULL,
-                        password_hash TEXT NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )''')
-        
-        cur.execute('''CREATE TABLE IF NOT EXISTS members (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        membership_type TEXT NOT NULL,
-                        country TEXT,
-                        company_name TEXT NOT NULL,
-                        company_street TEXT,
-                        company_postal_code TEXT,
-                        company_city TEXT,
-                        company_country TEXT,
-                        company_phone TEXT,
-                        company_website TEXT,
-                        contact_salutation TEXT,
-                        business_activity TEXT,
-                        sub_activity TEXT,
-                        has_online_store BOOLEAN DEFAULT 0,
-                        online_store_products TEXT,
-                        first_name TEXT,
-                        last_name TEXT,
-                        email TEXT,
-                        phone TEXT,
-                        status TEXT DEFAULT 'pending',
-                        join_date DATE DEFAULT CURRENT_DATE,
-                        data_processing_consent BOOLEAN DEFAULT 0,
-                        marketing_consent BOOLEAN DEFAULT 0,
-                        terms_consent BOOLEAN DEFAULT 1,
-                        consent_document_filename TEXT,
-                        consent_document_original_name TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (user_id) REFERENCES users (id)
-                    )''')
-        
-        password_hash = hashlib.sha256("admin123".encode()).hexdigest()
-        cur.execute('INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)', 
-                   ('admin', password_hash))
-    
-    conn.commit()
-    conn.close()
+        missing = migrations.pending(repository, conn)
+        if missing:
+            app.logger.warning('Database schema is behind, run `flask migrate` (pending: %s)',
+                               ', '.join('%d %s' % migration for migration in missing))
+            return
+    ensure_admin_user(conn)
 
 # Helper functions
+def _rehash_password(user_id, old_hash, password):
+    # Runs on the hasher pool, outside of any request
+    new_hash = password_hasher.hash(password)
+    try:
+        with app.app_context():
+            run_write(lambda conn: repository.update_password_hash(conn, user_id, old_hash, new_hash))
+    except Exception:
+        app.logger.exception('Rehashing password of user %s failed', user_id)
+
 def verify_user(username, password):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    password_hash = hashlib.sha256(password.encode()).hexdigest()
-    
-    if DATABASE_URL:
-        cur.execute('SELECT id FROM users WHERE username = %s AND password_hash = %s', 
-                   (username, password_hash))
-    else:
-        cur.execute('SELECT id FROM users WHERE username = ? AND password_hash = ?', 
-                   (username, password_hash))
-    
-    user = cur.fetchone()
-    conn.close()
-    return user[0] if user else None
+    user = repository.user_credentials(get_db_connection(), username)
+    stored_hash = user[1] if user else None
+    matches, needs_rehash = password_hasher.verify(password, stored_hash)
+    if not matches:
+        return None
+    
+    # Upgrade legacy or outdated hashes in the background
+    if needs_rehash:
+        try:
+            password_hasher.submit(_rehash_password, user[0], stored_hash, password)
+        except HasherBusy:
+            pass  # next login tries again
+    return user[0]
 
-def get_user_members(user_id):
-    conn = get_db_connection()
-    if DATABASE_URL:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute('SELECT * FROM members WHERE user_id = %s ORDER BY created_at DESC', (user_id,))
-    else:
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-        cur.execute('SELECT * FROM members WHERE user_id = ? ORDER BY created_at DESC', (user_id,))
-    
-    members = cur.fetchall()
-    conn.close()
-    return members
+def get_user_members(user_id, page_size, after=None, before=None):
+    return repository.members_page(get_db_connection(), user_id, page_size, after, before)
+
+# Messages /submit redirects with; anything else in ?error= is dropped, so it
+# cannot be reflected into the page or fill the page cache
+LOGIN_ERRORS = ('Captcha failed', 'Too many login attempts, please try again', 'Invalid credentials')
 
 # Routes
 @app.route('/')
@@ -177,7 +376,11 @@ def index():
     if 'user_id' in session:
         return redirect(url_for('dashboard'))
     
-    return render_template_string(LOGIN_TEMPLATE, error=request.args.get('error'))
+    error = request.args.get('error')
+    if error not in LOGIN_ERRORS:
+        error = None
+    return page_cache.response(request, ('login.html', error),
+                               lambda: template_registry.render('login.html', error=error))
 
 @app.route('/submit', methods=['POST'])
 def submit():
@@ -185,28 +388,38 @@ def submit():
     password = request.form.get('password')
     solution = request.form.get('frc-captcha-solution')
     
+    # Throttle before doing any expensive work. Every attempt counts against the IP, only
+    # failed ones against the username, so logging in never uses up a user's attempts
+    account = (username or '').strip().lower()
+    retry_after = ip_limiter.hit(request.remote_addr) or user_limiter.retry_after(account)
+    if retry_after:
+        return (template_registry.render('login.html', error='Too many login attempts, please try again later'),
+                429, {'Retry-After': str(math.ceil(retry_after))})
+    
     # Verify Captcha (only if Secret is set)
     if FRIENDLY_CAPTCHA_SECRET and solution:
-        try:
-            captcha_response = requests.post(
-                "https://api.friendlycaptcha.com/api/v1/siteverify",
-                data={"solution": solution, "secret": FRIENDLY_CAPTCHA_SECRET},
-                timeout=5
-            )
-            result = captcha_response.json()
-            if not result.get("success"):
-                return redirect(url_for('index', error='Captcha failed'))
-        except:
-            # Continue anyway on Captcha errors (for development)
-            pass
+        # A solution is only good for one login attempt
+        if captcha_replay_cache.seen(solution):
+            return redirect(url_for('index', error='Captcha failed'))
+        started = time.perf_counter()
+        verified = captcha_verifier.verify(solution)
+        captcha_duration.observe(time.perf_counter() - started)
+        if not verified:
+            return redirect(url_for('index', error='Captcha failed'))
     
     # Verify user
-    user_id = verify_user(username, password)
+    try:
+        user_id = verify_user(username, password)
+    except HasherBusy:
+        return redirect(url_for('index', error='Too many login attempts, please try again'))
     if user_id:
+        if hasattr(session, 'regenerate'):
+            session.regenerate()
         session['user_id'] = user_id
         session['username'] = username
         return redirect(url_for('dashboard'))
     else:
+        user_limiter.hit(account)
         return redirect(url_for('index', error='Invalid credentials'))
 
 @app.route('/dashboard')
@@ -214,10 +427,46 @@ def dashboard():
     if 'user_id' not in session:
         return redirect(url_for('index'))
     
-    members = get_user_members(session['user_id'])
-    return render_template_string(DASHBOARD_TEMPLATE, 
-                                username=session['username'], 
-                                members=members)
+    page_size = min(max(request.args.get('page_size', DASHBOARD_PAGE_SIZE, type=int), 1), DASHBOARD_MAX_PAGE_SIZE)
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    if query:
+        # Search results are ranked, so they are paged by number instead of by cursor
+        members, next_page, truncated = repository.search_members(get_db_connection(), session['user_id'],
+                                                                  query, page_size, page)
+        next_cursor = prev_cursor = None
+    else:
+        members, next_cursor, prev_cursor = get_user_members(session['user_id'], page_size,
+                                                             after=request.args.get('after'),
+                                                             before=request.args.get('before'))
+        next_page = None
+        truncated = False
+    stats = repository.member_stats(get_db_connection(), session['user_id'])
+    draft = repository.draft_summary(get_db_connection(), session['user_id'])
+    return template_registry.render('dashboard.html',
+                                    username=session['username'],
+                                    members=members,
+                                    stats=stats,
+                                    draft=draft,
+                                    page_size=page_size,
+                                    next_cursor=next_cursor,
+                                    prev_cursor=prev_cursor,
+                                    query=query,
+                                    page=page,
+                                    next_page=next_page,
+                                    truncated=truncated)
+
+@app.route('/members/search')
+def search_members():
+    if 'user_id' not in session:
+        return jsonify({'error': 'login required'}), 401
+    
+    page_size = min(max(request.args.get('page_size', DASHBOARD_PAGE_SIZE, type=int), 1), DASHBOARD_MAX_PAGE_SIZE)
+    page = max(request.args.get('page', 1, type=int), 1)
+    members, next_page, truncated = repository.search_members(get_db_connection(), session['user_id'],
+                                                              request.args.get('q', ''), page_size, page)
+    return jsonify({'results': [dict(member) for member in members], 'page': page, 'next_page': next_page,
+                    'truncated': truncated})
 
 @app.route('/membership/new')
 def new_membership():
@@ -225,7 +474,8 @@ def new_membership():
         return redirect(url_for('index'))
     
     membership_type = request.args.get('type', 'packaging-paper')
-    session['membership_form'] = {'membership_type': membership_type}
+    user_id = session['user_id']
+    run_write(lambda conn: repository.start_draft(conn, user_id, membership_type))
     return redirect(url_for('membership_form', step=1))
 
 @app.route('/membership/form/<int:step>')
@@ -236,42 +486,49 @@ def membership_form(step):
     if step < 1 or step > 4:
         return redirect(url_for('membership_form', step=1))
     
-    form_data = session.get('membership_form', {})
+    draft = repository.draft(get_db_connection(), session['user_id'])
+    form_data = draft[0] if draft else {}
     
-    templates = {
-        1: MEMBERSHIP_STEP1_TEMPLATE,
-        2: MEMBERSHIP_STEP2_TEMPLATE,
-        3: MEMBERSHIP_STEP3_TEMPLATE,
-        4: MEMBERSHIP_STEP4_TEMPLATE
-    }
-    
-    return render_template_string(templates[step], form_data=form_data, step=step)
+    # The page shows the user's draft, so it is rendered every time and never cached
+    return conditional_response(request, template_registry.render('membership_step%d.html' % step,
+                                                                  form_data=form_data, step=step))
+
+def _discard_upload(consent_filename):
+    # Undo acquire_blob; once nothing references the document the worker removes it
+    def release(conn):
+        queued = repository.release_blob(conn, consent_filename)
+        if queued:
+            repository.enqueue_cleanup(conn, consent_filename, 'failed-upload')
+        return queued
+    if run_write(release):
+        cleanup_worker.wake()
 
 @app.route('/membership/form/<int:step>', methods=['POST'])
 def save_membership_step(step):
     if 'user_id' not in session:
         return redirect(url_for('index'))
     
-    if 'membership_form' not in session:
-        session['membership_form'] = {}
+    if step < 1 or step > 4:
+        return redirect(url_for('membership_form', step=1))
     
-    form_data = session['membership_form']
+    conn = get_db_connection()
+    user_id = session['user_id']
     
     if step == 1:
-        form_data.update({
+        values = {
             'country': request.form.get('country'),
             'company_name': request.form.get('company_name'),
             'membership_type': request.form.get('membership_type')
-        })
+        }
     elif step == 2:
-        form_data.update({
+        values = {
             'business_activity': request.form.get('business_activity'),
             'sub_activity': request.form.get('sub_activity'),
             'has_online_store': request.form.get('has_online_store') == 'yes',
             'online_store_products': request.form.get('online_store_products')
-        })
+        }
     elif step == 3:
-        form_data.update({
+        values = {
             'company_street': request.form.get('company_street'),
             'company_postal_code': request.form.get('company_postal_code'),
             'company_city': request.form.get('company_city'),
@@ -284,92 +541,69 @@ def save_membership_step(step):
             'last_name': request.form.get('last_name'),
             'email': request.form.get('email'),
             'phone': request.form.get('phone')
-        })
-    elif step == 4:
-        form_data.update({
+        }
+    else:
+        values = {
             'data_processing_consent': bool(request.form.get('data_processing_consent')),
             'marketing_consent': bool(request.form.get('marketing_consent')),
             'terms_consent': bool(request.form.get('terms_consent'))
-        })
+        }
         
         # Handle file upload
+        upload = None
         consent_filename = None
         consent_original_name = None
         
         if 'consent_document' in request.files:
             file = request.files['consent_document']
-            if file and file.filename != '' and allowed_file(file.filename):
-                # Generate unique filename
+            # Already on disk; is_valid means it starts with the PDF magic bytes
+            if (file and file.filename != '' and allowed_file(file.filename)
+                    and getattr(file.stream, 'is_valid', False)):
+                # Content-addressed filename: identical documents are stored once
                 file_extension = file.filename.rsplit('.', 1)[1].lower()
-                consent_filename = f"{uuid.uuid4().hex}.{file_extension}"
+                consent_filename = f"{file.stream.sha256}.{file_extension}"
                 consent_original_name = secure_filename(file.filename)
-                
-                # Save file
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], consent_filename)
-                file.save(file_path)
-        
-        # Save member to database
-        conn = get_db_connection()
-        cur = conn.cursor()
+                upload = file.stream
+            elif file and file.filename != '':
+                upload_bytes.inc('rejected', amount=getattr(file.stream, 'size', 0))
+                # Nothing is saved; the user picks another file
+                draft = repository.draft(conn, user_id)
+                return template_registry.render('membership_step4.html', form_data=draft[0] if draft else {},
+                                                step=4, error='Please upload a PDF file (PDF files only).'), 400
         
-        if DATABASE_URL:
-            cur.execute('''INSERT INTO members 
-                          (user_id, membership_type, country, company_name, business_activity, 
-                           sub_activity, has_online_store, online_store_products, 
-                           company_street, company_postal_code, company_city, company_country, 
-                           company_phone, company_website, contact_salutation,
-                           first_name, last_name, email, phone, data_processing_consent, 
-                           marketing_consent, terms_consent, consent_document_filename, 
-                           consent_document_original_name)
-                          VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)''',
-                         (session['user_id'], form_data.get('membership_type'), form_data.get('country'),
-                          form_data.get('company_name'), form_data.get('business_activity'),
-                          form_data.get('sub_activity'), form_data.get('has_online_store', False),
-                          form_data.get('online_store_products'),
-                          form_data.get('company_street'), form_data.get('company_postal_code'),
-                          form_data.get('company_city'), form_data.get('company_country'),
-                          form_data.get('company_phone'), form_data.get('company_website'),
-                          form_data.get('contact_salutation'),
-                          form_data.get('first_name'), form_data.get('last_name'), 
-                          form_data.get('email'), form_data.get('phone'),
-                          form_data.get('data_processing_consent', False),
-                          form_data.get('marketing_consent', False),
-                          form_data.get('terms_consent', True),
-                          consent_filename, consent_original_name))
-        else:
-            # Für SQLite:
-            cur.execute('''INSERT INTO members 
-                          (user_id, membership_type, country, company_name, business_activity, 
-                           sub_activity, has_online_store, online_store_products, 
-                           company_street, company_postal_code, company_city, company_country, 
-                           company_phone, company_website, contact_salutation,
-                           first_name, last_name, email, phone, data_processing_consent, 
-                           marketing_consent, terms_consent, consent_document_filename, 
-                           consent_document_original_name)
-                          VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                         (session['user_id'], form_data.get('membership_type'), form_data.get('country'),
-                          form_data.get('company_name'), form_data.get('business_activity'),
-                          form_data.get('sub_activity'), form_data.get('has_online_store', False),
-                          form_data.get('online_store_products'),
-                          form_data.get('company_street'), form_data.get('company_postal_code'),
-                          form_data.get('company_city'), form_data.get('company_country'),
-                          form_data.get('company_phone'), form_data.get('company_website'),
-                          form_data.get('contact_salutation'),
-                          form_data.get('first_name'), form_data.get('last_name'), 
-                          form_data.get('email'), form_data.get('phone'),
-                          form_data.get('data_processing_consent', False),
-                          form_data.get('marketing_consent', False),
-                          form_data.get('terms_consent', True),
-                          consent_filename, consent_original_name))
+        if upload is not None:
+            # The reference is committed before the file lands, so cleanup never removes it
+            # underneath; the transfer itself runs outside any write transaction
+            run_write(lambda conn: repository.acquire_blob(conn, consent_filename, upload.sha256, upload.size))
+            try:
+                document_storage.put_upload(consent_filename, upload)
+            except Exception:
+                _discard_upload(consent_filename)
+                raise
+            upload_bytes.inc('stored', amount=upload.size)
         
-        conn.commit()
-        conn.close()
+        # Promote the draft to a member in a single statement
+        try:
+            promoted = run_write(lambda conn: repository.promote_draft(conn, user_id, values, consent_filename,
+                                                                      consent_original_name))
+        except Exception:
+            if upload is not None:
+                _discard_upload(consent_filename)
+            raise
+        if not promoted:
+            # Draft expired or was already submitted (e.g. from another tab)
+            if upload is not None:
+                _discard_upload(consent_filename)
+            return redirect(url_for('membership_form', step=1))
         
-        session.pop('membership_form', None)
         return redirect(url_for('dashboard'))
     
-    session['membership_form'] = form_data
-    next_step = step + 1 if step < 4 else 4
+    # Only write when this step changed something or the wizard got further
+    next_step = step + 1
+    draft = repository.draft(conn, user_id)
+    form_data, saved_step = draft if draft else ({}, 0)
+    if saved_step < next_step or any(form_data.get(key) != value for key, value in values.items()):
+        run_write(lambda conn: repository.save_draft_step(conn, user_id, step, values, next_step))
     return redirect(url_for('membership_form', step=next_step))
 
 @app.route('/download/<int:member_id>/consent')
@@ -377,1378 +611,272 @@ def download_consent_document(member_id):
     if 'user_id' not in session:
         return redirect(url_for('index'))
     
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    if DATABASE_URL:
-        cur.execute('SELECT consent_document_filename, consent_document_original_name FROM members WHERE id = %s AND user_id = %s', 
-                   (member_id, session['user_id']))
-    else:
-        cur.execute('SELECT consent_document_filename, consent_document_original_name FROM members WHERE id = ? AND user_id = ?', 
-                   (member_id, session['user_id']))
-    
-    result = cur.fetchone()
-    conn.close()
+    result = repository.member_document(get_db_connection(), member_id, session['user_id'])
     
     if not result or not result[0]:
         return "File not found", 404
     
-    filename = result[0]
-    original_name = result[1] or filename
-    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    
-    if not os.path.exists(file_path):
+    filename, original_name, sha256 = result
+    response = document_sender.send(filename, original_name or filename, sha256)
+    if response is None:
         return "File not found", 404
-    
-    return send_file(file_path, as_attachment=True, download_name=original_name)
+    return response
 
 @app.route('/logout')
 def logout():
     session.clear()
     return redirect(url_for('index'))
 
-# Health Check for Render
+def metrics_authorized():
+    # Open unless METRICS_TOKEN is set
+    return not METRICS_TOKEN or request.headers.get('Authorization') == 'Bearer ' + METRICS_TOKEN
+
+# Health Check for Render; the statistics need the metrics token
 @app.route('/health')
 def health_check():
-    return {'status': 'healthy', 'timestamp': datetime.now().isoformat()}
+    status = {'status': 'healthy', 'timestamp': datetime.now().isoformat()}
+    if not metrics_authorized():
+        return status
+    return {**status,
+            'db_pool': db_pool.stats(), 'queries': repository.query_stats(),
+            'captcha': captcha_verifier.stats(), 'captcha_replay_cache': captcha_replay_cache.stats(),
+            'login_limits': {'ip': ip_limiter.stats(), 'username': user_limiter.stats()},
+            'page_cache': page_cache.stats(),
+            'storage_cleanup': cleanup_worker.stats(), 'readiness': health_checker.stats(),
+            'sessions': getattr(app.session_interface, 'stats', lambda: {'backend': 'cookie'})(),
+            'sqlite_writer': sqlite_writer.stats() if sqlite_writer is not None else None}
+
+@app.route('/members/export')
+def export_members():
+    if 'user_id' not in session:
+        return redirect(url_for('index'))
+    
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        return "Unknown export format", 400
+    compress = request.args.get('gzip') == '1'
+    mimetype, extension = FORMATS[fmt]
+    filename = 'members.%s%s' % (extension, '.gz' if compress else '')
+    # Rows are read and written batch by batch while the response is sent
+    rows = repository.iter_members(get_db_connection(), session['user_id'])
+    response = Response(stream_with_context(export_chunks(EXPORT_COLUMNS, rows, fmt, compress)),
+                        mimetype='application/gzip' if compress else mimetype)
+    response.headers['Content-Disposition'] = 'attachment; filename="%s"' % filename
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+IMPORT_CONTENT_TYPES = {'text/csv': 'csv', 'application/x-ndjson': 'jsonl', 'application/jsonl': 'jsonl'}
+
+@app.route('/members/import', methods=['POST'])
+def import_members_endpoint():
+    if 'user_id' not in session:
+        return jsonify({'error': 'login required'}), 401
+    
+    # The file is the raw request body, e.g. curl --data-binary @members.csv -H 'Content-Type: text/csv'
+    fmt = request.args.get('format') or IMPORT_CONTENT_TYPES.get(request.mimetype)
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'error': 'send text/csv or application/x-ndjson, or pass ?format=csv|jsonl'}), 415
+    report = import_members(repository, get_db_connection(), session['user_id'],
+                            read_records(request.stream, fmt), run_write=sqlite_writer and sqlite_writer.run)
+    if 'error' in report:
+        # Part of the file is stored; the report says up to which row
+        return jsonify(report), 500
+    return jsonify(report), 200 if not report['failed'] else 207
+
+# Liveness: the process answers requests; restart it if this fails
+@app.route('/health/live')
+def liveness_check():
+    return {'status': 'alive', 'timestamp': datetime.now().isoformat()}
+
+# Readiness: only route traffic here while the database, pool and upload folder are usable
+@app.route('/health/ready')
+def readiness_check():
+    result = health_checker.check()
+    return ({'status': 'ready' if result['ready'] else 'unavailable', 'checks': result['checks']},
+            200 if result['ready'] else 503)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if not metrics_authorized():
+        return 'Unauthorized', 401
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/membership/<int:member_id>/view')
 def view_member(member_id):
     if 'user_id' not in session:
         return redirect(url_for('index'))
 
-    conn = get_db_connection()
-    if DATABASE_URL:
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute('SELECT * FROM members WHERE id = %s AND user_id = %s', (member_id, session['user_id']))
-    else:
-        conn.row_factory = sqlite3.Row
-        cur = conn.cursor()
-        cur.execute('SELECT * FROM members WHERE id = ? AND user_id = ?', (member_id, session['user_id']))
-
-    member = cur.fetchone()
-    conn.close()
+    member = repository.member_by_id(get_db_connection(), member_id, session['user_id'])
 
     if not member:
         return "Member not found", 404
 
-    return render_template_string(VIEW_MEMBER_TEMPLATE, member=member)
+    return template_registry.render('view_member.html', member=member)
 
 @app.route('/membership/<int:member_id>/delete', methods=['POST'])
 def delete_member(member_id):
     if 'user_id' not in session:
         return redirect(url_for('index'))
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    # Zuerst prüfen ob der Member dem User gehört und Dateiinfo holen
-    if DATABASE_URL:
-        cur.execute('SELECT consent_document_filename FROM members WHERE id = %s AND user_id = %s', 
-                   (member_id, session['user_id']))
-    else:
-        cur.execute('SELECT consent_document_filename FROM members WHERE id = ? AND user_id = ?', 
-                   (member_id, session['user_id']))
-    
-    result = cur.fetchone()
-    if not result:
-        conn.close()
+    user_id = session['user_id']
+    
+    def delete(conn):
+        # Member aus Datenbank löschen (prüft dabei, ob er dem User gehört)
+        result = repository.delete_member(conn, member_id, user_id)
+        if not result:
+            return None
+        consent_filename = result[0]
+        # Referenz auf das Dokument freigeben; verweist kein Mitglied mehr darauf,
+        # löscht der Cleanup-Worker die Datei im Hintergrund
+        queued = consent_filename and repository.release_blob(conn, consent_filename)
+        if queued:
+            repository.enqueue_cleanup(conn, consent_filename, 'delete')
+        return bool(queued)
+    
+    queued = run_write(delete)
+    if queued is None:
         return "Member not found", 404
-    
-    consent_filename = result[0]
-    
-    # Member aus Datenbank löschen
-    if DATABASE_URL:
-        cur.execute('DELETE FROM members WHERE id = %s AND user_id = %s', 
-                   (member_id, session['user_id']))
-    else:
-        cur.execute('DELETE FROM members WHERE id = ? AND user_id = ?', 
-                   (member_id, session['user_id']))
-    
-    conn.commit()
-    conn.close()
-    
-    # Uploaded Datei löschen falls vorhanden
-    if consent_filename:
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], consent_filename)
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except:
-                pass  # Fehler beim Dateien löschen ignorieren
+    if queued:
+        cleanup_worker.wake()
     
     return redirect(url_for('dashboard'))
 
 
 
-# Template Constants
-LOGIN_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Login - Membership System</title>
-    <style>
-        body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; 
-               max-width: 400px; margin: 100px auto; padding: 20px; background: #f5f5f5; }
-        .login-container { background: white; padding: 30px; border-radius: 12px; box-shadow: 0 4px 12px rgba(0,0,0,0.15); }
-        h2 { text-align: center; color: #333; margin-bottom: 30px; }
-        .form-group { margin-bottom: 20px; }
-        input[type="text"], input[type="password"] { 
-            width: 100%; padding: 12px; border: 2px solid #ddd; border-radius: 8px; 
-            font-size: 16px; transition: border-color 0.3s;
-        }
-        input:focus { border-color: #007bff; outline: none; }
-        button { 
-            width: 100%; padding: 14px; background: #007bff; color: white; 
-            border: none; border-radius: 8px; cursor: pointer; font-size: 16px; font-weight: 600;
-            transition: background-color 0.3s;
-        }
-        button:hover { background: #0056b3; }
-        .error { color: #dc3545; margin: 15px 0; text-align: center; padding: 10px; 
-                 background: #f8d7da; border-radius: 6px; }
-        .test-info { margin-top: 15px; padding: 10px; background: #d1ecf1; 
-                     border-radius: 6px; font-size: 14px; text-align: center; }
-    </style>
-</head>
-<body>
-    <div class="login-container">
-        <h2>👥 Membership System</h2>
-        {% if error %}
-            <div class="error">❌ {{ error }}</div>
-        {% endif %}
-        <form method="POST" action="/submit">
-            <div class="form-group">
-                <input type="text" name="username" placeholder="Username" required />
-            </div>
-            <div class="form-group">
-                <input type="password" name="password" placeholder="Password" required />
-            </div>
-            <div class="form-group">
-                <div class="frc-captcha" data-sitekey="FCMLUC8UHAIO4Q8G"></div>
-            </div>
-            <button type="submit">Login</button>
-        </form>
-        <div class="test-info">
-            <strong>Test Account:</strong><br>
-            Username: admin<br>
-            Password: admin123
-        </div>
-    </div>
-    <script src="https://unpkg.com/friendly-challenge@0.9.9/widget.module.min.js" type="module"></script>
-</body>
-</html>
-'''
-
-DASHBOARD_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Dashboard - Membership System</title>
-    <style>
-        body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; 
-               margin: 0; padding: 20px; background: #f8f9fa; }
-        .container { max-width: 1200px; margin: 0 auto; }
-        .header { background: white; padding: 20px 30px; border-radius: 12px; 
-                  box-shadow: 0 2px 8px rgba(0,0,0,0.1); margin-bottom: 30px;
-                  display: flex; justify-content: space-between; align-items: center; }
-        .header h1 { margin: 0; color: #333; }
-        .user-info { display: flex; align-items: center; gap: 15px; }
-        .btn { padding: 10px 20px; text-decoration: none; border-radius: 8px; 
-               font-weight: 600; transition: all 0.3s; }
-        .btn-primary { background: #007bff; color: white; }
-        .btn-primary:hover { background: #0056b3; transform: translateY(-1px); }
-        .btn-secondary { background: #6c757d; color: white; }
-        .btn-secondary:hover { background: #545b62; }
-        .btn-success { background: #28a745; color: white; }
-        .btn-success:hover { background: #218838; }
-        .add-button { margin-bottom: 30px; position: relative; display: inline-block; }
-        .dropdown-container { position: relative; display: inline-block; }
-        .dropdown-button { 
-            background: #007bff; color: white; padding: 10px 20px; border: none;
-            border-radius: 8px; cursor: pointer; font-weight: 600; 
-            display: flex; align-items: center; gap: 8px; transition: all 0.3s;
-        }
-        .dropdown-button:hover { background: #0056b3; transform: translateY(-1px); }
-        .dropdown-arrow { font-size: 12px; transition: transform 0.3s; }
-        .dropdown-menu { 
-            position: absolute; top: 100%; left: 0; background: white; 
-            border-radius: 8px; box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-            min-width: 220px; z-index: 1000; opacity: 0; visibility: hidden;
-            transform: translateY(-10px); transition: all 0.3s;
-        }
-        .dropdown-container:hover .dropdown-menu { 
-            opacity: 1; visibility: visible; transform: translateY(0);
-        }
-        .dropdown-container:hover .dropdown-arrow { transform: rotate(180deg); }
-        .dropdown-item { 
-            display: block; padding: 12px 20px; color: #333; text-decoration: none;
-            border-bottom: 1px solid #f0f0f0; transition: background-color 0.3s;
-        }
-        .dropdown-item:last-child { border-bottom: none; border-radius: 0 0 8px 8px; }
-        .dropdown-item:first-child { border-radius: 8px 8px 0 0; }
-        .dropdown-item:hover { background: #f8f9fa; }
-        .member-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(320px, 1fr)); gap: 25px; }
-        .member-card { 
-            background: white; border-radius: 12px; padding: 25px; 
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1); transition: transform 0.3s, box-shadow 0.3s;
-        }
-        .member-card:hover { transform: translateY(-2px); box-shadow: 0 8px 20px rgba(0,0,0,0.15); }
-        .member-card h3 { margin: 0 0 15px 0; color: #007bff; font-size: 1.3em; }
-        .member-info { margin: 15px 0; line-height: 1.6; }
-        .member-info strong { color: #555; }
-        .member-actions { margin-top: 20px; display: flex; gap: 10px; flex-wrap: wrap; }
-        .member-actions .btn { padding: 8px 16px; font-size: 14px; }
-        .empty-state { text-align: center; padding: 80px 20px; color: #6c757d; }
-        .empty-state h3 { font-size: 1.5em; margin-bottom: 15px; }
-        .stats { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); 
-                 gap: 20px; margin-bottom: 30px; }
-        .stat-card { background: white; padding: 20px; border-radius: 12px; 
-                     box-shadow: 0 2px 8px rgba(0,0,0,0.1); text-align: center; }
-        .stat-number { font-size: 2em; font-weight: bold; color: #007bff; }
-        .stat-label { color: #6c757d; margin-top: 5px; }
-        .status-badge { 
-            display: inline-block; padding: 4px 12px; border-radius: 20px; 
-            font-size: 12px; font-weight: 600; text-transform: uppercase;
-        }
-        .status-active { background: #d4edda; color: #155724; }
-        .status-pending { background: #fff3cd; color: #856404; }
-        .status-expired { background: #f8d7da; color: #721c24; }
-        .document-info {
-            margin-top: 10px; padding: 8px; background: #f8f9fa; border-radius: 6px; 
-            font-size: 13px; color: #6c757d;
-        }
-        .document-info strong { color: #495057; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>👥 Membership System</h1>
-            <div class="user-info">
-                <span>Welcome, <strong>{{ username }}</strong>!</span>
-                <a href="/logout" class="btn btn-secondary">Logout</a>
-            </div>
-        </div>
-        
-        {% if members %}
-        <div class="stats">
-            <div class="stat-card">
-                <div class="stat-number">{{ members|length }}</div>
-                <div class="stat-label">Total Members</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number">{{ members|selectattr('status', 'equalto', 'active')|list|length }}</div>
-                <div class="stat-label">Active Members</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-number">{{ members|selectattr('consent_document_filename')|list|length }}</div>
-                <div class="stat-label">With Documents</div>
-            </div>
-        </div>
-        {% endif %}
-        
-        <div class="add-button">
-            <div class="dropdown-container">
-                <button class="dropdown-button">
-                    + New Membership
-                    <span class="dropdown-arrow">▼</span>
-                </button>
-                <div class="dropdown-menu">
-                    <a href="/membership/new?type=packaging-paper" class="dropdown-item">
-                        📦 Packaging & Paper
-                    </a>
-                    <a href="/membership/new?type=food-service" class="dropdown-item">
-                        🍽️ Food Service Packaging
-                    </a>
-                </div>
-            </div>
-        </div>
-        
-        {% if members %}
-            <div class="member-grid">
-                {% for member in members %}
-                <div class="member-card">
-                    <h3>{{ member.company_name }}</h3>
-                    <div class="member-info">
-                        <strong>Contact:</strong> {{ member.first_name }} {{ member.last_name }}<br>
-                        <strong>Country:</strong> {{ member.country or 'Not provided' }}<br>
-                        <strong>Business:</strong> {{ member.business_activity or 'Not specified' }}<br>
-                        <strong>Status:</strong> 
-                        <span class="status-badge status-{{ member.status or 'pending' }}">
-                            {{ (member.status or 'pending')|title }}
-                        </span>
-                    </div>
-                    
-                    {% if member.consent_document_filename %}
-                    <div class="document-info">
-                        <strong>📄 Consent Document:</strong> {{ member.consent_document_original_name or 'Uploaded' }}
-                    </div>
-                    {% endif %}
-                    
-                    <div class="member-actions">
-                        <a href="/membership/{{ member.id }}/view" class="btn btn-primary">View</a>
-                        <a href="/membership/{{ member.id }}/edit" class="btn btn-secondary">Edit</a>
-                        {% if member.consent_document_filename %}
-                        <a href="/download/{{ member.id }}/consent" class="btn btn-success">📄 Download PDF</a>
-                        {% endif %}
-                        <form method="POST" action="/membership/{{ member.id }}/delete" style="display: inline;" 
-                              onsubmit="return confirm('Are you sure you want to delete {{ member.company_name }}?');">
-                            <button type="submit" class="btn btn-secondary" style="background: #dc3545; border: none; cursor: pointer; color: white;">🗑️ Delete</button>
-                        </form>
-                    </div>
-                </div>
-                {% endfor %}
-            </div>
-        {% else %}
-            <div class="empty-state">
-                <h3>👥 No members yet</h3>
-                <p>Click "New Membership" to get started.</p>
-            </div>
-        {% endif %}
-    </div>
-</body>
-</html>
-'''
-VIEW_MEMBER_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <title>Member Details</title>
-    <style>
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
-            background: #f8f9fa;
-            padding: 40px;
-        }
-        .container {
-            max-width: 900px;
-            margin: auto;
-            background: white;
-            padding: 40px;
-            border-radius: 12px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-        }
-        h2 {
-            text-align: center;
-            margin-bottom: 40px;
-            color: #007bff;
-        }
-        h3 {
-            margin-top: 40px;
-            color: #343a40;
-            border-bottom: 1px solid #ddd;
-            padding-bottom: 8px;
-        }
-        .detail-row {
-            display: flex;
-            justify-content: space-between;
-            padding: 10px 0;
-            border-bottom: 1px dashed #e9ecef;
-        }
-        .label {
-            font-weight: 600;
-            color: #495057;
-            flex: 0 0 40%;
-        }
-        .value {
-            flex: 1;
-            color: #212529;
-            text-align: right;
-        }
-        .file-link {
-            display: inline-block;
-            margin-top: 8px;
-            text-decoration: none;
-            color: #007bff;
-        }
-        .file-link:hover {
-            text-decoration: underline;
-        }
-        .actions {
-            margin-top: 40px;
-            display: flex;
-            gap: 15px;
-            justify-content: center;
-            padding-top: 20px;
-            border-top: 1px solid #e9ecef;
-        }
-        .btn {
-            padding: 12px 24px;
-            border: none;
-            border-radius: 8px;
-            text-decoration: none;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.3s;
-        }
-        .btn-back {
-            background: #6c757d;
-            color: white;
-        }
-        .btn-back:hover {
-            background: #545b62;
-        }
-        .btn-edit {
-            background: #007bff;
-            color: white;
-        }
-        .btn-edit:hover {
-            background: #0056b3;
-        }
-        .btn-delete {
-            background: #dc3545;
-            color: white;
-        }
-        .btn-delete:hover {
-            background: #c82333;
-        }
-        .status-badge {
-            display: inline-block;
-            padding: 4px 12px;
-            border-radius: 20px;
-            font-size: 12px;
-            font-weight: 600;
-            text-transform: uppercase;
-        }
-        .status-active { background: #d4edda; color: #155724; }
-        .status-pending { background: #fff3cd; color: #856404; }
-        .status-expired { background: #f8d7da; color: #721c24; }
-        .membership-badge {
-            display: inline-block;
-            background: #e3f2fd;
-            color: #1976d2;
-            padding: 6px 16px;
-            border-radius: 20px;
-            font-size: 14px;
-            font-weight: 600;
-            margin-bottom: 20px;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h2>👤 Member Details</h2>
-        
-        <div style="text-align: center;">
-            <div class="membership-badge">
-                {% if member.membership_type == 'packaging-paper' %}📦 Packaging & Paper{% else %}🍽️ Food Service Packaging{% endif %}
-            </div>
-        </div>
-
-        <h3>🏢 Company Information</h3>
-        <div class="detail-row"><span class="label">Company Name</span><span class="value">{{ member.company_name }}</span></div>
-        <div class="detail-row"><span class="label">Country</span><span class="value">{{ member.country or '—' }}</span></div>
-        <div class="detail-row"><span class="label">Street Address</span><span class="value">{{ member.company_street or '—' }}</span></div>
-        <div class="detail-row"><span class="label">Postal Code</span><span class="value">{{ member.company_postal_code or '—' }}</span></div>
-        <div class="detail-row"><span class="label">City</span><span class="value">{{ member.company_city or '—' }}</span></div>
-        <div class="detail-row"><span class="label">Company Country</span><span class="value">{{ member.company_country or '—' }}</span></div>
-        <div class="detail-row"><span class="label">Company Phone</span><span class="value">{{ member.company_phone or '—' }}</span></div>
-        <div class="detail-row"><span class="label">Website</span><span class="value">{{ member.company_website or '—' }}</span></div>
-
-        <h3>📋 Business Details</h3>
-        <div class="detail-row"><span class="label">Business Activity</span><span class="value">{{ member.business_activity or '—' }}</span></div>
-        <div class="detail-row"><span class="label">Sub Activity</span><span class="value">{{ member.sub_activity or '—' }}</span></div>
-        <div class="detail-row"><span class="label">Has Online Store</span><span class="value">{{ 'Yes' if member.has_online_store else 'No' }}</span></div>
-        {% if member.has_online_store %}
-        <div class="detail-row"><span class="label">Online Store Products</span><span class="value">{{ member.online_store_products or '—' }}</span></div>
-        {% endif %}
-
-        <h3>👤 Contact Person</h3>
-        <div class="detail-row"><span class="label">Salutation</span><span class="value">{{ member.contact_salutation or '—' }}</span></div>
-        <div class="detail-row"><span class="label">First Name</span><span class="value">{{ member.first_name or '—' }}</span></div>
-        <div class="detail-row"><span class="label">Last Name</span><span class="value">{{ member.last_name or '—' }}</span></div>
-        <div class="detail-row"><span class="label">Email</span><span class="value">{{ member.email or '—' }}</span></div>
-        <div class="detail-row"><span class="label">Phone</span><span class="value">{{ member.phone or '—' }}</span></div>
-
-        <h3>📄 Membership & Consent</h3>
-        <div class="detail-row"><span class="label">Status</span><span class="value"><span class="status-badge status-{{ member.status or 'pending' }}">{{ (member.status or 'pending')|title }}</span></span></div>
-        <div class="detail-row"><span class="label">Join Date</span><span class="value">{{ member.join_date or '—' }}</span></div>
-        <div class="detail-row"><span class="label">Data Processing Consent</span><span class="value">{{ 'Yes' if member.data_processing_consent else 'No' }}</span></div>
-        <div class="detail-row"><span class="label">Marketing Consent</span><span class="value">{{ 'Yes' if member.marketing_consent else 'No' }}</span></div>
-        <div class="detail-row"><span class="label">Terms Consent</span><span class="value">{{ 'Yes' if member.terms_consent else 'No' }}</span></div>
-        {% if member.consent_document_filename %}
-            <div class="detail-row">
-                <span class="label">Consent Document</span>
-                <span class="value">
-                    <a href="/download/{{ member.id }}/consent" class="file-link" target="_blank">
-                        📄 {{ member.consent_document_original_name or "Download PDF" }}
-                    </a>
-                </span>
-            </div>
-        {% endif %}
-        <div class="detail-row"><span class="label">Created At</span><span class="value">{{ member.created_at or '—' }}</span></div>
-
-        <div class="actions">
-            <a href="/dashboard" class="btn btn-back">← Back to Dashboard</a>
-            <a href="/membership/{{ member.id }}/edit" class="btn btn-edit">✏️ Edit</a>
-            <form method="POST" action="/membership/{{ member.id }}/delete" style="display: inline;" 
-                  onsubmit="return confirm('Are you sure you want to delete this member? This action cannot be undone.');">
-                <button type="submit" class="btn btn-delete">🗑️ Delete</button>
-            </form>
-        </div>
-    </div>
-</body>
-</html>
-'''
-
-
-
-MEMBERSHIP_STEP1_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>New Membership - Packaging & Paper</title>
-    <style>
-        body { 
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; 
-            margin: 0; padding: 20px; background: #f8f9fa; 
-        }
-        .container { max-width: 600px; margin: 0 auto; }
-        .form-card { 
-            background: white; padding: 30px; border-radius: 12px; 
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1); 
-        }
-        .header { text-align: center; margin-bottom: 30px; }
-        .header h2 { color: #333; margin: 0 0 10px 0; font-size: 1.8em; }
-        .header .subtitle { color: #6c757d; font-size: 1.1em; }
-        .membership-badge {
-            display: inline-block; background: #e3f2fd; color: #1976d2;
-            padding: 6px 16px; border-radius: 20px; font-size: 14px;
-            font-weight: 600; margin-bottom: 20px;
-        }
-        .progress { 
-            background: #e9ecef; border-radius: 10px; margin-bottom: 30px; height: 8px; 
-        }
-        .progress-bar { 
-            background: linear-gradient(90deg, #007bff, #0056b3); 
-            height: 8px; border-radius: 10px; width: 25%; transition: width 0.3s; 
-        }
-        .step-info {
-            text-align: center; color: #6c757d; margin-bottom: 30px;
-            font-size: 14px;
-        }
-        .form-group { margin-bottom: 25px; }
-        label { 
-            display: block; margin-bottom: 8px; font-weight: 600; color: #555; 
-            font-size: 15px;
-        }
-        input, select { 
-            width: 100%; padding: 14px; border: 2px solid #ddd; border-radius: 8px; 
-            font-size: 16px; transition: border-color 0.3s; background: white;
-            box-sizing: border-box;
-        }
-        input:focus, select:focus { 
-            border-color: #007bff; outline: none; box-shadow: 0 0 0 3px rgba(0,123,255,0.1);
-        }
-        .required { color: #dc3545; }
-        .form-help {
-            font-size: 13px; color: #6c757d; margin-top: 5px;
-        }
-        .btn { 
-            padding: 14px 28px; border: none; border-radius: 8px; cursor: pointer; 
-            margin-right: 12px; font-weight: 600; transition: all 0.3s; 
-            font-size: 16px; text-decoration: none; display: inline-block;
-        }
-        .btn-primary { background: #007bff; color: white; }
-        .btn-primary:hover { background: #0056b3; transform: translateY(-1px); }
-        .btn-secondary { background: #6c757d; color: white; }
-        .btn-secondary:hover { background: #545b62; }
-        .navigation { 
-            margin-top: 40px; display: flex; justify-content: space-between; 
-            align-items: center; padding-top: 20px; border-top: 1px solid #e9ecef;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="form-card">
-            <div class="header">
-                <div class="membership-badge">📦 Packaging & Paper</div>
-                <h2>New Membership Registration</h2>
-                <p class="subtitle">Let's get your company registered</p>
-            </div>
-            
-            <div class="progress">
-                <div class="progress-bar"></div>
-            </div>
-            <div class="step-info">Step 1 of 4 - Basic Information</div>
-            
-            <form method="POST" action="/membership/form/1">
-                <div class="form-group">
-                    <label for="country">Country <span class="required">*</span></label>
-                    <select name="country" id="country" required>
-                        <option value="">Please select your country</option>
-                        <option value="Germany" {{ 'selected' if form_data.get('country') == 'Germany' else '' }}>
-                            🇩🇪 Germany
-                        </option>
-                        <option value="France" {{ 'selected' if form_data.get('country') == 'France' else '' }}>
-                            🇫🇷 France
-                        </option>
-                        <option value="Austria" {{ 'selected' if form_data.get('country') == 'Austria' else '' }}>
-                            🇦🇹 Austria
-                        </option>
-                    </select>
-                    <div class="form-help">Select the country where your company is registered</div>
-                </div>
-                
-                <div class="form-group">
-                    <label for="company_name">Company Name <span class="required">*</span></label>
-                    <input 
-                        type="text" 
-                        name="company_name" 
-                        id="company_name"
-                        value="{{ form_data.get('company_name', '') }}" 
-                        placeholder="Enter your company name"
-                        required
-                    >
-                    <div class="form-help">Enter the official registered name of your company</div>
-                </div>
-                
-                <!-- Hidden field to track membership type -->
-                <input type="hidden" name="membership_type" value="packaging-paper">
-                
-                <div class="navigation">
-                    <a href="/dashboard" class="btn btn-secondary">← Back to Dashboard</a>
-                    <button type="submit" class="btn btn-primary">Continue →</button>
-                </div>
-            </form>
-        </div>
-    </div>
-</body>
-</html>
-'''
-
-MEMBERSHIP_STEP2_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>New Membership - Business Details</title>
-    <style>
-        body { 
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; 
-            margin: 0; padding: 20px; background: #f8f9fa; 
-        }
-        .container { max-width: 600px; margin: 0 auto; }
-        .form-card { 
-            background: white; padding: 30px; border-radius: 12px; 
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1); 
-        }
-        .header { text-align: center; margin-bottom: 30px; }
-        .header h2 { color: #333; margin: 0 0 10px 0; font-size: 1.8em; }
-        .header .subtitle { color: #6c757d; font-size: 1.1em; }
-        .membership-badge {
-            display: inline-block; background: #e3f2fd; color: #1976d2;
-            padding: 6px 16px; border-radius: 20px; font-size: 14px;
-            font-weight: 600; margin-bottom: 20px;
-        }
-        .progress { 
-            background: #e9ecef; border-radius: 10px; margin-bottom: 30px; height: 8px; 
-        }
-        .progress-bar { 
-            background: linear-gradient(90deg, #007bff, #0056b3); 
-            height: 8px; border-radius: 10px; width: 50%; transition: width 0.3s; 
-        }
-        .step-info {
-            text-align: center; color: #6c757d; margin-bottom: 30px;
-            font-size: 14px;
-        }
-        .form-group { margin-bottom: 25px; }
-        label { 
-            display: block; margin-bottom: 8px; font-weight: 600; color: #555; 
-            font-size: 15px;
-        }
-        input, select { 
-            width: 100%; padding: 14px; border: 2px solid #ddd; border-radius: 8px; 
-            font-size: 16px; transition: border-color 0.3s; background: white;
-            box-sizing: border-box;
-        }
-        input:focus, select:focus { 
-            border-color: #007bff; outline: none; box-shadow: 0 0 0 3px rgba(0,123,255,0.1);
-        }
-        .required { color: #dc3545; }
-        .form-help {
-            font-size: 13px; color: #6c757d; margin-top: 5px;
-        }
-        .btn { 
-            padding: 14px 28px; border: none; border-radius: 8px; cursor: pointer; 
-            margin-right: 12px; font-weight: 600; transition: all 0.3s; 
-            font-size: 16px; text-decoration: none; display: inline-block;
-        }
-        .btn-primary { background: #007bff; color: white; }
-        .btn-primary:hover { background: #0056b3; transform: translateY(-1px); }
-        .btn-secondary { background: #6c757d; color: white; }
-        .btn-secondary:hover { background: #545b62; }
-        .navigation { 
-            margin-top: 40px; display: flex; justify-content: space-between; 
-            align-items: center; padding-top: 20px; border-top: 1px solid #e9ecef;
-        }
-        .radio-group {
-            display: flex; gap: 20px; margin-top: 10px;
-        }
-        .radio-option {
-            display: flex; align-items: center; gap: 8px;
-        }
-        .radio-option input[type="radio"] {
-            width: auto; margin: 0;
-        }
-        .radio-option label {
-            margin: 0; font-weight: normal; cursor: pointer;
-        }
-        #sub_activity {
-            opacity: 0.6;
-            pointer-events: none;
-            transition: opacity 0.3s;
-        }
-        #sub_activity.enabled {
-            opacity: 1;
-            pointer-events: all;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="form-card">
-            <div class="header">
-                <div class="membership-badge">📦 Packaging & Paper</div>
-                <h2>Business Activity Details</h2>
-                <p class="subtitle">Tell us about your business operations</p>
-            </div>
-            
-            <div class="progress">
-                <div class="progress-bar"></div>
-            </div>
-            <div class="step-info">Step 2 of 4 - Business Information</div>
-            
-            <form method="POST" action="/membership/form/2">
-                <div class="form-group">
-                    <label for="business_activity">Business Activity <span class="required">*</span></label>
-                    <select name="business_activity" id="business_activity" required onchange="updateSubActivities()">
-                        <option value="">Please select your main business activity</option>
-                        <option value="packaging_manufacturing" {{ 'selected' if form_data.get('business_activity') == 'packaging_manufacturing' else '' }}>
-                            📦 Packaging Manufacturing
-                        </option>
-                        <option value="paper_production" {{ 'selected' if form_data.get('business_activity') == 'paper_production' else '' }}>
-                            📄 Paper Production
-                        </option>
-                        <option value="corrugated_packaging" {{ 'selected' if form_data.get('business_activity') == 'corrugated_packaging' else '' }}>
-                            📐 Corrugated Packaging
-                        </option>
-                        <option value="flexible_packaging" {{ 'selected' if form_data.get('business_activity') == 'flexible_packaging' else '' }}>
-                            🎯 Flexible Packaging
-                        </option>
-                        <option value="sustainable_packaging" {{ 'selected' if form_data.get('business_activity') == 'sustainable_packaging' else '' }}>
-                            🌱 Sustainable Packaging Solutions
-                        </option>
-                    </select>
-                    <div class="form-help">Choose the activity that best describes your core business</div>
-                </div>
-                
-                <div class="form-group">
-                    <label for="sub_activity">Sub-activity <span class="required">*</span></label>
-                    <select name="sub_activity" id="sub_activity" required>
-                        <option value="">Please select a business activity first</option>
-                    </select>
-                    <div class="form-help">Select your specific area of specialization</div>
-                </div>
-                
-                <div class="form-group">
-                    <label>Does your client have an online store? <span class="required">*</span></label>
-                    <div class="radio-group">
-                        <div class="radio-option">
-                            <input 
-                                type="radio" 
-                                name="has_online_store" 
-                                value="yes" 
-                                id="online_yes"
-                                {{ 'checked' if form_data.get('has_online_store') == 'yes' else '' }}
-                                required
-                                onchange="toggleOnlineStoreProducts()"
-                            >
-                            <label for="online_yes">Yes</label>
-                        </div>
-                        <div class="radio-option">
-                            <input 
-                                type="radio" 
-                                name="has_online_store" 
-                                value="no" 
-                                id="online_no"
-                                {{ 'checked' if form_data.get('has_online_store') == 'no' else '' }}
-                                required
-                                onchange="toggleOnlineStoreProducts()"
-                            >
-                            <label for="online_no">No</label>
-                        </div>
-                    </div>
-                    <div class="form-help">This helps us understand your distribution channels</div>
-                </div>
-
-                <div class="form-group" id="online_store_products" style="display: none;">
-                    <label>In their online store, my client sells... <span class="required">*</span></label>
-                    <div class="radio-group" style="flex-direction: column; gap: 12px;">
-                        <div class="radio-option">
-                            <input 
-                                type="radio" 
-                                name="online_store_products" 
-                                value="own_products" 
-                                id="own_products"
-                                {{ 'checked' if form_data.get('online_store_products') == 'own_products' else '' }}
-                            >
-                            <label for="own_products">Products they own</label>
-                        </div>
-                        <div class="radio-option">
-                            <input 
-                                type="radio" 
-                                name="online_store_products" 
-                                value="vendor_products" 
-                                id="vendor_products"
-                                {{ 'checked' if form_data.get('online_store_products') == 'vendor_products' else '' }}
-                            >
-                            <label for="vendor_products">Products owned by other vendors</label>
-                        </div>
-                        <div class="radio-option">
-                            <input 
-                                type="radio" 
-                                name="online_store_products" 
-                                value="both" 
-                                id="both_products"
-                                {{ 'checked' if form_data.get('online_store_products') == 'both' else '' }}
-                            >
-                            <label for="both_products">Both</label>
-                        </div>
-                    </div>
-                    <div class="form-help">This helps us understand your business model and product sourcing</div>
-                </div>
-                
-                <div class="navigation">
-                    <a href="/membership/form/1" class="btn btn-secondary">← Previous Step</a>
-                    <button type="submit" class="btn btn-primary">Continue →</button>
-                </div>
-            </form>
-        </div>
-    </div>
-
-    <script>
-        // Sub-activity options for each business activity
-        const subActivities = {
-            'packaging_manufacturing': [
-                { value: 'rigid_containers', text: 'Rigid Containers & Boxes' },
-                { value: 'protective_packaging', text: 'Protective Packaging Materials' },
-                { value: 'custom_packaging', text: 'Custom Packaging Solutions' }
-            ],
-            'paper_production': [
-                { value: 'kraft_paper', text: 'Kraft Paper Production' },
-                { value: 'recycled_paper', text: 'Recycled Paper Products' },
-                { value: 'specialty_papers', text: 'Specialty Papers & Boards' }
-            ],
-            'corrugated_packaging': [
-                { value: 'shipping_boxes', text: 'Shipping & E-commerce Boxes' },
-                { value: 'display_packaging', text: 'Display & Retail Packaging' },
-                { value: 'industrial_packaging', text: 'Industrial Corrugated Solutions' }
-            ],
-            'flexible_packaging': [
-                { value: 'food_packaging', text: 'Food & Beverage Packaging' },
-                { value: 'pharmaceutical', text: 'Pharmaceutical Packaging' },
-                { value: 'pouches_films', text: 'Pouches & Flexible Films' }
-            ],
-            'sustainable_packaging': [
-                { value: 'biodegradable', text: 'Biodegradable Packaging' },
-                { value: 'recycling_solutions', text: 'Recycling & Circular Solutions' },
-                { value: 'eco_design', text: 'Eco-friendly Design Services' }
-            ]
-        };
-
-        function updateSubActivities() {
-            const businessActivity = document.getElementById('business_activity').value;
-            const subActivitySelect = document.getElementById('sub_activity');
-            
-            // Clear existing options
-            subActivitySelect.innerHTML = '<option value="">Please select a sub-activity</option>';
-            
-            if (businessActivity && subActivities[businessActivity]) {
-                // Enable the sub-activity dropdown
-                subActivitySelect.classList.add('enabled');
-                
-                // Add new options
-                subActivities[businessActivity].forEach(option => {
-                    const optionElement = document.createElement('option');
-                    optionElement.value = option.value;
-                    optionElement.textContent = option.text;
-                    subActivitySelect.appendChild(optionElement);
-                });
-            } else {
-                // Disable the sub-activity dropdown
-                subActivitySelect.classList.remove('enabled');
-                subActivitySelect.innerHTML = '<option value="">Please select a business activity first</option>';
-            }
-        }
+@app.cli.command('calibrate-password-hash')
+@click.option('--target-ms', default=250.0, show_default=True, help='Desired time per password verification.')
+def calibrate_password_hash(target_ms):
+    """Benchmark password hashing and print matching cost settings."""
+    result = password_hasher.calibrate(target_ms)
+    click.echo('Measured %.1f ms per verify' % result['ms'])
+    if result['scheme'] == 'scrypt':
+        click.echo('PASSWORD_SCRYPT_N=%d' % result['n'])
+        click.echo('PASSWORD_SCRYPT_R=%d' % result['r'])
+        click.echo('PASSWORD_SCRYPT_P=%d' % result['p'])
+    else:
+        click.echo('PASSWORD_PBKDF2_ITERATIONS=%d' % result['iterations'])
 
-        function toggleOnlineStoreProducts() {
-            const hasOnlineStore = document.querySelector('input[name="has_online_store"]:checked');
-            const onlineStoreProductsDiv = document.getElementById('online_store_products');
-            const onlineStoreProductsInputs = document.querySelectorAll('input[name="online_store_products"]');
-            
-            if (hasOnlineStore && hasOnlineStore.value === 'yes') {
-                onlineStoreProductsDiv.style.display = 'block';
-                // Make the online store products field required when visible
-                onlineStoreProductsInputs.forEach(input => {
-                    input.required = true;
-                });
-            } else {
-                onlineStoreProductsDiv.style.display = 'none';
-                // Remove required attribute when hidden and clear selection
-                onlineStoreProductsInputs.forEach(input => {
-                    input.required = false;
-                    input.checked = false;
-                });
-            }
-        }
 
-        // Initialize on page load
-        document.addEventListener('DOMContentLoaded', function() {
-            updateSubActivities();
-            toggleOnlineStoreProducts();
-        });
-    </script>
-</body>
-</html>
-'''
-
-MEMBERSHIP_STEP3_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>New Membership - Contact Information</title>
-    <style>
-        body { 
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; 
-            margin: 0; padding: 20px; background: #f8f9fa; 
-        }
-        .container { max-width: 600px; margin: 0 auto; }
-        .form-card { 
-            background: white; padding: 30px; border-radius: 12px; 
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1); 
-        }
-        .header { text-align: center; margin-bottom: 30px; }
-        .header h2 { color: #333; margin: 0 0 10px 0; font-size: 1.8em; }
-        .header .subtitle { color: #6c757d; font-size: 1.1em; }
-        .membership-badge {
-            display: inline-block; background: #e3f2fd; color: #1976d2;
-            padding: 6px 16px; border-radius: 20px; font-size: 14px;
-            font-weight: 600; margin-bottom: 20px;
-        }
-        .progress { 
-            background: #e9ecef; border-radius: 10px; margin-bottom: 30px; height: 8px; 
-        }
-        .progress-bar { 
-            background: linear-gradient(90deg, #007bff, #0056b3); 
-            height: 8px; border-radius: 10px; width: 75%; transition: width 0.3s; 
-        }
-        .step-info {
-            text-align: center; color: #6c757d; margin-bottom: 30px;
-            font-size: 14px;
-        }
-        .form-group { margin-bottom: 25px; }
-        .form-row {
-            display: grid; grid-template-columns: 1fr 1fr; gap: 15px;
-        }
-        label { 
-            display: block; margin-bottom: 8px; font-weight: 600; color: #555; 
-            font-size: 15px;
-        }
-        input, select { 
-            width: 100%; padding: 14px; border: 2px solid #ddd; border-radius: 8px; 
-            font-size: 16px; transition: border-color 0.3s; background: white;
-            box-sizing: border-box;
-        }
-        input:focus, select:focus { 
-            border-color: #007bff; outline: none; box-shadow: 0 0 0 3px rgba(0,123,255,0.1);
-        }
-        .required { color: #dc3545; }
-        .form-help {
-            font-size: 13px; color: #6c757d; margin-top: 5px;
-        }
-        .btn { 
-            padding: 14px 28px; border: none; border-radius: 8px; cursor: pointer; 
-            margin-right: 12px; font-weight: 600; transition: all 0.3s; 
-            font-size: 16px; text-decoration: none; display: inline-block;
-        }
-        .btn-primary { background: #007bff; color: white; }
-        .btn-primary:hover { background: #0056b3; transform: translateY(-1px); }
-        .btn-secondary { background: #6c757d; color: white; }
-        .btn-secondary:hover { background: #545b62; }
-        .navigation { 
-            margin-top: 40px; display: flex; justify-content: space-between; 
-            align-items: center; padding-top: 20px; border-top: 1px solid #e9ecef;
-        }
-        @media (max-width: 768px) {
-            .form-row {
-                grid-template-columns: 1fr;
-            }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="form-card">
-            <div class="header">
-                <div class="membership-badge">📦 Packaging & Paper</div>
-                <h2>Contact Information</h2>
-                <p class="subtitle">We need your contact details</p>
-            </div>
-            
-            <div class="progress">
-                <div class="progress-bar"></div>
-            </div>
-            <div class="step-info">Step 3 of 4 - Contact Details</div>
-            
-            <form method="POST" action="/membership/form/3">
-                <h3>🏢 Company Details</h3>
-            
-                <div class="form-group">
-                    <label for="company_street">Number and Street <span class="required">*</span></label>
-                    <input type="text" name="company_street" id="company_street" value="{{ form_data.get('company_street', '') }}" required>
-                </div>
-            
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="company_postal_code">Postal Code <span class="required">*</span></label>
-                        <input type="text" name="company_postal_code" id="company_postal_code" value="{{ form_data.get('company_postal_code', '') }}" required>
-                    </div>
-                    <div class="form-group">
-                        <label for="company_city">City <span class="required">*</span></label>
-                        <input type="text" name="company_city" id="company_city" value="{{ form_data.get('company_city', '') }}" required>
-                    </div>
-                </div>
-            
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="company_country">Country <span class="required">*</span></label>
-                        <input type="text" name="company_country" id="company_country" value="{{ form_data.get('company_country', '') }}" required>
-                    </div>
-                    <div class="form-group">
-                        <label for="company_phone">Phone Number</label>
-                        <input type="tel" name="company_phone" id="company_phone" value="{{ form_data.get('company_phone', '') }}">
-                    </div>
-                </div>
-            
-                <div class="form-group">
-                    <label for="company_website">Website</label>
-                    <input type="url" name="company_website" id="company_website" value="{{ form_data.get('company_website', '') }}">
-                </div>
-            
-                <hr style="margin: 40px 0; border-top: 1px solid #ddd;">
-            
-                <h3>👤 Contact Person within the Client Company</h3>
-            
-                <div class="form-group">
-                    <label for="contact_salutation">Salutation <span class="required">*</span></label>
-                    <select name="contact_salutation" id="contact_salutation" required>
-                        <option value="">Please select</option>
-                        <option value="Mr" {{ 'selected' if form_data.get('contact_salutation') == 'Mr' else '' }}>Mr</option>
-                        <option value="Ms" {{ 'selected' if form_data.get('contact_salutation') == 'Ms' else '' }}>Ms</option>
-                    </select>
-                </div>
-            
-                <div class="form-row">
-                    <div class="form-group">
-                        <label for="first_name">First Name <span class="required">*</span></label>
-                        <input type="text" name="first_name" id="first_name" value="{{ form_data.get('first_name', '') }}" required>
-                    </div>
-                    <div class="form-group">
-                        <label for="last_name">Last Name <span class="required">*</span></label>
-                        <input type="text" name="last_name" id="last_name" value="{{ form_data.get('last_name', '') }}" required>
-                    </div>
-                </div>
-            
-                <div class="form-group">
-                    <label for="email">Email Address <span class="required">*</span></label>
-                    <input type="email" name="email" id="email" value="{{ form_data.get('email', '') }}" required>
-                </div>
-            
-                <div class="form-group">
-                    <label for="phone">Phone Number</label>
-                    <input type="tel" name="phone" id="phone" value="{{ form_data.get('phone', '') }}">
-                </div>
-            
-                <div class="navigation">
-                    <a href="/membership/form/2" class="btn btn-secondary">← Previous Step</a>
-                    <button type="submit" class="btn btn-primary">Continue →</button>
-                </div>
-            </form>
-        </div>
-    </div>
-</body>
-</html>
-'''
-
-MEMBERSHIP_STEP4_TEMPLATE = '''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>New Membership - Final Step</title>
-    <style>
-        body { 
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif; 
-            margin: 0; padding: 20px; background: #f8f9fa; 
-        }
-        .container { max-width: 600px; margin: 0 auto; }
-        .form-card { 
-            background: white; padding: 30px; border-radius: 12px; 
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1); 
-        }
-        .header { text-align: center; margin-bottom: 30px; }
-        .header h2 { color: #333; margin: 0 0 10px 0; font-size: 1.8em; }
-        .header .subtitle { color: #6c757d; font-size: 1.1em; }
-        .membership-badge {
-            display: inline-block; background: #e3f2fd; color: #1976d2;
-            padding: 6px 16px; border-radius: 20px; font-size: 14px;
-            font-weight: 600; margin-bottom: 20px;
-        }
-        .progress { 
-            background: #e9ecef; border-radius: 10px; margin-bottom: 30px; height: 8px; 
-        }
-        .progress-bar { 
-            background: linear-gradient(90deg, #007bff, #0056b3); 
-            height: 8px; border-radius: 10px; width: 100%; transition: width 0.3s; 
-        }
-        .step-info {
-            text-align: center; color: #6c757d; margin-bottom: 30px;
-            font-size: 14px;
-        }
-        .form-group { margin-bottom: 25px; }
-        .checkbox-group {
-            margin-bottom: 20px;
-        }
-        .checkbox-item {
-            display: flex; align-items: flex-start; gap: 12px; margin-bottom: 15px;
-            padding: 15px; border: 1px solid #e9ecef; border-radius: 8px;
-            background: #f8f9fa;
-        }
-        .checkbox-item input[type="checkbox"] {
-            width: auto; margin: 0; margin-top: 2px;
-        }
-        .checkbox-item label {
-            margin: 0; font-weight: normal; cursor: pointer; line-height: 1.5;
-        }
-        .checkbox-item.required {
-            border-color: #007bff; background: #f0f8ff;
-        }
-        .file-upload-section {
-            background: #f8f9fa; padding: 20px; border-radius: 8px; margin-bottom: 30px;
-            border: 2px dashed #007bff;
-        }
-        .file-upload-section h4 {
-            margin: 0 0 15px 0; color: #007bff; display: flex; align-items: center; gap: 8px;
-        }
-        .file-input-wrapper {
-            position: relative; display: inline-block; width: 100%;
-        }
-        .file-input {
-            width: 100%; padding: 12px; border: 2px solid #ddd; border-radius: 8px;
-            background: white; cursor: pointer; font-size: 14px;
-        }
-        .file-input:hover {
-            border-color: #007bff;
-        }
-        .file-help {
-            font-size: 13px; color: #6c757d; margin-top: 8px;
-        }
-        .btn { 
-            padding: 14px 28px; border: none; border-radius: 8px; cursor: pointer; 
-            margin-right: 12px; font-weight: 600; transition: all 0.3s; 
-            font-size: 16px; text-decoration: none; display: inline-block;
-        }
-        .btn-primary { background: #28a745; color: white; }
-        .btn-primary:hover { background: #218838; transform: translateY(-1px); }
-        .btn-secondary { background: #6c757d; color: white; }
-        .btn-secondary:hover { background: #545b62; }
-        .navigation { 
-            margin-top: 40px; display: flex; justify-content: space-between; 
-            align-items: center; padding-top: 20px; border-top: 1px solid #e9ecef;
-        }
-        .required { color: #dc3545; }
-        .summary {
-            background: #f8f9fa; padding: 20px; border-radius: 8px; margin-bottom: 30px;
-            border-left: 4px solid #007bff;
-        }
-        .summary h3 {
-            margin: 0 0 15px 0; color: #333;
-        }
-        .summary-item {
-            display: flex; justify-content: space-between; margin-bottom: 8px;
-        }
-        .summary-label {
-            font-weight: 600; color: #555;
-        }
-        .error-message {
-            color: #dc3545; background: #f8d7da; padding: 10px; border-radius: 6px;
-            margin-bottom: 20px; font-size: 14px;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="form-card">
-            <div class="header">
-                <div class="membership-badge">📦 Packaging & Paper</div>
-                <h2>Review & Complete</h2>
-                <p class="subtitle">Almost done! Please review and accept our terms</p>
-            </div>
-            
-            <div class="progress">
-                <div class="progress-bar"></div>
-            </div>
-            <div class="step-info">Step 4 of 4 - Final Step</div>
-            
-            <div class="summary">
-                <h3>📋 Membership Summary</h3>
-                <div class="summary-item">
-                    <span class="summary-label">Company:</span>
-                    <span>{{ form_data.get('company_name', 'Not provided') }}</span>
-                </div>
-                <div class="summary-item">
-                    <span class="summary-label">Country:</span>
-                    <span>{{ form_data.get('country', 'Not provided') }}</span>
-                </div>
-                <div class="summary-item">
-                    <span class="summary-label">Business Activity:</span>
-                    <span>{{ form_data.get('business_activity', 'Not provided') }}</span>
-                </div>
-                <div class="summary-item">
-                    <span class="summary-label">Contact:</span>
-                    <span>{{ form_data.get('first_name', '') }} {{ form_data.get('last_name', '') }}</span>
-                </div>
-            </div>
-            
-            <form method="POST" action="/membership/form/4" enctype="multipart/form-data">
-                <div class="file-upload-section">
-                    <h4>📄 Customer Consent Confirmation</h4>
-                    <div class="file-input-wrapper">
-                        <input 
-                            type="file" 
-                            name="consent_document" 
-                            id="consent_document" 
-                            class="file-input"
-                            accept=".pdf"
-                            onchange="updateFileName(this)"
-                        >
-                    </div>
-                    <div class="file-help">
-                        Please upload a PDF document confirming customer consent. Maximum file size: 16MB.
-                        <br><strong>Accepted format:</strong> PDF files only
-                    </div>
-                </div>
-                
-                <div class="checkbox-group">
-                    <div class="checkbox-item required">
-                        <input 
-                            type="checkbox" 
-                            name="terms_consent" 
-                            id="terms_consent"
-                            value="1"
-                            {{ 'checked' if form_data.get('terms_consent') else '' }}
-                            required
-                        >
-                        <label for="terms_consent">
-                            <strong>I accept the Terms and Conditions <span class="required">*</span></strong><br>
-                            I have read and agree to the membership terms, conditions, and policies.
-                        </label>
-                    </div>
-                    
-                    <div class="checkbox-item">
-                        <input 
-                            type="checkbox" 
-                            name="data_processing_consent" 
-                            id="data_processing_consent"
-                            value="1"
-                            {{ 'checked' if form_data.get('data_processing_consent') else '' }}
-                        >
-                        <label for="data_processing_consent">
-                            <strong>Data Processing Consent</strong><br>
-                            I consent to the processing of my personal data for membership management purposes.
-                        </label>
-                    </div>
-                    
-                    <div class="checkbox-item">
-                        <input 
-                            type="checkbox" 
-                            name="marketing_consent" 
-                            id="marketing_consent"
-                            value="1"
-                            {{ 'checked' if form_data.get('marketing_consent') else '' }}
-                        >
-                        <label for="marketing_consent">
-                            <strong>Marketing Communications</strong><br>
-                            I would like to receive updates about industry news, events, and relevant opportunities.
-                        </label>
-                    </div>
-                </div>
-                
-                <div class="navigation">
-                    <a href="/membership/form/3" class="btn btn-secondary">← Previous Step</a>
-                    <button type="submit" class="btn btn-primary">✓ Complete Registration</button>
-                </div>
-            </form>
-        </div>
-    </div>
-
-    <script>
-        function updateFileName(input) {
-            if (input.files && input.files[0]) {
-                const fileName = input.files[0].name;
-                const fileSize = input.files[0].size;
-                const maxSize = 16 * 1024 * 1024; // 16MB
-                
-                if (fileSize > maxSize) {
-                    alert('File size exceeds 16MB limit. Please choose a smaller file.');
-                    input.value = '';
-                    return;
-                }
-                
-                if (!fileName.toLowerCase().endsWith('.pdf')) {
-                    alert('Please select a PDF file only.');
-                    input.value = '';
-                    return;
-                }
-                
-                // Update the visual feedback (optional)
-                console.log('File selected:', fileName);
-            }
-        }
+@app.cli.command('migrate')
+@click.option('--status', is_flag=True, help='Only list applied and pending migrations.')
+@click.option('--target', type=int, help='Stop after this version (default: latest).')
+def migrate_command(status, target):
+    """Apply pending schema migrations."""
+    conn = get_db_connection()
+    if status:
+        missing = dict(migrations.pending(repository, conn))
+        for version, name, _ in migrations.MIGRATIONS:
+            click.echo('%-8s %3d  %s' % ('pending' if version in missing else 'applied', version, name))
+        return
+    applied = migrations.migrate(repository, conn, target)
+    for version, name in applied:
+        click.echo('Applied %d  %s' % (version, name))
+    if not applied:
+        click.echo('Schema is up to date.')
+    ensure_admin_user(conn)
+
+@app.cli.command('rebuild-member-stats')
+def rebuild_member_stats():
+    """Recompute the dashboard counters from the members table."""
+    mismatched = repository.rebuild_member_stats(get_db_connection())
+    if mismatched:
+        click.echo('Fixed counters for %d user(s): %s' % (len(mismatched), ', '.join(map(str, mismatched))))
+    else:
+        click.echo('All member counters were consistent.')
+
+
+@app.cli.command('verify-consent-blobs')
+@click.option('--delete-orphans', is_flag=True, help='Queue files no member references for deletion.')
+@click.option('--check-hashes', is_flag=True, help='Re-hash every stored document.')
+@click.option('--grace', default=3600, show_default=True, help='Ignore files younger than this many seconds.')
+def verify_consent_blobs(delete_orphans, check_hashes, grace):
+    """Reconcile consent document reference counts with members and files on disk."""
+    conn = get_db_connection()
+    references, rows = repository.blob_report(conn)
+    stored = {key: (size, mtime) for key, size, mtime in document_storage.list()}
+    
+    for filename in sorted(references):
+        expected = references[filename]
+        sha256, size, refcount = rows.get(filename, (None, None, 0))
+        exists = filename in stored
+        if not exists:
+            click.echo('MISSING  %s (referenced by %d member(s))' % (filename, expected))
+        if expected != refcount:
+            click.echo('REFCOUNT %s: stored %d, actual %d' % (filename, refcount, expected))
+            if exists and sha256 is None:
+                sha256, size = document_storage.hash(filename), stored[filename][0]
+            repository.set_blob_refcount(conn, filename, expected, sha256, size)
+        if check_hashes and exists and sha256 and document_storage.hash(filename) != sha256:
+            click.echo('CORRUPT  %s: content does not match its hash' % filename)
+    
+    # Documents (and blob rows) no member references. Recent ones may belong
+    # to an upload whose member row is not committed yet.
+    now = time.time()
+    queued = repository.queued_cleanup(conn)
+    for filename in sorted((set(stored) | set(rows)) - set(references) - queued):
+        if filename in stored and now - stored[filename][1] < grace:
+            continue
+        if not delete_orphans:
+            click.echo('ORPHAN   %s' % filename)
+            continue
+        if filename in stored:
+            repository.enqueue_cleanup(conn, filename, 'orphan')
+        else:
+            repository.set_blob_refcount(conn, filename, 0)
+        click.echo('QUEUED   %s' % filename)
+    conn.commit()
+
+
+@app.cli.command('export-members')
+@click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), default='csv', show_default=True)
+@click.option('--gzip', 'compress', is_flag=True, help='Compress the output with gzip.')
+@click.option('--user-id', type=int, help='Only members created by this user.')
+@click.option('--output', type=click.File('wb'), default='-', help='Output file (default: stdout).')
+def export_members_command(fmt, compress, user_id, output):
+    """Stream every member as CSV or JSON lines."""
+    rows = repository.iter_members(get_db_connection(), user_id)
+    for chunk in export_chunks(EXPORT_COLUMNS, rows, fmt, compress):
+        output.write(chunk)
+
+
+@app.cli.command('import-members')
+@click.argument('source', type=click.File('rb'))
+@click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), help='Default: from the file extension.')
+@click.option('--username', default='admin', show_default=True, help='User the members are created for.')
+@click.option('--batch-size', default=5000, show_default=True)
+def import_members_command(source, fmt, username, batch_size):
+    """Bulk-load members from a CSV (with header) or JSON lines file."""
+    fmt = fmt or ('jsonl' if source.name.endswith(('.jsonl', '.ndjson')) else 'csv')
+    conn = get_db_connection()
+    user = repository.user_credentials(conn, username)
+    if user is None:
+        raise click.ClickException('No user named %r' % username)
+    report = import_members(repository, conn, user[0], read_records(source, fmt), batch_size=batch_size,
+                            run_write=sqlite_writer and sqlite_writer.run)
+    for error in report['errors']:
+        click.echo('row %d: %s' % (error['row'], '; '.join(error['errors'])), err=True)
+    if report['failed'] > len(report['errors']):
+        click.echo('... %d more invalid rows' % (report['failed'] - len(report['errors'])), err=True)
+    click.echo('Imported %(imported)d, skipped %(failed)d invalid rows in %(seconds).1f s '
+               '(%(rows_per_second)s rows/s)' % report)
+    if 'error' in report:
+        raise click.ClickException('Import stopped, rows up to %s are stored; %s'
+                                   % (report.get('committed_through', 'none'), report['error']))
+
+
+@app.cli.command('cleanup-storage')
+@click.option('--sweep', is_flag=True, help='Also queue unreferenced documents now.')
+def cleanup_storage(sweep):
+    """Process the storage cleanup queue once (for cron when CLEANUP_WORKER=0)."""
+    cleanup_worker.run_once(sweep=sweep or None)
+    stats = cleanup_worker.stats()
+    click.echo('Deleted %(deleted)d, skipped %(skipped)d, failed %(failures)d; '
+               '%(pending)d pending, %(dead)d given up' % stats)
+
 
-        // Prevent form submission if file is too large
-        document.querySelector('form').addEventListener('submit', function(e) {
-            const fileInput = document.getElementById('consent_document');
-            if (fileInput.files[0]) {
-                const fileSize = fileInput.files[0].size;
-                const maxSize = 16 * 1024 * 1024; // 16MB
-                
-                if (fileSize > maxSize) {
-                    e.preventDefault();
-                    alert('File size exceeds 16MB limit. Please choose a smaller file.');
-                    return false;
-                }
-            }
-        });
-    </script>
-</body>
-</html>
-'''
 
 if __name__ == '__main__':
-    init_db()
+    with app.app_context():
+        init_db()
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=os.getenv("FLASK_ENV") == "development")
@@ -0,0 +1,275 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:  # only needed for AsyncCaptchaVerifier
+    aiohttp = None
+
+try:
+    import redis
+except ImportError:  # only needed for RedisReplayCache
+    redis = None
+
+
+SITEVERIFY_URL = 'https://api.friendlycaptcha.com/api/v1/siteverify'
+
+FAIL_OPEN = 'open'
+FAIL_CLOSED = 'closed'
+
+logger = logging.getLogger(__name__)
+
+
+class CaptchaVerifier:
+    """Friendly Captcha siteverify client on a persistent keep-alive session.
+
+    ``failure_policy`` decides what happens when the upstream API cannot be
+    reached or answers with something unusable: ``"open"`` accepts the
+    solution (Friendly Captcha's own recommendation), ``"closed"`` rejects it.
+    An explicit ``success: false`` from the API is always a rejection.
+    """
+
+    def __init__(self, secret, sitekey=None, url=SITEVERIFY_URL, connect_timeout=2.0,
+                 read_timeout=5.0, failure_policy=FAIL_OPEN, pool_size=10):
+        if failure_policy not in (FAIL_OPEN, FAIL_CLOSED):
+            raise ValueError('failure_policy must be %r or %r' % (FAIL_OPEN, FAIL_CLOSED))
+        self.secret = secret
+        self.sitekey = sitekey
+        self.url = url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.failure_policy = failure_policy
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.outcomes = {'accepted': 0, 'rejected': 0, 'unavailable': 0}
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+
+    def _payload(self, solution):
+        data = {'solution': solution, 'secret': self.secret}
+        if self.sitekey:
+            data['sitekey'] = self.sitekey
+        return data
+
+    def _on_upstream_error(self, reason):
+        logger.warning('Captcha verification unavailable (%s), failing %s', reason, self.failure_policy)
+        self.outcomes['unavailable'] += 1
+        return self.failure_policy == FAIL_OPEN
+
+    def _interpret(self, status, body):
+        try:
+            result = json.loads(body)
+        except ValueError:
+            return self._on_upstream_error('invalid response, HTTP %d' % status)
+        if not isinstance(result, dict) or 'success' not in result:
+            return self._on_upstream_error('unexpected response, HTTP %d' % status)
+        if status >= 500:
+            return self._on_upstream_error('HTTP %d' % status)
+        if not result['success']:
+            logger.info('Captcha rejected: %s', result.get('errors'))
+        self.outcomes['accepted' if result['success'] else 'rejected'] += 1
+        return bool(result['success'])
+
+    def verify(self, solution):
+        try:
+            response = self.session.post(self.url, data=self._payload(solution),
+                                         timeout=(self.connect_timeout, self.read_timeout))
+        except requests.RequestException as exc:
+            return self._on_upstream_error(type(exc).__name__)
+        return self._interpret(response.status_code, response.content)
+
+    def stats(self):
+        return dict(self.outcomes, failure_policy=self.failure_policy)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+class AsyncCaptchaVerifier(CaptchaVerifier):
+    """asyncio variant; each instance keeps one aiohttp session (and connection pool).
+
+    The session is bound to the event loop it was first used on, so use one
+    instance per loop.
+    """
+
+    def __init__(self, *args, **kwargs):
+        if aiohttp is None:
+            raise RuntimeError('AsyncCaptchaVerifier requires aiohttp (pip install aiohttp)')
+        super().__init__(*args, **kwargs)
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout,
+                                              sock_read=self.read_timeout),
+            )
+        return self._session
+
+    async def verify(self, solution):
+        try:
+            async with self.session.post(self.url, data=self._payload(solution)) as response:
+                body = await response.read()
+        # asyncio.TimeoutError is only an alias of TimeoutError from Python 3.11 on
+        except (aiohttp.ClientError, asyncio.TimeoutError, TimeoutError) as exc:
+            return self._on_upstream_error(type(exc).__name__)
+        return self._interpret(response.status, body)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def _solution_key(solution):
+    # Solutions are several hundred bytes, a digest keeps the cache compact
+    return hashlib.sha256(solution.encode()).digest()
+
+
+class LocalReplayCache:
+    """In-process LRU of recently seen captcha solutions with a fixed TTL.
+
+    ``seen()`` records the solution and reports whether it was already
+    recorded, so check and mark happen atomically.
+    """
+
+    def __init__(self, max_entries=10000, ttl=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> expires_at, oldest first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def seen(self, solution):
+        key = _solution_key(solution)
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is not None and expires_at > now:
+                self.hits += 1
+                return True
+            self.misses += 1
+            self._entries[key] = now + self.ttl
+            self._entries.move_to_end(key)
+            # Every entry has the same TTL, so expired entries sit at the front
+            while self._entries:
+                oldest_key, oldest_expiry = next(iter(self._entries.items()))
+                if oldest_expiry > now and len(self._entries) <= self.max_entries:
+                    break
+                del self._entries[oldest_key]
+                if oldest_expiry > now:
+                    self.evictions += 1
+            return False
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'local', 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'size': len(self._entries)}
+
+
+class RedisReplayCache:
+    """Replay cache shared by all workers through Redis (SET NX with expiry)."""
+
+    def __init__(self, client, ttl=3600.0, prefix='frc:solution:'):
+        if isinstance(client, str):
+            if redis is None:
+                raise RuntimeError('RedisReplayCache requires redis (pip install redis)')
+            client = redis.Redis.from_url(client)
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix.encode()
+        self.hits = 0
+        self.misses = 0
+
+    def seen(self, solution):
+        key = self.prefix + _solution_key(solution).hex().encode()
+        if self.client.set(key, b'1', nx=True, ex=max(1, int(self.ttl))):
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def stats(self):
+        return {'backend': 'redis', 'hits': self.hits, 'misses': self.misses}
+
+
+class StubSiteverifyServer:
+    """Local stand-in for the siteverify endpoint, for tests and benchmarks.
+
+    Solutions listed in ``valid`` (or every solution if ``valid`` is None)
+    verify successfully. ``status`` forces an HTTP status for all answers.
+    """
+
+    def __init__(self, valid=None, status=200, host='127.0.0.1', port=0):
+        self.valid = valid
+        self.status = status
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                form = parse_qs(self.rfile.read(length).decode())
+                solution = form.get('solution', [''])[0]
+                stub.requests += 1
+                ok = stub.valid is None or solution in stub.valid
+                body = json.dumps({'success': ok, 'errors': [] if ok else ['solution_invalid']}).encode()
+                self.send_response(stub.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return 'http://%s:%d/api/v1/siteverify' % (host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
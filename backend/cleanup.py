@@ -0,0 +1,201 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CleanupWorker:
+    """Deletes stored documents queued in ``storage_cleanup``, off the request path.
+
+    Requests only enqueue a row in their own transaction, so nothing is lost
+    if the process dies before the file is gone. Each item is handled in a
+    separate transaction that locks the blob row and removes the document
+    only if nothing references it again by then. Failures are retried with
+    exponential backoff; after ``max_attempts`` the item stays in the table
+    (reported as ``dead``) for inspection.
+
+    Every ``sweep_interval`` seconds the worker also queues stored documents
+    no member references and removes staging files of interrupted uploads,
+    both only once they are older than ``grace`` seconds, and deletes
+    membership drafts untouched for ``draft_ttl`` seconds.
+
+    Reads use a pooled connection. Writes go through ``run_write(fn)`` when
+    given (SQLite's writer thread, see ``db.SQLiteWriter``), otherwise they
+    are committed on that same connection.
+    """
+
+    def __init__(self, pool, repository, storage, staging_dir=None, interval=5.0, batch_size=50,
+                 max_attempts=8, lease=300.0, sweep_interval=3600.0, grace=3600.0, draft_ttl=None, run_write=None):
+        self.pool = pool
+        self.run_write = run_write
+        self.repository = repository
+        self.storage = storage
+        self.staging_dir = staging_dir
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.sweep_interval = sweep_interval
+        self.grace = grace
+        self.draft_ttl = draft_ttl
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.deleted = 0
+        self.skipped = 0
+        self.failures = 0
+        self.orphans_queued = 0
+        self.staging_removed = 0
+        self.drafts_expired = 0
+        self.pending = None
+        self.dead = None
+        self.last_run = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='storage-cleanup', daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wake(self):
+        # Something was queued; don't wait for the next interval
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception('Storage cleanup failed')
+
+    def run_once(self, sweep=None):
+        """Process due items (repeatedly, while full batches come back) and sweep if due."""
+        conn = self.pool.getconn()
+        try:
+            while self._process_batch(conn) == self.batch_size:
+                pass
+            if sweep or (sweep is None and time.monotonic() >= self._next_sweep):
+                self.sweep(conn)
+                if self.draft_ttl:
+                    self.purge_drafts(conn)
+                self._next_sweep = time.monotonic() + self.sweep_interval
+            self.pending, self.dead = self.repository.cleanup_backlog(conn, self.max_attempts)
+            conn.commit()
+        finally:
+            self.pool.putconn(conn)
+        self.last_run = time.time()
+
+    def _write(self, conn, fn):
+        # One committed write transaction, on the writer thread if there is one
+        if self.run_write is not None:
+            return self.run_write(fn)
+        try:
+            result = fn(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return result
+
+    def _process_batch(self, conn):
+        repository = self.repository
+        items = repository.due_cleanup(conn, self.max_attempts, self.batch_size)
+        conn.commit()
+        for item_id, filename, attempts, not_before in items:
+            if not self._write(conn, lambda c: repository.claim_cleanup(c, item_id, not_before, self.lease)):
+                continue
+
+            def remove(c):
+                # The file is deleted inside the transaction holding the blob lock
+                if repository.lock_blob(c, filename) > 0:
+                    # Uploaded again since it was queued
+                    removed = False
+                else:
+                    self.storage.delete(filename)
+                    removed = True
+                repository.finish_cleanup(c, item_id, filename)
+                return removed
+
+            try:
+                if self._write(conn, remove):
+                    self.deleted += 1
+                else:
+                    self.skipped += 1
+            except Exception as exc:
+                self.failures += 1
+                logger.warning('Could not remove stored document %s (attempt %d): %s',
+                               filename, attempts + 1, exc)
+                self._write(conn, lambda c: repository.fail_cleanup(
+                    c, item_id, self.retry_delay(attempts + 1), repr(exc)))
+        return len(items)
+
+    def retry_delay(self, attempts):
+        return min(30.0 * 2 ** (attempts - 1), 6 * 3600.0)
+
+    def sweep(self, conn):
+        """Queue unreferenced documents and drop stale staging files; return how many were queued."""
+        references, rows = self.repository.blob_report(conn)
+        queued = self.repository.queued_cleanup(conn)
+        conn.commit()
+        cutoff = time.time() - self.grace
+        orphans = []
+        for key, size, mtime in self.storage.list():
+            if key in references or key in queued or mtime > cutoff:
+                continue
+            # A positive count without members means an upload is still in flight
+            if key in rows and rows[key][2] > 0:
+                continue
+            orphans.append(key)
+        if orphans:
+            def enqueue(c):
+                for key in orphans:
+                    self.repository.enqueue_cleanup(c, key, 'orphan')
+            self._write(conn, enqueue)
+        count = len(orphans)
+        self.orphans_queued += count
+
+        if self.staging_dir:
+            with os.scandir(self.staging_dir) as entries:
+                for entry in entries:
+                    if (entry.name.startswith('.upload-') and entry.name.endswith('.part')
+                            and entry.stat().st_mtime <= cutoff):
+                        try:
+                            os.remove(entry.path)
+                            self.staging_removed += 1
+                        except FileNotFoundError:
+                            pass
+        return count
+
+    def purge_drafts(self, conn, batch_size=500):
+        """Delete drafts untouched for ``draft_ttl`` seconds, one batch per transaction."""
+        older_than = time.time() - self.draft_ttl
+        while True:
+            deleted = self._write(conn, lambda c: self.repository.purge_drafts(c, older_than, batch_size))
+            self.drafts_expired += deleted
+            if deleted < batch_size:
+                return
+
+    def stats(self):
+        return {'deleted': self.deleted, 'skipped': self.skipped, 'failures': self.failures,
+                'orphans_queued': self.orphans_queued, 'staging_removed': self.staging_removed,
+                'drafts_expired': self.drafts_expired,
+                'pending': self.pending, 'dead': self.dead, 'last_run': self.last_run}
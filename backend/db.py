@@ -0,0 +1,351 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of DB-API connections.
+
+    Connections are created lazily up to ``max_size``. Idle connections are
+    health-checked on checkout and closed again once they have been idle for
+    longer than ``max_idle`` seconds (never dropping below ``min_size``).
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=10.0,
+                 max_idle=300.0, check_after=5.0, ping=None):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError('invalid pool size: min=%r max=%r' % (min_size, max_size))
+        self._connect = connect
+        self._ping = ping
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.check_after = check_after
+
+        self._lock = threading.Condition()
+        self._idle = deque()  # (conn, returned_at)
+        self._size = 0
+        self._closed = False
+
+        # Statistics
+        self._in_use = 0
+        self._waiting = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _open(self):
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+
+    def _healthy(self, conn, idle_for):
+        if getattr(conn, 'closed', 0):
+            return False
+        # Only pay a round trip for connections that sat idle for a while
+        if self._ping is None or idle_for < self.check_after:
+            return True
+        try:
+            self._ping(conn)
+            return True
+        except Exception:
+            return False
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _evict_idle(self, now):
+        expired = []
+        while (self._idle and self._size > self.min_size
+               and now - self._idle[0][1] > self.max_idle):
+            expired.append(self._idle.popleft()[0])
+            self._size -= 1
+        return expired
+
+    def getconn(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise PoolTimeout('connection pool is closed')
+                if not self._idle and self._size >= self.max_size:
+                    self._waiting += 1
+                    try:
+                        while not self._idle and self._size >= self.max_size:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                self._timeouts += 1
+                                raise PoolTimeout('no database connection available after %.1fs' % timeout)
+                            self._lock.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+                now = time.monotonic()
+                expired = self._evict_idle(now)
+                if self._idle:
+                    # LIFO keeps the hot connections hot and lets the cold ones expire
+                    conn, returned_at = self._idle.pop()
+                else:
+                    conn, returned_at = None, now
+                    self._size += 1
+
+            for stale in expired:
+                self._close_quietly(stale)
+
+            if conn is None:
+                conn = self._open()
+            elif not self._healthy(conn, now - returned_at):
+                self._close_quietly(conn)
+                with self._lock:
+                    self._discarded += 1
+                    self._size -= 1
+                    self._lock.notify()
+                continue
+
+            waited = time.monotonic() - start
+            with self._lock:
+                self._in_use += 1
+                self._checkouts += 1
+                self._wait_total += waited
+                if waited > self._wait_max:
+                    self._wait_max = waited
+            return conn
+
+    def putconn(self, conn, discard=False):
+        if not discard:
+            try:
+                # Never hand out a connection with a half-finished transaction
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._lock:
+            self._in_use -= 1
+            if discard or self._closed or getattr(conn, 'closed', 0):
+                self._size -= 1
+                self._discarded += 1
+                close = True
+            else:
+                self._idle.append((conn, time.monotonic()))
+                close = False
+            self._lock.notify()
+
+        if close:
+            self._close_quietly(conn)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._lock.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded,
+                'wait_time_total': round(self._wait_total, 6),
+                'wait_time_max': round(self._wait_max, 6),
+            }
+
+
+class WriterStopped(Exception):
+    pass
+
+
+class SQLiteWriter:
+    """Runs write transactions for one SQLite database on a dedicated thread.
+
+    ``run(fn)`` queues ``fn(conn)`` and blocks until it is committed. The
+    thread owns the only writing connection, so request threads never wait
+    on each other for SQLite's write lock (in WAL mode readers do not wait
+    for it at all). Jobs that queue up while a transaction runs are committed
+    together, up to ``max_batch`` per commit; each job runs in a savepoint,
+    so an exception only undoes that job and is re-raised in its caller.
+    Jobs must not commit or roll back themselves.
+
+    The thread is started by the first ``run()`` of each process, so an app
+    imported before a server forks its workers gets one writer per worker.
+    """
+
+    def __init__(self, connect, max_batch=64, timeout=30.0):
+        self._connect = connect
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._stopping = False
+
+        # Statistics
+        self.jobs = 0
+        self.failures = 0
+        self.commits = 0
+        self.largest_batch = 0
+        self.timeouts = 0
+        self.busy_retries = 0
+        self._wait_total = 0.0
+
+    def start(self):
+        with self._start_lock:
+            if self._pid != os.getpid():
+                # Forked: the parent's thread and queued jobs did not come along
+                self._thread = None
+                self._queue = queue.Queue()
+            if self._thread is None:
+                self._stopping = False
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopping = True
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run(self, fn, timeout=None):
+        """Run ``fn(conn)`` in a write transaction on the writer thread and return its result."""
+        if self._stopping:
+            raise WriterStopped('SQLite writer is not running')
+        if self._thread is None or self._pid != os.getpid():
+            self.start()
+        future = Future()
+        self._queue.put((fn, future, time.monotonic()))
+        try:
+            return future.result(self.timeout if timeout is None else timeout)
+        except FutureTimeout:
+            # A job the caller gave up on must not commit later
+            if future.cancel():
+                self.timeouts += 1
+                raise
+            # Already running, so it is about to commit; report what really happened
+            return future.result()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while True:
+                batch = self._next_batch()
+                stop = None in batch
+                jobs = [job for job in batch if job is not None]
+                if jobs:
+                    self._commit_batch(conn, jobs)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _begin(self, cur):
+        # IMMEDIATE takes the write lock now instead of failing halfway through. Another
+        # process (a CLI command, a second worker) may hold it beyond the busy timeout;
+        # keep trying rather than failing every job in the batch.
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                cur.execute('BEGIN IMMEDIATE')
+                return
+            except sqlite3.OperationalError as exc:
+                if 'locked' not in str(exc) or time.monotonic() >= deadline:
+                    raise
+                if not self.busy_retries % 10:
+                    logger.warning('SQLite write lock is held by another connection, retrying')
+                self.busy_retries += 1
+
+    def _commit_batch(self, conn, jobs):
+        results = []
+        cur = conn.cursor()
+        try:
+            self._begin(cur)
+            for fn, future, queued_at in jobs:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._wait_total += time.monotonic() - queued_at
+                cur.execute('SAVEPOINT job')
+                try:
+                    result = fn(conn)
+                except Exception as exc:
+                    cur.execute('ROLLBACK TO job')
+                    results.append((future, None, exc))
+                else:
+                    results.append((future, result, None))
+                cur.execute('RELEASE job')
+            conn.commit()
+        except Exception as exc:
+            logger.exception('SQLite write transaction failed')
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            for fn, future, _ in jobs:
+                if future.running():
+                    future.set_exception(exc)
+                    self.failures += 1
+            return
+        self.commits += 1
+        self.largest_batch = max(self.largest_batch, len(results))
+        for future, result, exc in results:
+            self.jobs += 1
+            if exc is None:
+                future.set_result(result)
+            else:
+                self.failures += 1
+                future.set_exception(exc)
+
+    def stats(self):
+        return {
+            'running': self._thread is not None,
+            'queued': self._queue.qsize(),
+            'jobs': self.jobs,
+            'failures': self.failures,
+            'commits': self.commits,
+            'largest_batch': self.largest_batch,
+            'timeouts': self.timeouts,
+            'busy_retries': self.busy_retries,
+            'wait_time_total': round(self._wait_total, 6),
+        }
@@ -0,0 +1,106 @@
+import mimetypes
+from urllib.parse import quote
+
+from flask import current_app, redirect, request
+from werkzeug.utils import send_file
+
+from storage import CHUNK_SIZE
+
+SERVE_DIRECT = 'direct'
+SERVE_X_SENDFILE = 'x-sendfile'
+SERVE_X_ACCEL = 'x-accel'
+SERVE_PRESIGNED = 'presigned'
+
+
+class DocumentSender:
+    """Serves stored documents after the caller has authorized the download.
+
+    ``direct`` sends the bytes from this process: local files go through
+    ``wsgi.file_wrapper`` (``sendfile()`` under gunicorn/uWSGI), remote
+    objects are streamed in chunks. Range requests are answered with ``206``
+    so interrupted downloads can resume. ``x-sendfile`` (Apache, lighttpd)
+    and ``x-accel`` (nginx, ``accel_prefix`` must map to an ``internal``
+    location) only set a header and leave the bytes and any Range handling
+    to the proxy; ``presigned`` redirects to a short-lived URL of the
+    storage backend.
+
+    Documents with a known SHA-256 get it as a strong ETag, so conditional
+    requests and ``If-Range`` keep working across restarts and workers.
+    """
+
+    def __init__(self, storage, mode=SERVE_DIRECT, accel_prefix='/protected-uploads/', url_expires=300):
+        if mode not in (SERVE_DIRECT, SERVE_X_SENDFILE, SERVE_X_ACCEL, SERVE_PRESIGNED):
+            raise ValueError('unknown download mode: %r' % mode)
+        if mode in (SERVE_X_SENDFILE, SERVE_X_ACCEL) and not storage.local:
+            raise ValueError('%s downloads need local storage' % mode)
+        self.storage = storage
+        self.mode = mode
+        self.accel_prefix = accel_prefix.rstrip('/') + '/'
+        self.url_expires = url_expires
+
+    def send(self, key, download_name, sha256=None):
+        """Return the response for ``key``, or ``None`` if it is missing."""
+        if self.mode == SERVE_PRESIGNED:
+            url = self.storage.url(key, download_name, self.url_expires)
+            if url is not None:
+                return redirect(url)
+        if not self.storage.local:
+            return self._send_stream(key, download_name, sha256)
+        path = self.storage.path(key)
+
+        offload = self.mode in (SERVE_X_SENDFILE, SERVE_X_ACCEL)
+        try:
+            response = send_file(path, request.environ, as_attachment=True,
+                                 download_name=download_name, etag=sha256 or True,
+                                 conditional=not offload, use_x_sendfile=offload,
+                                 response_class=current_app.response_class)
+        except FileNotFoundError:
+            return None
+        response.cache_control.private = True
+        if not offload:
+            return response
+
+        if self.mode == SERVE_X_ACCEL:
+            del response.headers['X-Sendfile']
+            response.headers['X-Accel-Redirect'] = self.accel_prefix + quote(key)
+        # The proxy answers Range requests itself; only 304/412 are decided here
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            response.headers.pop('X-Sendfile', None)
+            response.headers.pop('X-Accel-Redirect', None)
+        return response
+
+    def _send_stream(self, key, download_name, sha256):
+        stat = self.storage.stat(key)
+        if stat is None:
+            return None
+        size, mtime = stat
+        response = current_app.response_class(
+            [], mimetype=mimetypes.guess_type(download_name)[0] or 'application/octet-stream',
+            direct_passthrough=True)
+        response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+        response.content_length = size
+        response.last_modified = mtime
+        response.cache_control.no_cache = True
+        response.cache_control.private = True
+        if sha256:
+            response.set_etag(sha256)
+        # Decide 304/412/206 first, then fetch only the bytes that are needed
+        response = response.make_conditional(request, accept_ranges=True, complete_length=size)
+        if response.status_code not in (200, 206):
+            return response
+        start, length = 0, None
+        if response.status_code == 206:
+            start = response.content_range.start
+            length = response.content_range.stop - start
+        body = self.storage.open(key, start, length)
+        response.response = _iter_chunks(body)
+        return response
+
+
+def _iter_chunks(body):
+    try:
+        for chunk in iter(lambda: body.read(CHUNK_SIZE), b''):
+            yield chunk
+    finally:
+        body.close()
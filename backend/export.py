@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+
+CHUNK_SIZE = 64 * 1024  # bytes collected before a chunk is handed to the response
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),  # Flask adds the charset for text/* types
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+}
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def csv_chunks(columns, rows):
+    """Encode rows as CSV with a header line, yielding UTF-8 chunks of about ``CHUNK_SIZE`` bytes."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_plain(value) for value in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def jsonl_chunks(columns, rows):
+    """Encode rows as one JSON object per line, yielding UTF-8 chunks of about ``CHUNK_SIZE`` bytes."""
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps({column: _plain(value) for column, value in zip(columns, row)},
+                          ensure_ascii=False, separators=(',', ':')) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield ''.join(lines).encode()
+            lines, size = [], 0
+    yield ''.join(lines).encode()
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a stream of byte chunks into a gzip file on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(columns, rows, fmt='csv', compress=False):
+    """Byte chunks of ``rows`` in ``fmt`` ("csv" or "jsonl"), gzip-compressed if ``compress``."""
+    if fmt not in FORMATS:
+        raise ValueError('unknown export format %r' % fmt)
+    chunks = csv_chunks(columns, rows) if fmt == 'csv' else jsonl_chunks(columns, rows)
+    return gzip_chunks(chunks) if compress else chunks
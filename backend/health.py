@@ -0,0 +1,116 @@
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class HealthChecker:
+    """Readiness checks whose combined result is cached for ``ttl`` seconds.
+
+    Each check is a callable returning a dict of details; it fails by
+    raising or by returning ``{'ok': False, ...}``. Only one thread runs the
+    checks at a time, concurrent probes get the previous result, so a load
+    balancer polling every instance cannot turn the probe into load itself.
+    """
+
+    def __init__(self, ttl=5.0):
+        self.ttl = ttl
+        self._checks = []
+        self._lock = threading.Lock()
+        self._result = None
+        self._checked_at = None
+        self.runs = 0
+        self.failures = 0
+
+    def register(self, name, check):
+        self._checks.append((name, check))
+        return check
+
+    def _run_checks(self):
+        results = {}
+        for name, check in self._checks:
+            start = time.perf_counter()
+            try:
+                details = dict(check() or {})
+                details.setdefault('ok', True)
+            except Exception as exc:
+                logger.warning('Readiness check %s failed: %s', name, exc)
+                details = {'ok': False, 'error': '%s: %s' % (type(exc).__name__, exc)}
+            details['duration'] = round(time.perf_counter() - start, 6)
+            results[name] = details
+        return {'ready': all(details['ok'] for details in results.values()), 'checks': results}
+
+    def check(self):
+        now = time.monotonic()
+        result = self._result
+        if result is not None and now - self._checked_at < self.ttl:
+            return result
+        if not self._lock.acquire(blocking=result is None):
+            return result  # another probe is refreshing
+        try:
+            if self._result is None or time.monotonic() - self._checked_at >= self.ttl:
+                result = self._run_checks()
+                self.runs += 1
+                if not result['ready']:
+                    self.failures += 1
+                self._result, self._checked_at = result, time.monotonic()
+            return self._result
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        return {'ttl': self.ttl, 'runs': self.runs, 'failures': self.failures,
+                'ready': None if self._result is None else self._result['ready']}
+
+
+def database_check(pool, ping, timeout=1.0):
+    """Ping the database through a pooled connection, waiting at most ``timeout`` seconds for one."""
+    def check():
+        conn = pool.getconn(timeout=timeout)
+        try:
+            ping(conn)
+        except Exception:
+            pool.putconn(conn, discard=True)
+            raise
+        pool.putconn(conn)
+        return {}
+    return check
+
+
+def pool_check(pool, max_saturation=0.9):
+    """Fail while requests queue for connections or nearly all of them are checked out."""
+    def check():
+        stats = pool.stats()
+        saturation = stats['in_use'] / float(stats['max_size'])
+        return {'ok': stats['waiting'] == 0 and saturation < max_saturation,
+                'in_use': stats['in_use'], 'max_size': stats['max_size'],
+                'waiting': stats['waiting'], 'saturation': round(saturation, 3)}
+    return check
+
+
+def schema_check(pool, pending, timeout=1.0):
+    """Fail while ``pending(conn)`` lists migrations the database has not applied."""
+    def check():
+        conn = pool.getconn(timeout=timeout)
+        try:
+            missing = pending(conn)
+        finally:
+            pool.putconn(conn)
+        return {'ok': not missing, 'pending': [version for version, _ in missing]}
+    return check
+
+
+def directory_check(directory, min_free_bytes=0):
+    """Create and remove a file in ``directory`` and require ``min_free_bytes`` of free space."""
+    def check():
+        probe = os.path.join(directory, '.health-%s' % uuid.uuid4().hex)
+        with open(probe, 'wb') as f:
+            f.write(b'ok')
+        os.remove(probe)
+        free = shutil.disk_usage(directory).free
+        return {'ok': free >= min_free_bytes, 'free_bytes': free, 'min_free_bytes': min_free_bytes}
+    return check
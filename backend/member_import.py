@@ -0,0 +1,187 @@
+import csv
+import io
+import json
+import logging
+import re
+import time
+from itertools import islice
+
+from repository import MEMBER_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Server-side copy of what the membership wizard's forms require. The online
+# store question is not among them: the wizard stores a missing answer as "no".
+REQUIRED = (
+    'membership_type', 'country', 'company_name',  # step 1
+    'business_activity', 'sub_activity',  # step 2
+    'company_street', 'company_postal_code', 'company_city', 'company_country',  # step 3
+    'contact_salutation', 'first_name', 'last_name', 'email',
+)
+
+CHOICES = {
+    'membership_type': ('packaging-paper', 'food-service'),
+    'country': ('Germany', 'France', 'Austria'),
+    'business_activity': ('packaging_manufacturing', 'paper_production', 'corrugated_packaging',
+                          'flexible_packaging', 'sustainable_packaging'),
+    'online_store_products': ('own_products', 'vendor_products', 'both'),
+    'contact_salutation': ('Mr', 'Ms'),
+}
+
+BOOLEANS = ('has_online_store', 'data_processing_consent', 'marketing_consent', 'terms_consent')
+
+# Column sizes of the Postgres schema; longer values would fail the whole COPY
+MAX_LENGTHS = {
+    'membership_type': 100, 'country': 100, 'company_name': 255, 'company_street': 255,
+    'company_postal_code': 50, 'company_city': 100, 'company_country': 100, 'company_phone': 50,
+    'company_website': 255, 'contact_salutation': 10, 'business_activity': 100, 'sub_activity': 100,
+    'online_store_products': 50, 'first_name': 100, 'last_name': 100, 'email': 255, 'phone': 50,
+}
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+FORMATS = ('csv', 'jsonl')
+MAX_REPORTED_ERRORS = 1000
+WRITE_CHUNK = 1000  # rows per job on a shared writer, so other writes wait at most a few ms
+
+_TRUE = {'1', 'true', 'yes', 'on', 'y'}
+_FALSE = {'0', 'false', 'no', 'off', 'n', ''}
+
+
+def _boolean(value):
+    if value is None or isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError
+
+
+def validate_member(record):
+    """Return ``(values, errors)`` for one imported record, checked like the wizard checks its forms.
+
+    ``values`` maps every member column to a cleaned value; columns the
+    record does not have are None (the online store answer and the
+    consents default to False).
+    """
+    if not isinstance(record, dict):
+        return None, ['record is not an object']
+    values = {}
+    errors = []
+    for column in MEMBER_COLUMNS:
+        value = record.get(column)
+        if isinstance(value, str):
+            value = value.strip() or None
+        if column in BOOLEANS:
+            try:
+                value = _boolean(value)
+            except ValueError:
+                errors.append('%s: expected yes/no, got %r' % (column, value))
+                value = None
+        elif value is not None:
+            value = str(value)
+        values[column] = value
+
+    for column in REQUIRED:
+        if values[column] is None:
+            errors.append('%s is required' % column)
+    for column, choices in CHOICES.items():
+        if values[column] is not None and values[column] not in choices:
+            errors.append('%s must be one of %s' % (column, ', '.join(choices)))
+    for column, limit in MAX_LENGTHS.items():
+        if values[column] is not None and len(values[column]) > limit:
+            errors.append('%s is longer than %d characters' % (column, limit))
+    if values['email'] is not None and not EMAIL_PATTERN.match(values['email']):
+        errors.append('email is not a valid address')
+
+    if values['has_online_store']:
+        if values['online_store_products'] is None:
+            errors.append('online_store_products is required with an online store')
+    else:
+        values['online_store_products'] = None  # the wizard hides and clears the field
+    if not values['terms_consent']:
+        errors.append('terms_consent must be accepted')
+    for column in ('has_online_store', 'data_processing_consent', 'marketing_consent'):
+        values[column] = bool(values[column])
+    return values, errors
+
+
+def read_records(stream, fmt):
+    """Yield ``(row_number, record, error)`` from a binary CSV (with header) or JSON lines stream.
+
+    Row numbers count data rows from 1. ``record`` is None when the row
+    could not be parsed, ``error`` says why.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        for number, record in enumerate(csv.DictReader(text), 1):
+            yield number, record, None
+    elif fmt == 'jsonl':
+        number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line), None
+            except ValueError as exc:
+                yield number, None, 'invalid JSON: %s' % exc
+    else:
+        raise ValueError('unknown import format %r' % fmt)
+
+
+def import_members(repository, conn, user_id, records, batch_size=5000, run_write=None):
+    """Validate ``records`` (from ``read_records``) and bulk-insert the valid ones for ``user_id``.
+
+    Invalid rows are reported and skipped; the valid rows are committed in
+    one transaction. With ``run_write`` (SQLite's writer thread) they are
+    committed ``WRITE_CHUNK`` rows per job instead, so an import never
+    holds the write lock for long. If a chunk fails there, the chunks before
+    it stay committed: the report then has ``error`` and ``committed_through``,
+    the last input row that is stored, so a retry can resume after it.
+    Returns a report with counts, the first ``MAX_REPORTED_ERRORS`` row
+    errors and the throughput.
+    """
+    report = {'imported': 0, 'failed': 0, 'errors': []}
+
+    def valid_rows():
+        for number, record, error in records:
+            values, errors = (None, [error]) if error else validate_member(record)
+            if errors:
+                report['failed'] += 1
+                if len(report['errors']) < MAX_REPORTED_ERRORS:
+                    report['errors'].append({'row': number, 'errors': errors})
+                continue
+            yield number, values
+
+    start = time.perf_counter()
+    if run_write is not None:
+        rows = valid_rows()
+        while True:
+            # Validated here, the writer only inserts
+            chunk = list(islice(rows, min(batch_size, WRITE_CHUNK)))
+            if not chunk:
+                break
+            members = [values for _, values in chunk]
+            try:
+                report['imported'] += run_write(
+                    lambda write_conn: repository.bulk_insert_members(write_conn, user_id, members, batch_size))
+            except Exception as exc:
+                logger.exception('Import stopped after %d rows', report['imported'])
+                report['error'] = 'rows from %d on were not imported: %s' % (chunk[0][0], exc)
+                break
+            report['committed_through'] = chunk[-1][0]
+    else:
+        try:
+            report['imported'] = repository.bulk_insert_members(
+                conn, user_id, (values for _, values in valid_rows()), batch_size)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    elapsed = time.perf_counter() - start
+    report['seconds'] = round(elapsed, 3)
+    report['rows_per_second'] = round((report['imported'] + report['failed']) / elapsed) if elapsed else None
+    return report
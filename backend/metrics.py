@@ -0,0 +1,133 @@
+import threading
+from bisect import bisect_left
+
+# Seconds; covers cached pages (sub-millisecond) up to slow uploads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=''):
+    pairs = ['%s="%s"' % (name, _escape(value)) for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return '%d' % value
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels; values are plain dict entries."""
+
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in sorted(items):
+            yield self.name, _labels(self.labelnames, labelvalues), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels.
+
+    ``observe`` is a bisect and a few integer additions under a lock; the
+    cumulative counts Prometheus expects are only built when scraped.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # labelvalues -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labelvalues, list(state)) for labelvalues, state in self._values.items()]
+        for labelvalues, state in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state):
+                cumulative += count
+                yield (self.name + '_bucket',
+                       _labels(self.labelnames, labelvalues, 'le="%s"' % _number(float(bound))), cumulative)
+            yield self.name + '_sum', _labels(self.labelnames, labelvalues), state[-1]
+            yield self.name + '_count', _labels(self.labelnames, labelvalues), cumulative
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text format.
+
+    Hot paths update ``Counter``/``Histogram`` objects directly. Components
+    that already keep their own statistics are exported through collectors,
+    callables run at scrape time that yield ``(name, type, help, samples)``
+    with ``samples`` as ``(suffix, labels dict, value)`` tuples.
+    """
+
+    def __init__(self, prefix=''):
+        self.prefix = prefix
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(self.prefix + name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(self.prefix + name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append('# HELP %s %s' % (metric.name, metric.help))
+            lines.append('# TYPE %s %s' % (metric.name, metric.type))
+            for name, labels, value in metric.samples():
+                lines.append('%s%s %s' % (name, labels, _number(value)))
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                name = self.prefix + name
+                lines.append('# HELP %s %s' % (name, help))
+                lines.append('# TYPE %s %s' % (name, kind))
+                for suffix, labels, value in samples:
+                    if value is not None:
+                        lines.append('%s%s%s %s' % (name, suffix, _labels(labels, labels.values()),
+                                                    _number(value)))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,365 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = {
+    'postgres': '''CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )''',
+    'sqlite': '''CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )''',
+}
+
+# Serialises concurrent `flask migrate` runs on Postgres (arbitrary constant)
+ADVISORY_LOCK_ID = 727141
+
+
+RECORD_VERSION = {
+    'postgres': 'INSERT INTO schema_migrations (version, name) VALUES (%s, %s)',
+    'sqlite': 'INSERT INTO schema_migrations (version, name) VALUES (?, ?)',
+}
+
+
+def _fill_member_stats(repository, conn):
+    # Databases from before the counter table existed start out consistent
+    cur = conn.cursor()
+    cur.execute('SELECT EXISTS (SELECT 1 FROM member_stats)')
+    if not cur.fetchone()[0]:
+        repository.rebuild_member_stats(conn, commit=False)
+
+
+def _index_existing_members(repository, conn):
+    conn.cursor().execute("INSERT INTO members_fts (members_fts) VALUES ('rebuild')")
+
+
+# Migrations are frozen: their DDL is spelled out here rather than built from the
+# constants in repository.py, so a later edit there cannot change what an applied
+# version means. Never edit an applied migration, append a new one.
+
+# The tables the app had when migrations were introduced. IF NOT EXISTS:
+# databases created before then already have them.
+BASE_SCHEMA = {
+    'postgres': [
+        '''CREATE TABLE IF NOT EXISTS users (
+                id SERIAL PRIMARY KEY,
+                username VARCHAR(255) UNIQUE NOT NULL,
+                password_hash VARCHAR(255) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )''',
+        '''CREATE TABLE IF NOT EXISTS members (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                membership_type VARCHAR(100) NOT NULL,
+                country VARCHAR(100),
+                company_name VARCHAR(255) NOT NULL,
+                company_street VARCHAR(255),
+                company_postal_code VARCHAR(50),
+                company_city VARCHAR(100),
+                company_country VARCHAR(100),
+                company_phone VARCHAR(50),
+                company_website VARCHAR(255),
+                contact_salutation VARCHAR(10),
+                business_activity VARCHAR(100),
+                sub_activity VARCHAR(100),
+                has_online_store BOOLEAN DEFAULT FALSE,
+                online_store_products VARCHAR(50),
+                first_name VARCHAR(100),
+                last_name VARCHAR(100),
+                email VARCHAR(255),
+                phone VARCHAR(50),
+                status VARCHAR(20) DEFAULT 'pending',
+                join_date DATE DEFAULT CURRENT_DATE,
+                data_processing_consent BOOLEAN DEFAULT FALSE,
+                marketing_consent BOOLEAN DEFAULT FALSE,
+                terms_consent BOOLEAN DEFAULT TRUE,
+                consent_document_filename VARCHAR(255),
+                consent_document_original_name VARCHAR(255),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )''',
+        'CREATE INDEX IF NOT EXISTS idx_members_user_created ON members (user_id, created_at, id)',
+        '''CREATE TABLE IF NOT EXISTS member_stats (
+                user_id INTEGER PRIMARY KEY REFERENCES users (id),
+                total INTEGER NOT NULL DEFAULT 0,
+                active INTEGER NOT NULL DEFAULT 0,
+                with_document INTEGER NOT NULL DEFAULT 0
+            )''',
+        '''CREATE TABLE IF NOT EXISTS consent_blobs (
+                filename VARCHAR(255) PRIMARY KEY,
+                sha256 CHAR(64),
+                size BIGINT,
+                refcount INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )''',
+        '''CREATE TABLE IF NOT EXISTS storage_cleanup (
+                id SERIAL PRIMARY KEY,
+                filename VARCHAR(255) NOT NULL,
+                reason VARCHAR(32) NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                not_before DOUBLE PRECISION NOT NULL,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )''',
+        'CREATE INDEX IF NOT EXISTS idx_storage_cleanup_due ON storage_cleanup (not_before)',
+        '''CREATE TABLE IF NOT EXISTS sessions (
+                sid VARCHAR(64) PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at DOUBLE PRECISION NOT NULL
+            )''',
+        'CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)',
+        '''CREATE TABLE IF NOT EXISTS membership_drafts (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER NOT NULL UNIQUE,
+                country VARCHAR(255),
+                company_name VARCHAR(255),
+                membership_type VARCHAR(255),
+                business_activity VARCHAR(255),
+                sub_activity VARCHAR(255),
+                has_online_store BOOLEAN,
+                online_store_products VARCHAR(255),
+                company_street VARCHAR(255),
+                company_postal_code VARCHAR(255),
+                company_city VARCHAR(255),
+                company_country VARCHAR(255),
+                company_phone VARCHAR(255),
+                company_website VARCHAR(255),
+                contact_salutation VARCHAR(255),
+                first_name VARCHAR(255),
+                last_name VARCHAR(255),
+                email VARCHAR(255),
+                phone VARCHAR(255),
+                step INTEGER NOT NULL DEFAULT 1,
+                updated_at DOUBLE PRECISION NOT NULL,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )''',
+        'CREATE INDEX IF NOT EXISTS idx_membership_drafts_updated ON membership_drafts (updated_at)',
+    ],
+    'sqlite': [
+        '''CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )''',
+        '''CREATE TABLE IF NOT EXISTS members (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                membership_type TEXT NOT NULL,
+                country TEXT,
+                company_name TEXT NOT NULL,
+                company_street TEXT,
+                company_postal_code TEXT,
+                company_city TEXT,
+                company_country TEXT,
+                company_phone TEXT,
+                company_website TEXT,
+                contact_salutation TEXT,
+                business_activity TEXT,
+                sub_activity TEXT,
+                has_online_store BOOLEAN DEFAULT 0,
+                online_store_products TEXT,
+                first_name TEXT,
+                last_name TEXT,
+                email TEXT,
+                phone TEXT,
+                status TEXT DEFAULT 'pending',
+                join_date DATE DEFAULT CURRENT_DATE,
+                data_processing_consent BOOLEAN DEFAULT 0,
+                marketing_consent BOOLEAN DEFAULT 0,
+                terms_consent BOOLEAN DEFAULT 1,
+                consent_document_filename TEXT,
+                consent_document_original_name TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )''',
+        'CREATE INDEX IF NOT EXISTS idx_members_user_created ON members (user_id, created_at, id)',
+        '''CREATE TABLE IF NOT EXISTS member_stats (
+                user_id INTEGER PRIMARY KEY REFERENCES users (id),
+                total INTEGER NOT NULL DEFAULT 0,
+                active INTEGER NOT NULL DEFAULT 0,
+                with_document INTEGER NOT NULL DEFAULT 0
+            )''',
+        '''CREATE TABLE IF NOT EXISTS consent_blobs (
+                filename TEXT PRIMARY KEY,
+                sha256 TEXT,
+                size INTEGER,
+                refcount INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )''',
+        '''CREATE TABLE IF NOT EXISTS storage_cleanup (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                filename TEXT NOT NULL,
+                reason TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                not_before REAL NOT NULL,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )''',
+        'CREATE INDEX IF NOT EXISTS idx_storage_cleanup_due ON storage_cleanup (not_before)',
+        '''CREATE TABLE IF NOT EXISTS sessions (
+                sid TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )''',
+        'CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)',
+        '''CREATE TABLE IF NOT EXISTS membership_drafts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL UNIQUE,
+                country TEXT,
+                company_name TEXT,
+                membership_type TEXT,
+                business_activity TEXT,
+                sub_activity TEXT,
+                has_online_store BOOLEAN,
+                online_store_products TEXT,
+                company_street TEXT,
+                company_postal_code TEXT,
+                company_city TEXT,
+                company_country TEXT,
+                company_phone TEXT,
+                company_website TEXT,
+                contact_salutation TEXT,
+                first_name TEXT,
+                last_name TEXT,
+                email TEXT,
+                phone TEXT,
+                step INTEGER NOT NULL DEFAULT 1,
+                updated_at REAL NOT NULL,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )''',
+        'CREATE INDEX IF NOT EXISTS idx_membership_drafts_updated ON membership_drafts (updated_at)',
+    ],
+}
+
+MEMBER_SEARCH = {
+    'postgres': [
+        'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+        '''ALTER TABLE members ADD COLUMN IF NOT EXISTS search_text TEXT GENERATED ALWAYS AS (lower(
+                coalesce(company_name, '') || ' ' || coalesce(first_name, '') || ' ' || coalesce(last_name, '')
+                || ' ' || coalesce(email, '') || ' ' || coalesce(company_city, '') || ' '
+                || coalesce(business_activity, ''))) STORED''',
+        '''ALTER TABLE members ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(company_name, '')), 'A')
+                || setweight(to_tsvector('simple', coalesce(first_name, '') || ' ' || coalesce(last_name, '')
+                                                   || ' ' || coalesce(email, '')), 'B')
+                || setweight(to_tsvector('simple', coalesce(company_city, '') || ' '
+                                                   || coalesce(business_activity, '')), 'C')) STORED''',
+        'CREATE INDEX IF NOT EXISTS idx_members_search_vector ON members USING GIN (search_vector)',
+        'CREATE INDEX IF NOT EXISTS idx_members_search_trgm ON members USING GIN (search_text gin_trgm_ops)',
+    ],
+    'sqlite': [
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS members_fts USING fts5(
+                company_name, first_name, last_name, email, company_city, business_activity,
+                content='members', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+            )''',
+        'CREATE VIRTUAL TABLE IF NOT EXISTS members_fts_vocab USING fts5vocab(members_fts, row)',
+        # External-content FTS tables are kept in sync by the application, here through triggers
+        '''CREATE TRIGGER IF NOT EXISTS members_fts_insert AFTER INSERT ON members BEGIN
+                INSERT INTO members_fts (rowid, company_name, first_name, last_name, email, company_city,
+                                         business_activity)
+                VALUES (new.id, new.company_name, new.first_name, new.last_name, new.email, new.company_city,
+                        new.business_activity);
+            END''',
+        '''CREATE TRIGGER IF NOT EXISTS members_fts_delete AFTER DELETE ON members BEGIN
+                INSERT INTO members_fts (members_fts, rowid, company_name, first_name, last_name, email,
+                                         company_city, business_activity)
+                VALUES ('delete', old.id, old.company_name, old.first_name, old.last_name, old.email,
+                        old.company_city, old.business_activity);
+            END''',
+        '''CREATE TRIGGER IF NOT EXISTS members_fts_update
+            AFTER UPDATE OF company_name, first_name, last_name, email, company_city, business_activity
+            ON members BEGIN
+                INSERT INTO members_fts (members_fts, rowid, company_name, first_name, last_name, email,
+                                         company_city, business_activity)
+                VALUES ('delete', old.id, old.company_name, old.first_name, old.last_name, old.email,
+                        old.company_city, old.business_activity);
+                INSERT INTO members_fts (rowid, company_name, first_name, last_name, email, company_city,
+                                         business_activity)
+                VALUES (new.id, new.company_name, new.first_name, new.last_name, new.email, new.company_city,
+                        new.business_activity);
+            END''',
+    ],
+}
+
+# (version, name, steps per dialect). A step is an SQL statement or a callable
+# taking (repository, conn).
+MIGRATIONS = [
+    (1, 'base schema', {
+        'postgres': BASE_SCHEMA['postgres'] + [_fill_member_stats],
+        'sqlite': BASE_SCHEMA['sqlite'] + [_fill_member_stats],
+    }),
+    (2, 'member search', {
+        'postgres': MEMBER_SEARCH['postgres'],
+        'sqlite': MEMBER_SEARCH['sqlite'] + [_index_existing_members],
+    }),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def applied_versions(conn, dialect):
+    cur = conn.cursor()
+    if dialect == 'sqlite':
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'")
+    else:
+        cur.execute("SELECT 1 FROM information_schema.tables WHERE table_name = 'schema_migrations' "
+                    'AND table_schema = current_schema()')
+    if cur.fetchone() is None:
+        return set()
+    cur.execute('SELECT version FROM schema_migrations')
+    return {row[0] for row in cur.fetchall()}
+
+
+def pending(repository, conn):
+    """Return ``(version, name)`` of every migration not applied to this database yet."""
+    applied = applied_versions(conn, repository.dialect)
+    conn.rollback()
+    return [(version, name) for version, name, _ in MIGRATIONS if version not in applied]
+
+
+def _begin(repository, conn, cur):
+    conn.commit()
+    if repository.dialect == 'sqlite':
+        # Take the write lock up front so a second migrating process waits here
+        cur.execute('BEGIN IMMEDIATE')
+    else:
+        cur.execute('SELECT pg_advisory_xact_lock(%s)', (ADVISORY_LOCK_ID,))
+
+
+def migrate(repository, conn, target=None):
+    """Apply pending migrations up to ``target`` (default: all), each in its own transaction.
+
+    Returns the ``(version, name)`` pairs applied. Concurrent runs wait for
+    each other and skip what the other one already did.
+    """
+    target = LATEST_VERSION if target is None else target
+    cur = conn.cursor()
+    done = []
+    for version, name, steps in MIGRATIONS:
+        if version > target:
+            break
+        _begin(repository, conn, cur)
+        try:
+            cur.execute(VERSION_TABLE[repository.dialect])
+            if version in applied_versions(conn, repository.dialect):
+                conn.commit()
+                continue
+            logger.info('Applying migration %d (%s)', version, name)
+            for step in steps[repository.dialect]:
+                if callable(step):
+                    step(repository, conn)
+                else:
+                    cur.execute(step)
+            cur.execute(RECORD_VERSION[repository.dialect], (version, name))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        done.append((version, name))
+    return done
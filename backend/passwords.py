@@ -0,0 +1,162 @@
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+HAS_SCRYPT = hasattr(hashlib, 'scrypt')
+
+DEFAULT_SCRYPT = {'n': 2 ** 14, 'r': 8, 'p': 1}
+DEFAULT_PBKDF2_ITERATIONS = 600000
+SALT_BYTES = 16
+
+
+class HasherBusy(Exception):
+    pass
+
+
+def _b64(data):
+    return base64.b64encode(data).decode().rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p):
+    # hashlib's default maxmem (32 MiB) is below what n >= 2**15 needs
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r * p + 1024 * 1024, dklen=32)
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+
+
+def is_legacy_hash(stored):
+    # Unsalted hex SHA-256 from before salted hashing was introduced
+    return len(stored) == 64 and '$' not in stored
+
+
+class PasswordHasher:
+    """Salted, cost-tunable password hashing.
+
+    New hashes use scrypt (PBKDF2-SHA256 where OpenSSL lacks scrypt) and
+    encode their parameters, so costs can be raised at any time: ``verify``
+    reports ``needs_rehash`` for legacy SHA-256 hashes and for hashes made
+    with weaker parameters than the current ones.
+
+    All hashing runs in a bounded thread pool; once ``max_pending`` hashes
+    are queued, further calls raise ``HasherBusy`` instead of piling up.
+    """
+
+    def __init__(self, scrypt_params=None, pbkdf2_iterations=DEFAULT_PBKDF2_ITERATIONS,
+                 workers=2, max_pending=32):
+        self.scrypt_params = dict(scrypt_params or DEFAULT_SCRYPT)
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._dummy = None
+
+    # Raw (synchronous) operations
+
+    def hash(self, password):
+        salt = os.urandom(SALT_BYTES)
+        if HAS_SCRYPT:
+            n, r, p = self.scrypt_params['n'], self.scrypt_params['r'], self.scrypt_params['p']
+            return 'scrypt$%d$%d$%d$%s$%s' % (n, r, p, _b64(salt), _b64(_scrypt(password, salt, n, r, p)))
+        iterations = self.pbkdf2_iterations
+        return 'pbkdf2_sha256$%d$%s$%s' % (iterations, _b64(salt), _b64(_pbkdf2(password, salt, iterations)))
+
+    def check(self, password, stored):
+        """Return ``(matches, needs_rehash)`` for a stored hash."""
+        if is_legacy_hash(stored):
+            digest = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(digest, stored), True
+
+        scheme, _, params = stored.partition('$')
+        if scheme == 'scrypt':
+            n, r, p, salt, expected = params.split('$')
+            n, r, p = int(n), int(r), int(p)
+            actual = _scrypt(password, _unb64(salt), n, r, p)
+            current = self.scrypt_params
+            weaker = not HAS_SCRYPT or n * r * p < current['n'] * current['r'] * current['p']
+        elif scheme == 'pbkdf2_sha256':
+            iterations, salt, expected = params.split('$')
+            actual = _pbkdf2(password, _unb64(salt), int(iterations))
+            weaker = HAS_SCRYPT or int(iterations) < self.pbkdf2_iterations
+        else:
+            return False, False
+
+        matches = hmac.compare_digest(actual, _unb64(expected))
+        return matches, matches and weaker
+
+    def check_missing_user(self, password):
+        # Same work as a real check so unknown usernames don't answer faster
+        if self._dummy is None:
+            self._dummy = self.hash('dummy-password')
+        self.check(password, self._dummy)
+        return False, False
+
+    # Bounded pool
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy('too many password hashes in progress')
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def verify(self, password, stored, timeout=None):
+        if stored is None:
+            return self.submit(self.check_missing_user, password).result(timeout)
+        return self.submit(self.check, password, stored).result(timeout)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    # Calibration
+
+    def calibrate(self, target_ms=250.0, max_n=2 ** 17, rounds=3):
+        """Pick the cheapest parameters whose verify takes at least ``target_ms``.
+
+        Returns a dict with the chosen parameters and the measured time.
+        """
+        def measure(fn):
+            best = None
+            for _ in range(rounds):
+                start = time.perf_counter()
+                fn()
+                elapsed = (time.perf_counter() - start) * 1000
+                best = elapsed if best is None else min(best, elapsed)
+            return best
+
+        salt = os.urandom(SALT_BYTES)
+        if HAS_SCRYPT:
+            r, p = self.scrypt_params['r'], self.scrypt_params['p']
+            n = 2 ** 12
+            while True:
+                elapsed = measure(lambda: _scrypt('calibration', salt, n, r, p))
+                if elapsed >= target_ms or n >= max_n:
+                    break
+                n *= 2
+            self.scrypt_params = {'n': n, 'r': r, 'p': p}
+            self._dummy = None
+            return {'scheme': 'scrypt', 'n': n, 'r': r, 'p': p, 'ms': round(elapsed, 1)}
+
+        iterations = 100000
+        elapsed = measure(lambda: _pbkdf2('calibration', salt, iterations))
+        iterations = max(iterations, int(iterations * target_ms / elapsed))
+        self.pbkdf2_iterations = iterations
+        self._dummy = None
+        return {'scheme': 'pbkdf2_sha256', 'iterations': iterations,
+                'ms': round(measure(lambda: _pbkdf2('calibration', salt, iterations)), 1)}
@@ -0,0 +1,128 @@
+import math
+import threading
+import time
+
+try:
+    import redis
+except ImportError:  # only needed for RedisRateLimiter
+    redis = None
+
+
+class TokenBucketLimiter:
+    """In-process token bucket per key.
+
+    Each key may spend ``attempts`` tokens, refilled evenly over ``window``
+    seconds. State is one small list per active key; buckets that have
+    refilled completely carry no information and are swept periodically.
+    """
+
+    def __init__(self, attempts, window, max_keys=100000, sweep_interval=60.0):
+        self.capacity = float(attempts)
+        self.rate = attempts / float(window)
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._buckets = {}  # key -> [tokens, updated_at]
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, key):
+        """Spend one token for ``key``; return 0 or the seconds until retry."""
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep or len(self._buckets) >= self.max_keys:
+                self._sweep(now)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                self._buckets[key] = [self.capacity - 1, now]
+                self.allowed += 1
+                return 0
+            tokens = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                self.allowed += 1
+                return 0
+            bucket[0] = tokens
+            self.limited += 1
+            return (1 - tokens) / self.rate
+
+    def retry_after(self, key):
+        """Return 0 if ``key`` has a token left, else the seconds until it has; spends nothing."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return 0
+            tokens = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+            if tokens >= 1:
+                return 0
+            self.limited += 1
+            return (1 - tokens) / self.rate
+
+    def _sweep(self, now):
+        full_after = self.capacity / self.rate
+        for key in [k for k, (_, updated) in self._buckets.items() if now - updated >= full_after]:
+            del self._buckets[key]
+        # Still too many active keys: drop the oldest tenth so this stays rare
+        overflow = len(self._buckets) - int(self.max_keys * 0.9)
+        if overflow > 0:
+            for key in list(self._buckets)[:overflow]:
+                del self._buckets[key]
+        self._next_sweep = now + self.sweep_interval
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'local', 'keys': len(self._buckets),
+                    'allowed': self.allowed, 'limited': self.limited}
+
+
+class RedisRateLimiter:
+    """Sliding-window counter shared by all workers through Redis."""
+
+    def __init__(self, client, attempts, window, prefix='ratelimit:'):
+        if isinstance(client, str):
+            if redis is None:
+                raise RuntimeError('RedisRateLimiter requires redis (pip install redis)')
+            client = redis.Redis.from_url(client)
+        self.client = client
+        self.attempts = attempts
+        self.window = int(window)
+        self.prefix = prefix
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, key):
+        """Count one attempt for ``key``; return 0 or the seconds until retry."""
+        now = time.time()
+        current = int(now // self.window)
+        elapsed = (now % self.window) / self.window
+        current_key = '%s%s:%d' % (self.prefix, key, current)
+        pipe = self.client.pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, self.window * 2)
+        pipe.get('%s%s:%d' % (self.prefix, key, current - 1))
+        count, _, previous = pipe.execute()
+        # Weight the previous window by how much of it still overlaps
+        estimate = int(previous or 0) * (1 - elapsed) + count
+        if estimate <= self.attempts:
+            self.allowed += 1
+            return 0
+        self.limited += 1
+        return math.ceil(self.window * (1 - elapsed)) or 1
+
+    def retry_after(self, key):
+        """Return 0 if one more attempt for ``key`` is allowed, else the seconds until retry; counts nothing."""
+        now = time.time()
+        current = int(now // self.window)
+        elapsed = (now % self.window) / self.window
+        count, previous = self.client.mget(['%s%s:%d' % (self.prefix, key, current),
+                                            '%s%s:%d' % (self.prefix, key, current - 1)])
+        if int(previous or 0) * (1 - elapsed) + int(count or 0) < self.attempts:
+            return 0
+        self.limited += 1
+        return math.ceil(self.window * (1 - elapsed)) or 1
+
+    def stats(self):
+        return {'backend': 'redis', 'allowed': self.allowed, 'limited': self.limited}
@@ -0,0 +1,115 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import before_render_template, make_response, template_rendered
+
+
+class TemplateRegistry:
+    """Compiles every page template once and renders from the compiled objects.
+
+    ``render_template_string`` parses and compiles its source on every call;
+    here that happens a single time per process, at construction. Rendering
+    still goes through the app's context processors and template signals.
+    """
+
+    def __init__(self, app, sources):
+        self.app = app
+        self.sources = dict(sources)
+        self._compiled = {}
+        self.compile_all()
+
+    def compile_all(self):
+        env = self.app.jinja_env
+        self._compiled = {name: env.from_string(source) for name, source in self.sources.items()}
+        for name, template in self._compiled.items():
+            template.name = name
+
+    def get(self, name):
+        return self._compiled[name]
+
+    @property
+    def version(self):
+        """Digest of all template sources; the same in every process running this code."""
+        digest = hashlib.sha256()
+        for name in sorted(self.sources):
+            digest.update(('%s\0%s\0' % (name, self.sources[name])).encode())
+        return digest.hexdigest()[:16]
+
+    def render(self, name, **context):
+        template = self._compiled[name]
+        app = self.app
+        app.update_template_context(context)
+        before_render_template.send(app, _async_wrapper=app.ensure_sync, template=template, context=context)
+        rv = template.render(context)
+        template_rendered.send(app, _async_wrapper=app.ensure_sync, template=template, context=context)
+        return rv
+
+
+def conditional_response(request, body):
+    """Serve a per-user page with an ETag of its content, so an unchanged page costs a 304.
+
+    Nothing is stored, and there is no ``Last-Modified``: the page changes
+    with the user's data, not with the deploy.
+    """
+    response = make_response(body)
+    response.add_etag()
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+class PageCache:
+    """Bounded LRU of fully rendered pages with validators for conditional GET.
+
+    Entries are keyed by ``(version, key)``; bumping ``version`` (the deploy
+    id) or calling ``clear()`` invalidates everything, and changes the ETags
+    so browsers revalidate after a deploy.
+    """
+
+    def __init__(self, version, last_modified, max_entries=64):
+        self.version = version
+        self.last_modified = last_modified
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, render):
+        cache_key = (self.version, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry
+        body = render()
+        etag = hashlib.sha256(('%s\0' % self.version).encode() + body.encode()).hexdigest()[:32]
+        entry = (body, etag)
+        with self._lock:
+            self.misses += 1
+            self._entries[cache_key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def response(self, request, key, render):
+        body, etag = self.get(key, render)
+        response = make_response(body)
+        response.set_etag(etag)
+        response.last_modified = self.last_modified
+        # Browsers keep the page but must revalidate, which is a cheap 304
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    def clear(self, version=None):
+        with self._lock:
+            self._entries.clear()
+            if version is not None:
+                self.version = version
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
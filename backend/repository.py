@@ -0,0 +1,670 @@
+import base64
+import csv
+import io
+import json
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from itertools import islice
+
+try:
+    import psycopg2
+    import psycopg2.errors
+    import psycopg2.extensions
+    import psycopg2.extras
+except ImportError:  # SQLite-only installs
+    psycopg2 = None
+
+import search
+from search import SEARCH_COLUMNS
+
+
+MEMBER_COLUMNS = (
+    'membership_type', 'country', 'company_name', 'business_activity',
+    'sub_activity', 'has_online_store', 'online_store_products',
+    'company_street', 'company_postal_code', 'company_city', 'company_country',
+    'company_phone', 'company_website', 'contact_salutation',
+    'first_name', 'last_name', 'email', 'phone', 'data_processing_consent',
+    'marketing_consent', 'terms_consent',
+)
+
+MEMBER_DEFAULTS = {
+    'has_online_store': False,
+    'data_processing_consent': False,
+    'marketing_consent': False,
+    'terms_consent': True,
+}
+
+# Wizard steps and the member columns each one fills in (membership_drafts)
+DRAFT_STEP_COLUMNS = {
+    1: ('country', 'company_name', 'membership_type'),
+    2: ('business_activity', 'sub_activity', 'has_online_store', 'online_store_products'),
+    3: ('company_street', 'company_postal_code', 'company_city', 'company_country',
+        'company_phone', 'company_website', 'contact_salutation', 'first_name',
+        'last_name', 'email', 'phone'),
+    4: ('data_processing_consent', 'marketing_consent', 'terms_consent'),
+}
+DRAFT_COLUMNS = DRAFT_STEP_COLUMNS[1] + DRAFT_STEP_COLUMNS[2] + DRAFT_STEP_COLUMNS[3]
+
+
+def _draft_upsert(columns):
+    return ('INSERT INTO membership_drafts (user_id, %s, step, updated_at) VALUES (?, %s, ?, ?) '
+            'ON CONFLICT (user_id) DO UPDATE SET %s, updated_at = excluded.updated_at, '
+            'step = CASE WHEN excluded.step > membership_drafts.step THEN excluded.step ELSE membership_drafts.step END'
+            % (', '.join(columns), ', '.join(['?'] * len(columns)),
+               ', '.join('%s = excluded.%s' % (column, column) for column in columns)))
+
+
+# Recomputes member_stats from scratch (see Repository.rebuild_member_stats)
+MEMBER_STATS_AGGREGATE = (
+    "SELECT user_id, COUNT(*), "
+    "COALESCE(SUM(CASE WHEN status = 'active' THEN 1 ELSE 0 END), 0), "
+    "COALESCE(SUM(CASE WHEN consent_document_filename IS NOT NULL "
+    "AND consent_document_filename <> '' THEN 1 ELSE 0 END), 0) "
+    "FROM members GROUP BY user_id"
+)
+
+# Columns the dashboard cards show, plus created_at for the page cursor
+MEMBER_CARD_COLUMNS = (
+    'id, company_name, first_name, last_name, country, business_activity, status, '
+    'consent_document_filename, consent_document_original_name, created_at'
+)
+
+# All queries are written once with "?" placeholders and translated per dialect
+QUERIES = {
+    'user_credentials': 'SELECT id, password_hash FROM users WHERE username = ?',
+    'update_password_hash': 'UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?',
+    # Keyset pagination over the (user_id, created_at, id) index
+    'members_page_first': ('SELECT %s FROM members WHERE user_id = ? '
+                           'ORDER BY created_at DESC, id DESC LIMIT ?' % MEMBER_CARD_COLUMNS),
+    'members_page_after': ('SELECT %s FROM members WHERE user_id = ? AND (created_at, id) < (?, ?) '
+                           'ORDER BY created_at DESC, id DESC LIMIT ?' % MEMBER_CARD_COLUMNS),
+    'members_page_before': ('SELECT %s FROM members WHERE user_id = ? AND (created_at, id) > (?, ?) '
+                            'ORDER BY created_at ASC, id ASC LIMIT ?' % MEMBER_CARD_COLUMNS),
+    # Dashboard counters, maintained on every insert and delete
+    'member_stats': 'SELECT total, active, with_document FROM member_stats WHERE user_id = ?',
+    'adjust_member_stats': ('INSERT INTO member_stats (user_id, total, active, with_document) VALUES (?, ?, ?, ?) '
+                            'ON CONFLICT (user_id) DO UPDATE SET '
+                            'total = member_stats.total + excluded.total, '
+                            'active = member_stats.active + excluded.active, '
+                            'with_document = member_stats.with_document + excluded.with_document'),
+    'member_delete_info': 'SELECT consent_document_filename, status FROM members WHERE id = ? AND user_id = ?',
+    'member_by_id': 'SELECT * FROM members WHERE id = ? AND user_id = ?',
+    # Content-addressed consent documents, reference-counted by members
+    'acquire_blob': ('INSERT INTO consent_blobs (filename, sha256, size, refcount) VALUES (?, ?, ?, 1) '
+                     'ON CONFLICT (filename) DO UPDATE SET refcount = consent_blobs.refcount + 1'),
+    'release_blob': 'UPDATE consent_blobs SET refcount = refcount - 1 WHERE filename = ? AND refcount > 0',
+    'blob_refcount': 'SELECT refcount FROM consent_blobs WHERE filename = ?',
+    'drop_unreferenced_blob': 'DELETE FROM consent_blobs WHERE filename = ? AND refcount <= 0',
+    # Durable queue of stored documents to delete (see cleanup.CleanupWorker)
+    'enqueue_cleanup': 'INSERT INTO storage_cleanup (filename, reason, not_before) VALUES (?, ?, ?)',
+    'due_cleanup': ('SELECT id, filename, attempts, not_before FROM storage_cleanup '
+                    'WHERE not_before <= ? AND attempts < ? ORDER BY not_before, id LIMIT ?'),
+    'claim_cleanup': ('UPDATE storage_cleanup SET attempts = attempts + 1, not_before = ? '
+                      'WHERE id = ? AND not_before = ?'),
+    'lock_blob': ('INSERT INTO consent_blobs (filename, refcount) VALUES (?, 0) '
+                  'ON CONFLICT (filename) DO UPDATE SET refcount = consent_blobs.refcount'),
+    'queued_cleanup': 'SELECT DISTINCT filename FROM storage_cleanup',
+    'finish_cleanup': 'DELETE FROM storage_cleanup WHERE id = ?',
+    'fail_cleanup': 'UPDATE storage_cleanup SET not_before = ?, last_error = ? WHERE id = ?',
+    'cleanup_backlog': ('SELECT COALESCE(SUM(CASE WHEN attempts < ? THEN 1 ELSE 0 END), 0), '
+                        'COALESCE(SUM(CASE WHEN attempts >= ? THEN 1 ELSE 0 END), 0) FROM storage_cleanup'),
+    # Server-side sessions (see sessions.DatabaseSessionStore)
+    'load_session': 'SELECT data, expires_at FROM sessions WHERE sid = ? AND expires_at > ?',
+    'save_session': ('INSERT INTO sessions (sid, data, expires_at) VALUES (?, ?, ?) '
+                     'ON CONFLICT (sid) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at'),
+    'delete_session': 'DELETE FROM sessions WHERE sid = ?',
+    'purge_sessions': 'DELETE FROM sessions WHERE expires_at <= ?',
+    # Wizard drafts, one per user, saved step by step and promoted on the last step
+    'draft_by_user': 'SELECT %s, step FROM membership_drafts WHERE user_id = ?' % ', '.join(DRAFT_COLUMNS),
+    'draft_summary': 'SELECT company_name, step FROM membership_drafts WHERE user_id = ?',
+    'delete_draft': 'DELETE FROM membership_drafts WHERE user_id = ?',
+    **{'save_draft_step%d' % step: _draft_upsert(columns) for step, columns in DRAFT_STEP_COLUMNS.items() if step < 4},
+    'promote_draft': ('INSERT INTO members (user_id, %s, %s, consent_document_filename, '
+                      'consent_document_original_name) SELECT user_id, %s, %s, ?, ? '
+                      'FROM membership_drafts WHERE user_id = ?'
+                      % (', '.join(DRAFT_COLUMNS), ', '.join(DRAFT_STEP_COLUMNS[4]),
+                         ', '.join('COALESCE(%s, ?)' % column if column in MEMBER_DEFAULTS else column
+                                   for column in DRAFT_COLUMNS),
+                         ', '.join(['CAST(? AS BOOLEAN)'] * len(DRAFT_STEP_COLUMNS[4])))),
+    'purge_drafts': ('DELETE FROM membership_drafts WHERE id IN '
+                     '(SELECT id FROM membership_drafts WHERE updated_at < ? LIMIT ?)'),
+    'member_document': ('SELECT m.consent_document_filename, m.consent_document_original_name, b.sha256 '
+                        'FROM members m LEFT JOIN consent_blobs b ON b.filename = m.consent_document_filename '
+                        'WHERE m.id = ? AND m.user_id = ?'),
+    'delete_member': 'DELETE FROM members WHERE id = ? AND user_id = ?',
+    'insert_member': ('INSERT INTO members (user_id, %s, consent_document_filename, '
+                      'consent_document_original_name) VALUES (%s)'
+                      % (', '.join(MEMBER_COLUMNS), ', '.join(['?'] * (len(MEMBER_COLUMNS) + 3)))),
+}
+
+
+# Columns written by exports, in file order (the search columns are derived data)
+EXPORT_COLUMNS = ('id', 'user_id') + MEMBER_COLUMNS + (
+    'status', 'join_date', 'consent_document_filename', 'consent_document_original_name', 'created_at')
+
+FTS5_PREFIX_INDEX = 4  # longest search prefix with its own FTS5 index (prefix='2 3 4' in migrations.py)
+MEMBER_SEARCH_COLUMNS = MEMBER_CARD_COLUMNS.split(', ') + [column for column in SEARCH_COLUMNS
+                                                             if column not in MEMBER_CARD_COLUMNS]
+
+
+# Member search: tsvector + trigram index on Postgres, an FTS5 table on SQLite
+SEARCH_QUERIES = {
+    'postgres': {
+        'search_members': (
+            'SELECT %s FROM members WHERE user_id = ? '
+            "AND (search_vector @@ to_tsquery('simple', ?) OR ? <%% search_text) "
+            "ORDER BY ts_rank(search_vector, to_tsquery('simple', ?)) + word_similarity(?, search_text) DESC, "
+            'id DESC LIMIT ? OFFSET ?' % MEMBER_CARD_COLUMNS),
+    },
+    'sqlite': {
+        # Only the newest matches (the rank window) are fetched and then ranked in Python;
+        # bm25 would read the complete document list of every term to weigh it
+        'search_members': (
+            'SELECT %s FROM members_fts JOIN members m ON m.id = members_fts.rowid '
+            'WHERE members_fts MATCH ? AND m.user_id = ? ORDER BY members_fts.rowid DESC LIMIT ?'
+            % ', '.join('m.' + column for column in MEMBER_SEARCH_COLUMNS)),
+        'search_term_exists': 'SELECT 1 FROM members_fts WHERE members_fts MATCH ? LIMIT 1',
+        # Index terms close to a search term: same first letter, similar length
+        'search_vocabulary': ('SELECT term, doc FROM members_fts_vocab '
+                              'WHERE term >= ? AND term < ? AND length(term) BETWEEN ? AND ?'),
+    },
+}
+
+# Applied to every SQLite connection. WAL lets readers run while a write is in
+# progress; NORMAL only syncs at checkpoints, which WAL keeps crash-safe.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -64 * 1024,  # negative: KiB, i.e. 64 MiB of page cache per connection
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+
+INSERT_USER = {
+    'postgres': 'INSERT INTO users (username, password_hash) VALUES (%s, %s) ON CONFLICT (username) DO NOTHING',
+    'sqlite': 'INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)',
+}
+
+
+def encode_cursor(row):
+    payload = json.dumps([str(row['created_at']), row['id']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, member_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        # Compared against created_at in SQL, so it has to be a real timestamp
+        datetime.fromisoformat(created_at)
+        return created_at, int(member_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _numbered(sql):
+    counter = iter(range(1, 1000))
+    return re.sub(r'\?', lambda _: '$%d' % next(counter), sql)
+
+
+if psycopg2 is not None:
+    class PreparingConnection(psycopg2.extensions.connection):
+        """psycopg2 connection that remembers which statements it has PREPAREd."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.prepared = set()
+
+
+class Repository:
+    """Owns every user/member query and the dialect they are written in.
+
+    Postgres statements are PREPAREd once per connection and then run with
+    EXECUTE, SQLite relies on the connection's statement cache (the SQL text
+    of each query never changes). Every query is timed here.
+    """
+
+    def __init__(self, database_url=None, sqlite_path='members.db', statement_cache_size=128,
+                 search_rank_window=1000, sqlite_pragmas=None, sqlite_busy_timeout=5.0):
+        self.database_url = database_url
+        self.sqlite_path = sqlite_path
+        self.sqlite_pragmas = dict(SQLITE_PRAGMAS, **(sqlite_pragmas or {}))
+        self.sqlite_busy_timeout = sqlite_busy_timeout
+        self.statement_cache_size = statement_cache_size
+        self.search_rank_window = search_rank_window
+        self.dialect = 'postgres' if database_url else 'sqlite'
+        if self.dialect == 'postgres':
+            if psycopg2 is None:
+                raise RuntimeError('DATABASE_URL is set but psycopg2 is not installed')
+            self._sql = {name: _numbered(sql) for name, sql in dict(QUERIES, **SEARCH_QUERIES['postgres']).items()}
+        else:
+            self._sql = dict(QUERIES, **SEARCH_QUERIES['sqlite'])
+
+        self._stats_lock = threading.Lock()
+        self._stats = {}
+
+    # Connections
+
+    def connect(self):
+        if self.dialect == 'postgres':
+            return psycopg2.connect(self.database_url, connection_factory=PreparingConnection)
+        # timeout is SQLite's busy timeout: wait this long for a lock before "database is locked"
+        conn = sqlite3.connect(self.sqlite_path, check_same_thread=False, timeout=self.sqlite_busy_timeout,
+                               cached_statements=self.statement_cache_size)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.sqlite_pragmas.items():
+            conn.execute('PRAGMA %s = %s' % (name, value))
+        return conn
+
+    def ping(self, conn):
+        cur = conn.cursor()
+        cur.execute('SELECT 1')
+        cur.fetchone()
+        cur.close()
+        conn.rollback()
+
+    # Query execution
+
+    def _cursor(self, conn, dict_rows):
+        if dict_rows and self.dialect == 'postgres':
+            return conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        # sqlite3.Row supports both index and key access
+        return conn.cursor()
+
+    def _run(self, cur, conn, name, params):
+        if self.dialect == 'sqlite':
+            cur.execute(self._sql[name], params)
+            return
+        if name not in conn.prepared:
+            cur.execute('PREPARE %s AS %s' % (name, self._sql[name]))
+            conn.prepared.add(name)
+        try:
+            cur.execute('EXECUTE %s (%s)' % (name, ', '.join(['%s'] * len(params))) if params
+                        else 'EXECUTE %s' % name, params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # The server lost the statement (e.g. a pooler switched sessions)
+            conn.prepared.discard(name)
+            raise
+
+    def execute(self, conn, name, params=(), dict_rows=False):
+        cur = self._cursor(conn, dict_rows)
+        start = time.perf_counter()
+        try:
+            self._run(cur, conn, name, params)
+        finally:
+            self._record(name, time.perf_counter() - start)
+        return cur
+
+    def _record(self, name, elapsed):
+        with self._stats_lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                entry = self._stats[name] = {'count': 0, 'total': 0.0, 'max': 0.0}
+            entry['count'] += 1
+            entry['total'] += elapsed
+            if elapsed > entry['max']:
+                entry['max'] = elapsed
+
+    def query_stats(self):
+        with self._stats_lock:
+            return {name: {'count': entry['count'], 'total': round(entry['total'], 6),
+                           'max': round(entry['max'], 6)}
+                    for name, entry in self._stats.items()}
+
+    # Schema (tables are created by migrations.py)
+
+    def rebuild_member_stats(self, conn, commit=True):
+        """Recompute every user's counters; return the users whose counters were off."""
+        cur = conn.cursor()
+        cur.execute(MEMBER_STATS_AGGREGATE)
+        expected = {row[0]: tuple(row[1:]) for row in cur.fetchall()}
+        cur.execute('SELECT user_id, total, active, with_document FROM member_stats')
+        stored = {row[0]: tuple(row[1:]) for row in cur.fetchall()}
+        mismatched = sorted(user_id for user_id in expected.keys() | stored.keys()
+                            if expected.get(user_id, (0, 0, 0)) != stored.get(user_id, (0, 0, 0)))
+        cur.execute('DELETE FROM member_stats')
+        cur.execute('INSERT INTO member_stats (user_id, total, active, with_document) ' + MEMBER_STATS_AGGREGATE)
+        if commit:
+            conn.commit()
+        return mismatched
+
+    # Users
+
+    def create_user(self, conn, username, password_hash):
+        """Add a user unless the name is taken; the caller commits."""
+        cur = conn.cursor()
+        cur.execute(INSERT_USER[self.dialect], (username, password_hash))
+        return cur.rowcount == 1
+
+    def user_credentials(self, conn, username):
+        return self.execute(conn, 'user_credentials', (username,)).fetchone()
+
+    def update_password_hash(self, conn, user_id, old_hash, new_hash):
+        # Compare-and-set, a concurrent password change wins over the rehash
+        return self.execute(conn, 'update_password_hash', (new_hash, user_id, old_hash)).rowcount
+
+    # Members
+
+    def members_page(self, conn, user_id, page_size, after=None, before=None):
+        """Return ``(rows, next_cursor, prev_cursor)`` for one dashboard page.
+
+        ``after``/``before`` are cursors from a previous page; rows are
+        ordered newest first either way.
+        """
+        after = decode_cursor(after) if after else None
+        before = decode_cursor(before) if before and not after else None
+        if after:
+            rows = self.execute(conn, 'members_page_after', (user_id, *after, page_size + 1),
+                                dict_rows=True).fetchall()
+            has_next, has_prev = len(rows) > page_size, True
+            rows = rows[:page_size]
+        elif before:
+            rows = self.execute(conn, 'members_page_before', (user_id, *before, page_size + 1),
+                                dict_rows=True).fetchall()
+            has_next, has_prev = True, len(rows) > page_size
+            rows = rows[:page_size][::-1]
+        else:
+            rows = self.execute(conn, 'members_page_first', (user_id, page_size + 1),
+                                dict_rows=True).fetchall()
+            has_next, has_prev = len(rows) > page_size, False
+            rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1]) if rows and has_next else None
+        prev_cursor = encode_cursor(rows[0]) if rows and has_prev else None
+        return rows, next_cursor, prev_cursor
+
+    def iter_members(self, conn, user_id=None, batch_size=1000):
+        """Yield members as tuples in ``EXPORT_COLUMNS`` order, oldest first.
+
+        Rows are fetched ``batch_size`` at a time: through a named
+        (server-side) cursor on Postgres and by stepping the statement on
+        SQLite, so memory use does not grow with the table. Only the user's
+        members unless ``user_id`` is None.
+        """
+        sql = 'SELECT %s FROM members' % ', '.join(EXPORT_COLUMNS)
+        params = ()
+        if user_id is not None:
+            sql += ' WHERE user_id = ?'
+            params = (user_id,)
+        sql += ' ORDER BY id'
+        if self.dialect == 'postgres':
+            cur = conn.cursor(name='members_export_%s' % uuid.uuid4().hex[:12])
+            cur.itersize = batch_size
+        else:
+            cur = conn.cursor()
+        start = time.perf_counter()
+        try:
+            cur.execute(self._dialect_sql(sql), params)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield tuple(row)
+        finally:
+            cur.close()
+            self._record('export_members', time.perf_counter() - start)
+
+    def search_members(self, conn, user_id, query, page_size, page=1):
+        """Return ``(rows, next_page, truncated)`` of the user's members matching ``query``, best match first.
+
+        Every word must match a search column as a word prefix or, with a
+        typo or two depending on its length, as a similar word. On SQLite
+        only the newest ``search_rank_window`` matches are ranked; older ones
+        are never returned and ``truncated`` is True when there are any. Typo
+        variants there are only tried for words that match nothing as typed,
+        and only among index terms with the same first letter.
+        ``next_page`` is None on the last page.
+        """
+        words = search.terms(query)
+        if not words:
+            return [], None, False
+        offset = (max(page, 1) - 1) * page_size
+        truncated = False
+        if self.dialect == 'postgres':
+            text, ts = ' '.join(words), search.tsquery(words)
+            rows = self.execute(conn, 'search_members', (user_id, ts, text, ts, text, page_size + 1, offset),
+                                dict_rows=True).fetchall()
+        else:
+            # One row past the window tells whether older matches were left out
+            rows = self.execute(conn, 'search_members', (self._fts5_match(conn, words), user_id,
+                                                         self.search_rank_window + 1), dict_rows=True).fetchall()
+            truncated = len(rows) > self.search_rank_window
+            rows = search.rank(rows[:self.search_rank_window], words)[offset:offset + page_size + 1]
+        next_page = max(page, 1) + 1 if len(rows) > page_size else None
+        return rows[:page_size], next_page, truncated
+
+    def _fts5_match(self, conn, words):
+        # FTS5 merges the document lists of every term starting with a prefix unless
+        # the prefix index covers its length, so longer words are matched exactly when
+        # they occur as typed. Otherwise they fall back to a prefix and then to similar
+        # index terms (reading the FTS vocabulary is the slowest step). Words too short
+        # for typos are used as typed.
+        alternatives = []
+        for word in words:
+            if len(word) < search.MIN_FUZZY_LENGTH:
+                alternatives.append([(word, len(word) > 1)])
+                continue
+            # Within the prefix index a prefix lookup costs no more than an exact one
+            for prefix in ((True,) if len(word) <= FTS5_PREFIX_INDEX else (False, True)):
+                if self.execute(conn, 'search_term_exists', (search.fts5_match([[(word, prefix)]]),)).fetchone():
+                    alternatives.append([(word, prefix)])
+                    break
+            else:
+                alternatives.append([(word, True)] + [(variant, False) for variant in
+                                                      self._similar_index_terms(conn, word)])
+        return search.fts5_match(alternatives)
+
+    def _similar_index_terms(self, conn, word):
+        word = search.fold(word)
+        typos = search.max_typos(word)
+        if not typos:
+            return []
+        candidates = self.execute(conn, 'search_vocabulary', (word[0], chr(ord(word[0]) + 1),
+                                                              len(word) - typos, len(word) + typos)).fetchall()
+        return search.similar_terms(word, [(row[0], row[1]) for row in candidates])
+
+    def member_stats(self, conn, user_id):
+        row = self.execute(conn, 'member_stats', (user_id,)).fetchone()
+        total, active, with_document = row if row else (0, 0, 0)
+        return {'total': total, 'active': active, 'with_document': with_document}
+
+    def _adjust_member_stats(self, conn, user_id, sign, status, consent_filename):
+        self.execute(conn, 'adjust_member_stats', (user_id, sign, sign if status == 'active' else 0,
+                                                   sign if consent_filename else 0))
+
+    def member_by_id(self, conn, member_id, user_id):
+        return self.execute(conn, 'member_by_id', (member_id, user_id), dict_rows=True).fetchone()
+
+    def member_document(self, conn, member_id, user_id):
+        return self.execute(conn, 'member_document', (member_id, user_id)).fetchone()
+
+    def insert_member(self, conn, user_id, form_data, consent_filename=None, consent_original_name=None):
+        values = [form_data.get(column, MEMBER_DEFAULTS.get(column)) for column in MEMBER_COLUMNS]
+        self.execute(conn, 'insert_member', (user_id, *values, consent_filename, consent_original_name))
+        # New members start out 'pending'
+        self._adjust_member_stats(conn, user_id, 1, 'pending', consent_filename)
+
+    def bulk_insert_members(self, conn, user_id, members, batch_size=5000):
+        """Insert validated member dicts in the caller's transaction; return how many.
+
+        Postgres loads each batch with ``COPY ... FROM STDIN``, SQLite runs
+        the usual insert with ``executemany``. ``members`` may be a
+        generator, only one batch is held in memory.
+        """
+        members = iter(members)
+        cur = conn.cursor()
+        total = 0
+        start = time.perf_counter()
+        try:
+            while True:
+                rows = [(user_id, *[member.get(column, MEMBER_DEFAULTS.get(column)) for column in MEMBER_COLUMNS],
+                         None, None) for member in islice(members, batch_size)]
+                if not rows:
+                    break
+                if self.dialect == 'postgres':
+                    # Unquoted empty CSV fields are NULL
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerows(rows)
+                    buffer.seek(0)
+                    cur.copy_expert('COPY members (user_id, %s, consent_document_filename, '
+                                    'consent_document_original_name) FROM STDIN WITH (FORMAT csv)'
+                                    % ', '.join(MEMBER_COLUMNS), buffer)
+                else:
+                    cur.executemany(self._sql['insert_member'], rows)
+                total += len(rows)
+        finally:
+            self._record('bulk_insert_members', time.perf_counter() - start)
+        if total:
+            self._adjust_member_stats(conn, user_id, total, 'pending', None)
+        return total
+
+    # Membership drafts
+
+    def draft(self, conn, user_id):
+        """Return the user's draft as a dict (None values left out) plus its ``step``, or None."""
+        row = self.execute(conn, 'draft_by_user', (user_id,)).fetchone()
+        if row is None:
+            return None
+        draft = {column: value for column, value in zip(DRAFT_COLUMNS, row) if value is not None}
+        return draft, row[-1]
+
+    def draft_summary(self, conn, user_id):
+        return self.execute(conn, 'draft_summary', (user_id,), dict_rows=True).fetchone()
+
+    def start_draft(self, conn, user_id, membership_type):
+        self.execute(conn, 'delete_draft', (user_id,))
+        self.save_draft_step(conn, user_id, 1, {'membership_type': membership_type}, next_step=1)
+
+    def save_draft_step(self, conn, user_id, step, values, next_step):
+        """Upsert the columns of wizard ``step`` (1-3); the draft resumes at the furthest ``next_step``."""
+        columns = DRAFT_STEP_COLUMNS[step]
+        self.execute(conn, 'save_draft_step%d' % step,
+                     (user_id, *[values.get(column) for column in columns], next_step, time.time()))
+
+    def promote_draft(self, conn, user_id, values, consent_filename=None, consent_original_name=None):
+        """Turn the draft into a member in one INSERT ... SELECT; False if there is no draft.
+
+        ``values`` holds the step 4 columns, which are never stored in the draft.
+        """
+        defaults = [MEMBER_DEFAULTS[column] for column in DRAFT_COLUMNS if column in MEMBER_DEFAULTS]
+        final = [values.get(column, MEMBER_DEFAULTS.get(column)) for column in DRAFT_STEP_COLUMNS[4]]
+        if not self.execute(conn, 'promote_draft', (*defaults, *final, consent_filename,
+                                                    consent_original_name, user_id)).rowcount:
+            return False
+        self.execute(conn, 'delete_draft', (user_id,))
+        self._adjust_member_stats(conn, user_id, 1, 'pending', consent_filename)
+        return True
+
+    def purge_drafts(self, conn, older_than, batch_size=500):
+        """Delete up to ``batch_size`` drafts untouched since ``older_than`` (epoch seconds); return how many."""
+        return self.execute(conn, 'purge_drafts', (older_than, batch_size)).rowcount
+
+    # Consent document blobs
+
+    def acquire_blob(self, conn, filename, sha256, size):
+        """Add a reference to a stored document.
+
+        Call this before the file is moved into place: the row lock it takes
+        keeps a concurrent release from removing the file in between.
+        """
+        self.execute(conn, 'acquire_blob', (filename, sha256, size))
+
+    def release_blob(self, conn, filename):
+        """Drop a reference; return True once nothing references the file any more."""
+        if not self.execute(conn, 'release_blob', (filename,)).rowcount:
+            if self.execute(conn, 'blob_refcount', (filename,)).fetchone() is None:
+                # Uploads from before content addressing have unique names and no row
+                return True
+        return bool(self.execute(conn, 'drop_unreferenced_blob', (filename,)).rowcount)
+
+    def blob_report(self, conn):
+        """Return ``(references, rows)``: member references and blob rows per filename."""
+        cur = conn.cursor()
+        cur.execute('SELECT consent_document_filename, COUNT(*) FROM members '
+                    "WHERE consent_document_filename IS NOT NULL AND consent_document_filename <> '' "
+                    'GROUP BY consent_document_filename')
+        references = {row[0]: row[1] for row in cur.fetchall()}
+        cur.execute('SELECT filename, sha256, size, refcount FROM consent_blobs')
+        rows = {row[0]: (row[1], row[2], row[3]) for row in cur.fetchall()}
+        return references, rows
+
+    def set_blob_refcount(self, conn, filename, refcount, sha256=None, size=None):
+        cur = conn.cursor()
+        if refcount:
+            cur.execute(self._dialect_sql('INSERT INTO consent_blobs (filename, sha256, size, refcount) '
+                                          'VALUES (?, ?, ?, ?) ON CONFLICT (filename) DO UPDATE SET '
+                                          'refcount = excluded.refcount, '
+                                          'sha256 = COALESCE(consent_blobs.sha256, excluded.sha256), '
+                                          'size = COALESCE(consent_blobs.size, excluded.size)'),
+                        (filename, sha256, size, refcount))
+        else:
+            cur.execute(self._dialect_sql('DELETE FROM consent_blobs WHERE filename = ?'), (filename,))
+
+    # Server-side sessions
+
+    def load_session(self, conn, sid, now):
+        return self.execute(conn, 'load_session', (sid, now)).fetchone()
+
+    def save_session(self, conn, sid, data, expires_at):
+        self.execute(conn, 'save_session', (sid, data, expires_at))
+
+    def delete_session(self, conn, sid):
+        self.execute(conn, 'delete_session', (sid,))
+
+    def purge_sessions(self, conn, now):
+        return self.execute(conn, 'purge_sessions', (now,)).rowcount
+
+    # Storage cleanup queue
+
+    def enqueue_cleanup(self, conn, filename, reason, delay=0.0):
+        """Queue a stored document for deletion, in the caller's transaction."""
+        self.execute(conn, 'enqueue_cleanup', (filename, reason, time.time() + delay))
+
+    def due_cleanup(self, conn, max_attempts, limit):
+        return self.execute(conn, 'due_cleanup', (time.time(), max_attempts, limit)).fetchall()
+
+    def claim_cleanup(self, conn, item_id, not_before, lease):
+        """Take an item for ``lease`` seconds; False if another worker got it first."""
+        return bool(self.execute(conn, 'claim_cleanup', (time.time() + lease, item_id, not_before)).rowcount)
+
+    def lock_blob(self, conn, filename):
+        """Lock the blob row (creating an empty one) and return its reference count.
+
+        Holding this lock while deleting the file keeps a concurrent upload of
+        the same content from finding the file and then losing it.
+        """
+        self.execute(conn, 'lock_blob', (filename,))
+        return self.execute(conn, 'blob_refcount', (filename,)).fetchone()[0]
+
+    def queued_cleanup(self, conn):
+        return {row[0] for row in self.execute(conn, 'queued_cleanup').fetchall()}
+
+    def finish_cleanup(self, conn, item_id, filename):
+        self.execute(conn, 'drop_unreferenced_blob', (filename,))
+        self.execute(conn, 'finish_cleanup', (item_id,))
+
+    def fail_cleanup(self, conn, item_id, retry_in, error):
+        self.execute(conn, 'fail_cleanup', (time.time() + retry_in, error[:1000], item_id))
+
+    def cleanup_backlog(self, conn, max_attempts):
+        """Return ``(pending, dead)``: items still to try and items that gave up."""
+        return tuple(self.execute(conn, 'cleanup_backlog', (max_attempts, max_attempts)).fetchone())
+
+    def _dialect_sql(self, sql):
+        # Ad-hoc (maintenance) statements that are not worth preparing
+        return sql.replace('?', '%s') if self.dialect == 'postgres' else sql
+
+    def delete_member(self, conn, member_id, user_id):
+        """Delete a member; return its ``(consent_document_filename, status)`` or None."""
+        row = self.execute(conn, 'member_delete_info', (member_id, user_id)).fetchone()
+        if not row:
+            return None
+        consent_filename, status = row
+        if not self.execute(conn, 'delete_member', (member_id, user_id)).rowcount:
+            # A concurrent delete won; its caller releases the document
+            return None
+        self._adjust_member_stats(conn, user_id, -1, status, consent_filename)
+        return row
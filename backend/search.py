@@ -0,0 +1,101 @@
+import re
+import unicodedata
+
+# Member columns covered by the search index, most important first
+SEARCH_COLUMNS = ('company_name', 'first_name', 'last_name', 'email', 'company_city', 'business_activity')
+
+# How much a match in each column counts when ranking results
+COLUMN_WEIGHTS = {'company_name': 4, 'first_name': 2, 'last_name': 2, 'email': 2,
+                  'company_city': 1, 'business_activity': 1}
+
+MAX_TERMS = 8
+MIN_FUZZY_LENGTH = 4  # shorter terms only match exactly or as a prefix
+MAX_VARIANTS = 8  # similar index terms tried per search term
+
+EXACT, PREFIX, SIMILAR = 3, 2, 1  # match quality, best first
+
+
+def terms(query):
+    """Split a search string into lower-case word terms; punctuation never reaches the SQL."""
+    return re.findall(r'[^\W_]+', (query or '').lower())[:MAX_TERMS]
+
+
+def fold(term):
+    """Strip diacritics like FTS5's ``remove_diacritics`` tokenizer option does."""
+    return ''.join(char for char in unicodedata.normalize('NFKD', term) if not unicodedata.combining(char))
+
+
+def max_typos(term):
+    if len(term) < MIN_FUZZY_LENGTH:
+        return 0
+    return 1 if len(term) < 8 else 2
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance of ``a`` and ``b``, or ``limit + 1`` once it exceeds ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def similar_terms(term, candidates):
+    """Pick the closest ``(term, documents)`` candidates within the typo budget of ``term``.
+
+    Closer terms win, then terms that occur in more documents.
+    """
+    limit = max_typos(term)
+    scored = []
+    for candidate, documents in candidates:
+        if candidate.startswith(term):
+            continue  # already covered by the prefix match
+        distance = edit_distance(term, candidate, limit)
+        if distance <= limit:
+            scored.append((distance, -documents, candidate))
+    return [candidate for _, _, candidate in sorted(scored)[:MAX_VARIANTS]]
+
+
+def tsquery(words):
+    """Postgres ``to_tsquery`` text: every word, each also as a prefix."""
+    return ' & '.join('%s:*' % word for word in words)
+
+
+def fts5_match(alternatives):
+    """SQLite FTS5 MATCH expression; one list of ``(term, prefix)`` alternatives per word."""
+    return ' AND '.join('(%s)' % ' OR '.join('"%s"%s' % (term, '*' if prefix else '') for term, prefix in group)
+                        for group in alternatives)
+
+
+def rank(rows, words):
+    """Order rows best match first: exact words before prefixes before typos, weighted by column.
+
+    ``sorted`` is stable, so rows with equal scores keep their order.
+    """
+    patterns = [(re.compile(r'(?<![^\W_])%s(?![^\W_])' % re.escape(fold(word))),
+                 re.compile(r'(?<![^\W_])%s' % re.escape(fold(word)))) for word in words]
+    weights = [(column, COLUMN_WEIGHTS[column]) for column in SEARCH_COLUMNS]
+
+    def score(row):
+        texts = []
+        for column, weight in weights:
+            text = (row[column] or '').lower()
+            texts.append((weight, text if text.isascii() else fold(text)))
+        total = 0
+        for exact, prefix in patterns:
+            best = SIMILAR
+            for weight, text in texts:
+                if exact.search(text):
+                    best = max(best, EXACT * weight)
+                elif prefix.search(text):
+                    best = max(best, PREFIX * weight)
+            total += best
+        return total
+
+    return sorted(rows, key=score, reverse=True)
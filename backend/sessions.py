@@ -0,0 +1,205 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+serializer = TaggedJSONSerializer()
+
+
+def _hit_rate(hits, misses):
+    return round(hits / (hits + misses), 4) if hits + misses else None
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session data kept on the server; the cookie only carries ``sid``."""
+
+    def __init__(self, initial=None, sid=None, new=False, expires=None):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.loaded_sid = sid
+        self.new = new
+        self.expires = expires
+        self.modified = False
+
+    def regenerate(self):
+        # New id after login so a planted session id is worthless
+        self.sid = None
+        self.modified = True
+
+
+class MemorySessionStore:
+    """Per-process sessions with TTL and LRU eviction (single-process deployments)."""
+
+    backend = 'memory'
+
+    def __init__(self, max_entries=10000, sweep_interval=60.0):
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._entries = OrderedDict()  # sid -> (expires_at, serialized data)
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, sid):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None or entry[0] <= now:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(sid)
+            self.hits += 1
+        return serializer.loads(entry[1]), entry[0]
+
+    def save(self, sid, data, expires_at):
+        payload = serializer.dumps(data)
+        with self._lock:
+            self._remove(sid)
+            self._entries[sid] = (expires_at, payload)
+            self._bytes += len(payload)
+            if time.monotonic() >= self._next_sweep:
+                self._sweep()
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, sid):
+        with self._lock:
+            self._remove(sid)
+
+    def _remove(self, sid):
+        entry = self._entries.pop(sid, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def _sweep(self):
+        now = time.time()
+        for sid in [sid for sid, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            self._remove(sid)
+        self._next_sweep = time.monotonic() + self.sweep_interval
+
+    def stats(self):
+        with self._lock:
+            return {'backend': self.backend, 'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': _hit_rate(self.hits, self.misses),
+                    'size': len(self._entries), 'bytes': self._bytes}
+
+
+class DatabaseSessionStore:
+    """Sessions in the ``sessions`` table, shared by all workers (SQLite or PostgreSQL).
+
+    ``get_connection`` returns the request's connection for reads; writes go
+    through ``run_write(fn)`` when given (e.g. SQLite's writer thread), which
+    runs ``fn(conn)`` in a committed transaction. Expired rows are purged at
+    most once per ``sweep_interval``.
+    """
+
+    backend = 'database'
+
+    def __init__(self, repository, get_connection, sweep_interval=300.0, run_write=None):
+        self.repository = repository
+        self.get_connection = get_connection
+        self.run_write = run_write or self._run_write
+        self.sweep_interval = sweep_interval
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, sid):
+        row = self.repository.load_session(self.get_connection(), sid, time.time())
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return serializer.loads(row[0]), row[1]
+
+    def _run_write(self, fn):
+        conn = self.get_connection()
+        result = fn(conn)
+        conn.commit()
+        return result
+
+    def save(self, sid, data, expires_at):
+        payload = serializer.dumps(data)
+        sweep = time.monotonic() >= self._next_sweep
+        if sweep:
+            self._next_sweep = time.monotonic() + self.sweep_interval
+
+        def write(conn):
+            self.repository.save_session(conn, sid, payload, expires_at)
+            if sweep:
+                self.repository.purge_sessions(conn, time.time())
+        self.run_write(write)
+
+    def delete(self, sid):
+        self.run_write(lambda conn: self.repository.delete_session(conn, sid))
+
+    def stats(self):
+        # No row count: /health is polled often and must not scan the table
+        return {'backend': self.backend, 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': _hit_rate(self.hits, self.misses)}
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface that stores session data in ``store``.
+
+    The cookie holds a random session id, so it is not signed and never
+    grows with the data. The store is only written when the session was
+    modified, or when less than half of ``ttl`` is left (sliding expiry).
+    """
+
+    def __init__(self, store, ttl=12 * 3600):
+        self.store = store
+        self.ttl = ttl
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            loaded = self.store.load(sid)
+            if loaded is not None:
+                data, expires = loaded
+                return ServerSideSession(data, sid=sid, expires=expires)
+        return ServerSideSession(new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.loaded_sid is not None and session.modified:
+                self.store.delete(session.loaded_sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        now = time.time()
+        refresh = session.expires is not None and session.expires - now < self.ttl / 2
+        if not (session.modified or refresh or session.sid is None):
+            return
+
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(32)
+        self.store.save(session.sid, dict(session), now + self.ttl)
+        if session.loaded_sid is not None and session.loaded_sid != session.sid:
+            self.store.delete(session.loaded_sid)
+        if session.sid != session.loaded_sid or (session.permanent and app.config['SESSION_REFRESH_EACH_REQUEST']):
+            response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                                httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                                secure=self.get_cookie_secure(app),
+                                samesite=self.get_cookie_samesite(app))
+
+    def stats(self):
+        return self.store.stats()
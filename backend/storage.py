@@ -0,0 +1,143 @@
+import hashlib
+import os
+
+try:
+    import boto3
+except ImportError:  # only needed for S3Storage
+    boto3 = None
+
+CHUNK_SIZE = 64 * 1024
+
+
+class LocalStorage:
+    """Documents as files in one local directory (a single instance, or a shared volume).
+
+    Keys are plain file names. ``path()`` exposes the file so downloads can
+    use ``sendfile()`` or hand the path to a front proxy.
+    """
+
+    local = True
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def put_upload(self, key, upload):
+        """Store a completed ``StreamingUpload`` under ``key`` (kept if already present)."""
+        upload.commit(self.path(key), keep_existing=True)
+
+    def open(self, key, start=0, length=None):
+        f = open(self.path(key), 'rb')
+        f.seek(start)
+        return f
+
+    def stat(self, key):
+        """Return ``(size, mtime)`` or None if there is no such document."""
+        try:
+            st = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self):
+        """Yield ``(key, size, mtime)`` for every stored document."""
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                # Skip in-flight uploads (.upload-*.part) and anything that is not a file
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                st = entry.stat()
+                yield entry.name, st.st_size, st.st_mtime
+
+    def url(self, key, download_name, expires=300):
+        # Local files have no URL of their own; the app serves them
+        return None
+
+    def hash(self, key):
+        digest = hashlib.sha256()
+        with self.open(key) as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+class S3Storage:
+    """Documents as objects in an S3 bucket (AWS, MinIO or any S3-compatible store).
+
+    Uploads are staged on local disk while the request is parsed and then
+    sent with a (multipart) streaming upload; reads stream the object body
+    and pass byte ranges through. ``url()`` returns presigned GET URLs so
+    clients can fetch documents straight from the store.
+    """
+
+    local = False
+
+    def __init__(self, bucket, prefix='', client=None, endpoint_url=None, region=None):
+        if client is None:
+            if boto3 is None:
+                raise RuntimeError('S3Storage requires boto3 (pip install boto3)')
+            client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def put_upload(self, key, upload):
+        if not upload.is_valid:
+            raise ValueError('upload was rejected or is incomplete')
+        # Content-addressed keys: an existing object already holds these bytes
+        if self.stat(key) is None:
+            upload.seek(0)
+            self.client.upload_fileobj(upload, self.bucket, self._key(key))
+
+    def open(self, key, start=0, length=None):
+        params = {'Bucket': self.bucket, 'Key': self._key(key)}
+        if start or length is not None:
+            end = '' if length is None else start + length - 1
+            params['Range'] = 'bytes=%d-%s' % (start, end)
+        return self.client.get_object(**params)['Body']
+
+    def stat(self, key):
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except self.client.exceptions.ClientError as exc:
+            if exc.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return head['ContentLength'], head['LastModified'].timestamp()
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def list(self):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get('Contents', []):
+                yield obj['Key'][len(self.prefix):], obj['Size'], obj['LastModified'].timestamp()
+
+    def url(self, key, download_name, expires=300):
+        return self.client.generate_presigned_url(
+            'get_object', ExpiresIn=expires,
+            Params={'Bucket': self.bucket, 'Key': self._key(key),
+                    'ResponseContentDisposition': 'attachment; filename="%s"' % download_name})
+
+    def hash(self, key):
+        digest = hashlib.sha256()
+        body = self.open(key)
+        try:
+            for chunk in body.iter_chunks(CHUNK_SIZE):
+                digest.update(chunk)
+        finally:
+            body.close()
+        return digest.hexdigest()
@@ -0,0 +1,143 @@
+import hashlib
+import io
+import os
+import uuid
+
+from flask import Request, current_app
+from werkzeug.formparser import default_stream_factory
+
+PDF_MAGIC = b'%PDF-'
+
+
+class StreamingUpload(io.RawIOBase):
+    """Destination for one uploaded file, written chunk by chunk as it is parsed.
+
+    Chunks go straight to a temporary file next to the final location and
+    are hashed in the same pass. The first bytes are checked against
+    ``magic``; on a mismatch the temporary file is dropped and the rest of
+    the upload is discarded. ``commit()`` renames the file into place
+    atomically; an uncommitted upload is removed when the request closes.
+    """
+
+    def __init__(self, directory, magic=PDF_MAGIC):
+        super().__init__()
+        self.magic = magic
+        self.size = 0
+        self.rejected = False
+        self.committed_path = None
+        self._hash = hashlib.sha256()
+        self._head = b''
+        self._tmp_path = os.path.join(directory, '.upload-%s.part' % uuid.uuid4().hex)
+        self._file = open(self._tmp_path, 'w+b', buffering=0)
+
+    @property
+    def is_valid(self):
+        return not self.rejected and len(self._head) >= len(self.magic)
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    def writable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def write(self, data):
+        # Counted before the magic check so rejected uploads show their size too
+        self.size += len(data)
+        if self.rejected:
+            return len(data)
+        if len(self._head) < len(self.magic):
+            self._head += bytes(data[:len(self.magic) - len(self._head)])
+            if not self.magic.startswith(self._head):
+                self._discard()
+                return len(data)
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def readinto(self, buffer):
+        return 0 if self._file.closed else self._file.readinto(buffer)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return 0 if self._file.closed else self._file.seek(offset, whence)
+
+    def tell(self):
+        return 0 if self._file.closed else self._file.tell()
+
+    def commit(self, path, keep_existing=False):
+        """Move the complete upload to ``path`` (same filesystem).
+
+        With ``keep_existing`` an existing file at ``path`` is assumed to hold
+        the same content (content-addressed names) and the upload is dropped.
+        """
+        if not self.is_valid:
+            raise ValueError('upload was rejected or is incomplete')
+        if keep_existing and os.path.exists(path):
+            self._file.close()
+            os.remove(self._tmp_path)
+        else:
+            os.fsync(self._file.fileno())
+            self._file.close()
+            os.replace(self._tmp_path, path)
+        self.committed_path = path
+        return path
+
+    def _discard(self):
+        self.rejected = True
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self.committed_path is None and not self.rejected:
+            self._discard()
+        super().close()
+
+
+class _Discard(io.RawIOBase):
+    # Sink for uploads we would never store; only their size is kept
+    size = 0
+
+    def writable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def write(self, data):
+        self.size += len(data)
+        return len(data)
+
+    def readinto(self, buffer):
+        return 0
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return 0
+
+
+class StreamingRequest(Request):
+    """Request class that streams allowed file uploads into UPLOAD_FOLDER.
+
+    Files with an extension outside ``allowed_extensions`` are not stored at
+    all; non-file requests behave exactly as before.
+    """
+
+    allowed_extensions = {'pdf'}
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not filename:
+            return default_stream_factory(total_content_length=total_content_length,
+                                          content_type=content_type, filename=filename,
+                                          content_length=content_length)
+        extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+        if extension not in self.allowed_extensions:
+            return _Discard()
+        return StreamingUpload(current_app.config['UPLOAD_FOLDER'])
@@ -0,0 +1,251 @@
+"""Load test for the main user flows, driving the real app.
+
+Run with ``python benchmarks/bench_flows.py [--iterations N] [--members N] [--server]``.
+By default requests go through Flask's in-process test client; ``--server``
+starts a threaded WSGI server on a local port and sends real HTTP requests.
+Captchas are verified against a local ``StubSiteverifyServer``.
+
+Flows:
+
+* ``login``: ``POST /submit`` with a fresh captcha solution, in a new session
+* ``dashboard``: ``GET /dashboard`` for a user with ``--members`` members
+* ``wizard``: ``/membership/new`` and all four form steps, including a PDF upload
+* ``download``: ``GET /download/<id>/consent``
+
+For each flow p50/p95/p99 latency of one pass and requests per second are
+printed. ``--save-baseline`` writes the results to ``--baseline`` (default
+``benchmarks/flows_baseline.json``); later runs compare against that file
+and exit with code 1 if a p95 got slower by more than ``--tolerance``.
+Password hashing dominates the login flow; lower the ``PASSWORD_*`` cost
+settings in the environment to measure the rest.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from captcha import StubSiteverifyServer  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'flows_baseline.json')
+
+PDF = b'%PDF-1.4\n' + b'0' * 200 * 1024 + b'\n%%EOF\n'
+
+STEPS = {
+    1: {'country': 'Germany', 'company_name': 'Example GmbH', 'membership_type': 'packaging-paper'},
+    2: {'business_activity': 'paper_production', 'sub_activity': 'corrugated', 'has_online_store': 'yes',
+        'online_store_products': 'both'},
+    3: {'company_street': 'Hauptstraße 1', 'company_postal_code': '10115', 'company_city': 'Berlin',
+        'company_country': 'Germany', 'company_phone': '+49 30 123456', 'company_website': 'example.com',
+        'contact_salutation': 'Ms', 'first_name': 'Erika', 'last_name': 'Mustermann',
+        'email': 'erika@example.com', 'phone': '+49 30 654321'},
+    4: {'data_processing_consent': 'on', 'terms_consent': 'on'},
+}
+
+
+class TestClientDriver:
+    """Requests through Flask's test client (no sockets, no WSGI server)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def session(self):
+        return self.app.test_client()
+
+    def get(self, client, path):
+        return client.get(path).status_code
+
+    def post(self, client, path, data, files=None):
+        data = dict(data)
+        for field, (filename, content) in (files or {}).items():
+            data[field] = (io.BytesIO(content), filename)
+        return client.post(path, data=data).status_code
+
+
+class HTTPDriver:
+    """Real HTTP requests against a threaded WSGI server on localhost."""
+
+    def __init__(self, app):
+        import requests
+        from werkzeug.serving import make_server
+        self._requests = requests
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)  # no access log line per request
+        self._server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.base_url = 'http://127.0.0.1:%d' % self._server.server_port
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def session(self):
+        return self._requests.Session()
+
+    def get(self, client, path):
+        return client.get(self.base_url + path, allow_redirects=False).status_code
+
+    def post(self, client, path, data, files=None):
+        return client.post(self.base_url + path, data=data, files=files, allow_redirects=False).status_code
+
+    def close(self):
+        self._server.shutdown()
+
+
+def expect(status, *allowed):
+    if status not in allowed:
+        raise AssertionError('unexpected HTTP %d (expected %s)' % (status, allowed))
+
+
+class Flows:
+    def __init__(self, driver):
+        self.driver = driver
+        self.solutions = 0
+        self.member_id = None
+
+    def login(self, client=None):
+        client = client or self.driver.session()
+        self.solutions += 1
+        expect(self.driver.post(client, '/submit', {
+            'username': 'admin', 'password': 'admin123',
+            'frc-captcha-solution': 'bench-solution-%d' % self.solutions}), 302)
+        return client
+
+    def dashboard(self, client):
+        expect(self.driver.get(client, '/dashboard'), 200)
+
+    def wizard(self, client):
+        expect(self.driver.get(client, '/membership/new?type=packaging-paper'), 302)
+        for step in (1, 2, 3):
+            expect(self.driver.get(client, '/membership/form/%d' % step), 200)
+            expect(self.driver.post(client, '/membership/form/%d' % step, STEPS[step]), 302)
+        expect(self.driver.get(client, '/membership/form/4'), 200)
+        expect(self.driver.post(client, '/membership/form/4', STEPS[4],
+                                files={'consent_document': ('consent.pdf', PDF)}), 302)
+
+    def download(self, client):
+        expect(self.driver.get(client, '/download/%d/consent' % self.member_id), 200)
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run(label, fn, iterations, requests_per_pass):
+    fn()  # warm up caches, prepared statements and pooled connections
+    durations = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        pass_start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - pass_start)
+    elapsed = time.perf_counter() - start
+    durations.sort()
+    result = {'p50_ms': percentile(durations, 0.50) * 1e3, 'p95_ms': percentile(durations, 0.95) * 1e3,
+              'p99_ms': percentile(durations, 0.99) * 1e3,
+              'requests_per_second': iterations * requests_per_pass / elapsed}
+    print('%-10s %9.2f %9.2f %9.2f %10.1f' % (label, result['p50_ms'], result['p95_ms'],
+                                             result['p99_ms'], result['requests_per_second']))
+    return result
+
+
+def seed_members(membership_app, count):
+    with membership_app.app.app_context():
+        conn = membership_app.get_db_connection()
+        user_id = membership_app.repository.user_credentials(conn, 'admin')[0]
+        for i in range(count):
+            membership_app.repository.insert_member(conn, user_id, dict(STEPS[1], **STEPS[3],
+                                                                        company_name='Member %d' % i))
+        conn.commit()
+
+
+def latest_document_member(membership_app):
+    with membership_app.app.app_context():
+        cur = membership_app.get_db_connection().cursor()
+        cur.execute('SELECT MAX(id) FROM members WHERE consent_document_filename IS NOT NULL')
+        return cur.fetchone()[0]
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for flow, result in results.items():
+        before = baseline.get(flow)
+        if not before:
+            continue
+        change = result['p95_ms'] / before['p95_ms'] - 1
+        print('%-10s p95 %9.2f ms -> %9.2f ms  (%+.0f%%)' % (flow, before['p95_ms'], result['p95_ms'], change * 100))
+        if change > tolerance:
+            regressions.append(flow)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--iterations', type=int, default=200, help='passes per flow')
+    parser.add_argument('--members', type=int, default=200, help='members listed on the dashboard')
+    parser.add_argument('--server', action='store_true', help='send real HTTP requests to a WSGI server')
+    parser.add_argument('--flows', default='login,dashboard,wizard,download', help='comma-separated flows to run')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline file to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='write this run to --baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p95 slowdown (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    stub = StubSiteverifyServer().start()
+    # app.py reads its settings on import and creates uploads/ and members.db in the working directory
+    os.environ.update({
+        'FRIENDLY_CAPTCHA_SECRET': 'bench-secret',
+        'FRIENDLY_CAPTCHA_SITEVERIFY_URL': stub.url,
+        'LOGIN_LIMIT_IP_ATTEMPTS': str(10 ** 9),
+        'LOGIN_LIMIT_USER_ATTEMPTS': str(10 ** 9),
+        'CLEANUP_WORKER': '0',
+    })
+    os.chdir(tempfile.mkdtemp())
+    import app as membership_app
+
+    with membership_app.app.app_context():
+        membership_app.init_db()
+    seed_members(membership_app, args.members)
+
+    driver = HTTPDriver(membership_app.app) if args.server else TestClientDriver(membership_app.app)
+    flows = Flows(driver)
+    client = flows.login()
+    flows.wizard(client)
+    flows.member_id = latest_document_member(membership_app)
+
+    available = {
+        'login': (lambda: flows.login(), 1),
+        'dashboard': (lambda: flows.dashboard(client), 1),
+        'wizard': (lambda: flows.wizard(client), 9),
+        'download': (lambda: flows.download(client), 1),
+    }
+    print('%d passes per flow, %d members, %s' % (args.iterations, args.members,
+                                                  'HTTP server' if args.server else 'test client'))
+    print('%-10s %9s %9s %9s %10s' % ('flow', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s'))
+    results = {}
+    for name in args.flows.split(','):
+        fn, requests_per_pass = available[name]
+        results[name] = run(name, fn, args.iterations, requests_per_pass)
+
+    if args.server:
+        driver.close()
+    stub.stop()
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print('baseline written to %s' % args.baseline)
+        return 0
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+        print('p95 regressed by more than %.0f%%: %s' % (args.tolerance * 100, ', '.join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""Micro-benchmark for the per-request metrics instrumentation.
+
+Run with ``python benchmarks/bench_metrics.py``. Measures what the
+before/after request hooks add to every request (two clock reads, one
+histogram observation, one counter increment) and fails (exit code 1) if
+that exceeds the 5 µs per request budget.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from metrics import MetricsRegistry  # noqa: E402
+
+BUDGET_US = 5.0
+
+ROUTES = ['/', '/submit', '/dashboard', '/membership/form/<int:step>', '/download/<int:member_id>/consent']
+
+
+def bench(label, routes, iterations=200000):
+    registry = MetricsRegistry(prefix='bench_')
+    duration = registry.histogram('http_request_duration_seconds', 'Request time.', ('method', 'route'))
+    total = registry.counter('http_requests_total', 'Requests.', ('method', 'route', 'status'))
+    count = len(routes)
+    start = time.perf_counter()
+    for i in range(iterations):
+        route = routes[i % count]
+        started = time.perf_counter()
+        duration.observe(time.perf_counter() - started, 'GET', route)
+        total.inc('GET', route, '200')
+    per_request = (time.perf_counter() - start) / iterations * 1e6
+
+    render_start = time.perf_counter()
+    body = registry.render()
+    render_ms = (time.perf_counter() - render_start) * 1e3
+    print('%-20s %6.2f µs/request  (scrape %.2f ms, %d lines)'
+          % (label, per_request, render_ms, body.count('\n')))
+    return per_request
+
+
+def main():
+    results = [
+        bench('single route', ROUTES[:1]),
+        bench('%d routes' % len(ROUTES), ROUTES),
+    ]
+    worst = max(results)
+    print('worst case %.2f µs/request, budget %.0f µs' % (worst, BUDGET_US))
+    return 0 if worst < BUDGET_US else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Member search latency on a large SQLite database.
+
+Run with ``python benchmarks/bench_search.py [rows]`` (default 1,000,000).
+Seeds one user with ``rows`` generated members, then times
+``Repository.search_members`` for exact, prefix, multi-word and misspelled
+queries. Fails (exit code 1) if the slowest median exceeds 100 ms or a
+query that should match finds nothing.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import migrations  # noqa: E402
+from repository import MEMBER_COLUMNS, QUERIES, Repository  # noqa: E402
+
+BUDGET_MS = 100.0
+SYLLABLES = ['ka', 'ber', 'lin', 'mu', 'ster', 'pa', 'pier', 'werk', 'nord', 'sud', 'ham', 'burg', 'lo',
+             'gis', 'tik', 'ver', 'pack', 'ung', 'frie', 'del', 'mann', 'son', 'stein', 'feld', 'au', 'ri']
+SUFFIXES = ['GmbH', 'AG', 'KG', 'e.K.', 'GmbH & Co. KG', 'SE']
+ACTIVITIES = ['paper_production', 'packaging', 'food_service', 'retail', 'logistics', 'recycling']
+
+
+def word(rng, syllables=3):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, syllables))).capitalize()
+
+
+def seed(repository, conn, rows, batch=10000):
+    rng = random.Random(42)
+    sql = QUERIES['insert_member']
+    for start in range(0, rows, batch):
+        values = []
+        for _ in range(min(batch, rows - start)):
+            first, last = word(rng, 2), word(rng)
+            member = {'membership_type': 'packaging-paper', 'company_name': '%s %s' % (word(rng), rng.choice(SUFFIXES)),
+                      'first_name': first, 'last_name': last, 'email': '%s.%s@example.com' % (first, last),
+                      'company_city': word(rng), 'business_activity': rng.choice(ACTIVITIES)}
+            values.append((1, *[member.get(column) for column in MEMBER_COLUMNS], None, None))
+        conn.executemany(sql, values)
+        conn.commit()
+
+
+def timed(repository, conn, query, iterations=20):
+    repository.search_members(conn, 1, query, 24)  # warm up the page cache
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        rows, _, _ = repository.search_members(conn, 1, query, 24)
+        durations.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(durations), len(rows)
+
+
+def main(rows=1000000):
+    os.chdir(tempfile.mkdtemp())
+    repository = Repository()
+    conn = repository.connect()
+    migrations.migrate(repository, conn)
+    start = time.perf_counter()
+    seed(repository, conn, rows)
+    print('seeded %d members in %.1f s' % (rows, time.perf_counter() - start))
+
+    rng = random.Random(42)
+    sample = word(rng).lower()
+    queries = {
+        'exact word': sample,
+        'prefix': sample[:3],
+        'two words': '%s gmbh' % sample,
+        'typo': sample[:2] + sample[3:] if len(sample) > 4 else sample + 'x',
+        'short typo': 'gmbx',  # one typo in a four-letter word
+        'email': 'example.com',
+        'no match': 'zzzzzz',
+    }
+    print('%-12s %-22s %10s %6s' % ('query', 'text', 'median ms', 'rows'))
+    worst = 0.0
+    missed = []
+    for label, query in queries.items():
+        median, found = timed(repository, conn, query)
+        worst = max(worst, median)
+        if not found and label != 'no match':
+            missed.append(label)
+        print('%-12s %-22s %10.2f %6d' % (label, query, median, found))
+    print('worst median %.2f ms, budget %.0f ms' % (worst, BUDGET_MS))
+    if missed:
+        print('no results for: %s' % ', '.join(missed))
+    return 0 if worst < BUDGET_MS and not missed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:2]]))
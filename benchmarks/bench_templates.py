@@ -0,0 +1,63 @@
+"""Compare page rendering through the template registry with render_template_string.
+
+Run with ``python benchmarks/bench_templates.py [iterations]``.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+os.chdir(tempfile.mkdtemp())  # app.py creates uploads/ and members.db in the working directory
+os.environ['CLEANUP_WORKER'] = '0'  # nothing to clean up, and the schema is never created here
+
+from flask import render_template_string  # noqa: E402
+
+import app as membership_app  # noqa: E402
+from templates import TEMPLATES  # noqa: E402
+
+FORM_DATA = {
+    'membership_type': 'packaging-paper', 'country': 'Germany', 'company_name': 'Example GmbH',
+    'business_activity': 'paper_production', 'has_online_store': 'yes', 'online_store_products': 'both',
+    'company_street': 'Hauptstraße 1', 'company_postal_code': '10115', 'company_city': 'Berlin',
+    'company_country': 'Germany', 'first_name': 'Erika', 'last_name': 'Mustermann',
+    'email': 'erika@example.com', 'terms_consent': True,
+}
+MEMBER = dict(FORM_DATA, id=1, status='active', join_date='2024-01-01', created_at='2024-01-01 10:00:00',
+              consent_document_filename='abc.pdf', consent_document_original_name='consent.pdf')
+
+CONTEXTS = {
+    'login.html': {'error': None},
+    'dashboard.html': {'username': 'admin', 'members': [dict(MEMBER, id=i) for i in range(20)],
+                       'stats': {'total': 120, 'active': 80, 'with_document': 20},
+                       'page_size': 20, 'next_cursor': 'next', 'prev_cursor': None},
+    'view_member.html': {'member': MEMBER},
+    'membership_step1.html': {'form_data': FORM_DATA, 'step': 1},
+    'membership_step2.html': {'form_data': FORM_DATA, 'step': 2},
+    'membership_step3.html': {'form_data': FORM_DATA, 'step': 3},
+    'membership_step4.html': {'form_data': FORM_DATA, 'step': 4},
+}
+
+
+def timed(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(iterations=300):
+    app = membership_app.app
+    registry = membership_app.template_registry
+    print('%-24s %14s %14s %8s' % ('template', 'string (µs)', 'registry (µs)', 'speedup'))
+    with app.test_request_context('/'):
+        for name, context in CONTEXTS.items():
+            source = TEMPLATES[name]
+            assert render_template_string(source, **context) == registry.render(name, **context)
+            before = timed(lambda: render_template_string(source, **context), iterations)
+            after = timed(lambda: registry.render(name, **context), iterations)
+            print('%-24s %14.1f %14.1f %7.1fx' % (name, before, after, before / after))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])